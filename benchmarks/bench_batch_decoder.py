@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import random
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from hid_utils import DeviceMode, JoyConType, DeviceState, StickCalibration
+from hid_utils.ReportDecoder import ReportDecoder
+from hid_utils.BatchDecoder import BatchDecoder, load_capture_arrays
+from report_streams import STREAM_TARGETS, target_name, synthetic_reports
+print = functools.partial(print, flush=True)
+
+# NOTE: checks that BatchDecoder gives exactly the masks and axis values of the scalar decoder
+#       (exit 1 on a mismatch), then compares the throughput of both
+
+def scalar_decode(decoder: ReportDecoder, reports: np.ndarray):
+    masks = []
+    axis_values = {axis: [] for axis in decoder.axis_types}
+    state = DeviceState()
+    for raw in reports.tolist():
+        masks.append(decoder.decode(raw, state.axis_values))
+        for (axis, values) in axis_values.items():
+            values.append(state.axis_values[axis.value])
+    return (masks, axis_values)
+
+def check(name: str, decoder: ReportDecoder, batch_decoder: BatchDecoder, reports: np.ndarray) -> bool:
+    (masks, axis_values) = scalar_decode(decoder, reports)
+    result = batch_decoder.decode(reports)
+    ok = True
+    if result.button_masks.tolist() != masks:
+        index = next(i for (i, (a, b)) in enumerate(zip(result.button_masks.tolist(), masks)) if a != b)
+        print(f"[Error] {name}: button mask differs at report {index}: {result.button_masks[index]:#x} != {masks[index]:#x}", file=sys.stderr)
+        ok = False
+    if set(result.axis_values) != set(axis_values):
+        print(f"[Error] {name}: axes differ: {list(result.axis_values)} != {list(axis_values)}", file=sys.stderr)
+        return False
+    for (axis, values) in axis_values.items():
+        if result.axis_values[axis].tolist() != values:
+            print(f"[Error] {name}: {axis.name} differs", file=sys.stderr)
+            ok = False
+    return ok
+
+def measure(fn, duration: float) -> tuple[int, float]:
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        count += fn()
+    return (count, time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description='check BatchDecoder against the scalar decoders and compare reports/sec',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-t','--duration', type=float, default=1.0, help='seconds per decoder')
+    parser.add_argument('-n','--num-reports', type=int, default=100000, help='number of synthetic and random reports each')
+    parser.add_argument('-c','--capture', type=str, default=None, help='decode a capture file (hid-raw-print.py -o) instead of synthetic reports')
+    parser.add_argument('--axis-threshold', type=float, default=0.5, help='axis threshold')
+    parser.add_argument('--radial-deadzone', type=float, default=0.0, help='radial deadzone of the 12-bit sticks (0.0 is off)')
+    args = parser.parse_args()
+    calibration = StickCalibration(radial_deadzone=args.radial_deadzone)
+
+    cases = []
+    if args.capture is not None:
+        (_, device_indexes, reports) = load_capture_arrays(args.capture)
+        from hid_utils import HIDCaptureReader
+        with HIDCaptureReader(args.capture) as reader:
+            mode = reader.mode
+            devices = reader.devices
+        for (device_index, (_, _, joycon_type)) in enumerate(devices):
+            cases.append((mode, joycon_type, reports[device_indexes == device_index]))
+    else:
+        rng = random.Random(0)
+        for (mode, joycon_type) in STREAM_TARGETS:
+            synthetic = np.array([raw for (_, raw) in synthetic_reports(mode, joycon_type, args.num_reports)], dtype=np.uint8)
+            uniform = np.array([[rng.randrange(256) for _ in range(64)] for _ in range(args.num_reports)], dtype=np.uint8)
+            cases.append((mode, joycon_type, np.concatenate((synthetic, uniform))))
+
+    ok = True
+    for (mode, joycon_type, reports) in cases:
+        name = target_name(mode, joycon_type)
+        decoder = ReportDecoder.create(mode, joycon_type, args.axis_threshold, calibration)
+        batch_decoder = BatchDecoder(mode, joycon_type, args.axis_threshold, calibration)
+        if not check(name, decoder, batch_decoder, reports):
+            ok = False
+            continue
+
+        raws = reports.tolist()
+        axis_values = DeviceState().axis_values
+        decode = decoder.decode
+        def run_scalar():
+            for raw in raws:
+                decode(raw, axis_values)
+            return len(raws)
+        (scalar_count, scalar_elapsed) = measure(run_scalar, args.duration)
+        (batch_count, batch_elapsed) = measure(lambda: len(batch_decoder.decode(reports)), args.duration)
+
+        scalar_rate = scalar_count / scalar_elapsed
+        batch_rate = batch_count / batch_elapsed
+        print(f"{name:16s} {len(reports):8d} reports  scalar {scalar_rate:12.0f} reports/s  "
+              f"batch {batch_rate:12.0f} reports/s  x{batch_rate / scalar_rate:.1f}")
+
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import random
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid_utils import DeviceMode, JoyConType, DeviceState, StickCalibration
+from hid_utils.ReportDecoder import ReportDecoder
+print = functools.partial(print, flush=True)
+
+DECODER_TARGETS = [
+    (DeviceMode.DINPUT, JoyConType.NONE),
+    (DeviceMode.XINPUT, JoyConType.NONE),
+    (DeviceMode.JOYCON, JoyConType.L),
+    (DeviceMode.JOYCON, JoyConType.R),
+    (DeviceMode.SWITCH_PRO, JoyConType.NONE),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark report decoders (reports/sec)',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-t','--duration', type=float, default=1.0, help='seconds per decoder')
+    parser.add_argument('-n','--num-reports', type=int, default=1000, help='number of synthetic reports')
+    parser.add_argument('--axis-threshold', type=float, default=0.5, help='axis threshold')
+    parser.add_argument('--radial-deadzone', type=float, default=0.0, help='radial deadzone of the 12-bit sticks (0.0 is off)')
+    args = parser.parse_args()
+    calibration = StickCalibration(radial_deadzone=args.radial_deadzone)
+
+    rng = random.Random(0)
+    reports = [[rng.randrange(256) for _ in range(64)] for _ in range(args.num_reports)]
+
+    for (mode, joycon_type) in DECODER_TARGETS:
+        decoder = ReportDecoder.create(mode, joycon_type, args.axis_threshold, calibration)
+        axis_values = DeviceState().axis_values
+        decode = decoder.decode
+
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < args.duration:
+            for raw in reports:
+                decode(raw, axis_values)
+            count += len(reports)
+        elapsed = time.perf_counter() - started
+
+        name = mode.name if joycon_type == JoyConType.NONE else f"{mode.name}_{joycon_type.name}"
+        print(f"{name:12s} {count / elapsed:12.0f} reports/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid_utils import DeviceMode, JoyConType, DeviceState, HIDCaptureReader, AxisHysteresis
+from hid_utils.ReportDecoder import ReportDecoder
+from report_streams import STREAM_TARGETS, target_name, synthetic_reports
+print = functools.partial(print, flush=True)
+
+# NOTE: stick direction edges (ANALOG_* press / release) of a recorded session with the axis threshold alone,
+#       and how many of them each AxisHysteresis setting suppresses. the dwell time runs on the recorded
+#       timestamps (synthetic reports are --rate apart). also compares the decode throughput
+
+def load_timed_capture(path: str) -> tuple[DeviceMode, list[JoyConType], list[tuple[int, int, list[int]]]]:
+    # (mode, joycon type per device index, [(timestamp_ns, device_index, raw)])
+    with HIDCaptureReader(path) as reader:
+        mode = reader.mode
+        joycon_types = [joycon_type for (_, _, joycon_type) in reader.devices]
+        records = [(timestamp_ns, device_index, list(raw)) for (timestamp_ns, device_index, raw) in reader]
+    return (mode, joycon_types, records)
+
+def count_edges(decoder: ReportDecoder, records: list[tuple[int, list[int]]]) -> float:
+    # feeds (timestamp_ns, raw) to the decoder, returns the elapsed seconds
+    axis_values = DeviceState().axis_values
+    decode = decoder.decode
+    started = time.perf_counter()
+    if decoder.hysteresis is None:
+        for (_, raw) in records:
+            decode(raw, axis_values)
+    else:
+        for (timestamp_ns, raw) in records:
+            decode(raw, axis_values, timestamp_ns)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='count stick direction edges suppressed by hysteresis and dwell time',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-c','--capture', type=str, default=None, help='recorded session (hid-raw-print.py -o) instead of synthetic reports')
+    parser.add_argument('-n','--num-reports', type=int, default=20000, help='number of synthetic reports per device')
+    parser.add_argument('--rate', type=float, default=125.0, help='reports/sec of the synthetic reports')
+    parser.add_argument('--axis-threshold', type=float, default=0.5, help='axis threshold (press threshold)')
+    parser.add_argument('--release-thresholds', type=str, default="none,0.45,0.4", help='comma separated release thresholds ("none" for no hysteresis)')
+    parser.add_argument('--min-dwell-ms', type=str, default="0,30", help='comma separated minimum dwell times')
+    args = parser.parse_args()
+
+    # (name, mode, joycon type, [(timestamp_ns, raw)]) per device
+    cases = []
+    if args.capture is not None:
+        try:
+            (mode, joycon_types, records) = load_timed_capture(args.capture)
+        except (OSError, ValueError) as e:
+            print(f"[Error] {args.capture}: {e}", file=sys.stderr)
+            sys.exit(1)
+        for (device_index, joycon_type) in enumerate(joycon_types):
+            device_records = [(timestamp_ns, raw) for (timestamp_ns, index, raw) in records if index == device_index]
+            cases.append((target_name(mode, joycon_type), mode, joycon_type, device_records))
+    else:
+        interval_ns = int(1e9 / args.rate)
+        for (mode, joycon_type) in STREAM_TARGETS:
+            reports = synthetic_reports(mode, joycon_type, args.num_reports)
+            cases.append((target_name(mode, joycon_type), mode, joycon_type,
+                          [(i * interval_ns, raw) for (i, (_, raw)) in enumerate(reports)]))
+
+    try:
+        settings = [AxisHysteresis(None if x.strip().lower() == "none" else float(x), float(y) / 1000)
+                    for x in args.release_thresholds.split(",") for y in args.min_dwell_ms.split(",")]
+    except ValueError as e:
+        print(f"[Error] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for (name, mode, joycon_type, records) in cases:
+        decoder = ReportDecoder.create(mode, joycon_type, args.axis_threshold)
+        elapsed = count_edges(decoder, records)
+        print(f"{name}: {len(records)} reports, axis threshold {args.axis_threshold}, {len(records) / elapsed:10.0f} reports/s")
+        for hysteresis in settings:
+            if not hysteresis.is_enabled():
+                continue
+            try:
+                decoder = ReportDecoder.create(mode, joycon_type, args.axis_threshold, hysteresis=hysteresis)
+            except ValueError as e:
+                print(f"[Warning] {hysteresis}: {e}", file=sys.stderr)
+                continue
+            elapsed = count_edges(decoder, records)
+            edges = decoder.analog_edge_count
+            suppressed = decoder.get_suppressed_count()
+            print(f"  release {str(hysteresis.release_threshold):5s} dwell {hysteresis.min_dwell_sec * 1000:4.0f} ms  "
+                  f"edges {edges:6d}  suppressed {suppressed:6d} ({suppressed / edges * 100 if edges else 0.0:5.1f}%)  "
+                  f"hysteresis holds {decoder.hysteresis_hold_count:5d}  dwell holds {decoder.dwell_hold_count:5d}  "
+                  f"{len(records) / elapsed:10.0f} reports/s")
+
+if __name__ == "__main__":
+    main()
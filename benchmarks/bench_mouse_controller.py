@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gamepad_input_helper.out_events.MouseController import MouseController
+print = functools.partial(print, flush=True)
+
+class StandInMouse:
+    # PyMouse stand-in, every call costs one display server round trip (busy wait)
+    def __init__(self, round_trip_us: float):
+        self.round_trip_ns = int(round_trip_us * 1000)
+        self.x = 500
+        self.y = 500
+        self.calls = 0
+
+    def _round_trip(self):
+        self.calls += 1
+        deadline = time.perf_counter_ns() + self.round_trip_ns
+        while time.perf_counter_ns() < deadline:
+            pass
+
+    def position(self):
+        self._round_trip()
+        return (self.x, self.y)
+
+    def move(self, x, y):
+        self._round_trip()
+        (self.x, self.y) = (x, y)
+
+    def click(self, x, y, button, n):
+        self._round_trip()
+
+    def screen_size(self):
+        return (1920, 1080)
+
+class LegacyMouseController:
+    # MouseController.move_rel before local position tracking: query, then move
+    def __init__(self, mouse):
+        self.mouse = mouse
+
+    def move_rel(self, dx, dy):
+        (cx, cy) = self.mouse.position()
+        self.mouse.move(cx + dx, cy + dy)
+
+def run(controller, num_moves: int) -> tuple[float, float, float]:
+    latencies = []
+    started = time.perf_counter_ns()
+    for i in range(num_moves):
+        d = 1 if (i // 200) % 2 == 0 else -1
+        t = time.perf_counter_ns()
+        controller.move_rel(d, d)
+        latencies.append(time.perf_counter_ns() - t)
+    elapsed_ns = time.perf_counter_ns() - started
+
+    latencies.sort()
+    moves_per_sec = num_moves / (elapsed_ns / 1e9)
+    avg_us = sum(latencies) / len(latencies) / 1000
+    p99_us = latencies[int(len(latencies) * 0.99)] / 1000
+    return (moves_per_sec, avg_us, p99_us)
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark MouseController.move_rel (moves/sec, per-move latency)',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n','--num-moves', type=int, default=20000, help='number of relative moves')
+    parser.add_argument('--round-trip-us', type=float, default=50.0, help='simulated display server round trip (us)')
+    parser.add_argument('--resync-interval-sec', type=float, default=0.5, help='MouseController resync interval')
+    args = parser.parse_args()
+
+    targets = [
+        ("legacy", lambda mouse: LegacyMouseController(mouse)),
+        ("tracked", lambda mouse: MouseController(mouse, resync_interval_sec=args.resync_interval_sec)),
+    ]
+
+    for (name, create) in targets:
+        mouse = StandInMouse(args.round_trip_us)
+        controller = create(mouse)
+        (moves_per_sec, avg_us, p99_us) = run(controller, args.num_moves)
+        print(f"{name:8s} {moves_per_sec:10.0f} moves/s, latency avg {avg_us:8.2f} us, p99 {p99_us:8.2f} us, "
+              f"{mouse.calls / args.num_moves:.3f} backend calls/move")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import random
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid_utils import AxisType
+from gamepad_input_helper import TimerScheduler, LayerModeState
+from gamepad_input_helper.modes import LayerMode
+from gamepad_input_helper.out_events import OutputBackend, RecordingBackend
+from gamepad_input_helper.event_processor import OutEventManager, MouseProcessor
+print = functools.partial(print, flush=True)
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+# (name, axis values, star pressed)
+CASES = [
+    ("R full", {AxisType.ANALOG_R_RIGHT: 1.0, AxisType.ANALOG_R_DOWN: 0.5}, False),
+    ("R diagonal", {AxisType.ANALOG_R_RIGHT: 0.85, AxisType.ANALOG_R_DOWN: 0.2}, False),
+    ("R small", {AxisType.ANALOG_R_RIGHT: 0.7, AxisType.ANALOG_R_DOWN: 0.5}, False),
+    ("L small", {AxisType.ANALOG_L_RIGHT: 0.3, AxisType.ANALOG_L_DOWN: 0.5}, False),
+    ("L small star", {AxisType.ANALOG_L_RIGHT: 0.7, AxisType.ANALOG_L_DOWN: 0.5}, True),
+]
+
+def run_case(axis_dict, is_star: bool, tick_hz: float, duration_sec: float, jitter_sec: float, rng, curve: str) -> tuple[float, float, float, float]:
+    clock = SimulatedClock()
+    backend = RecordingBackend()
+    OutputBackend.set_singleton(backend)
+    out_event_manager = OutEventManager(output_backend=backend)
+
+    processor = MouseProcessor(out_event_manager, mouse_axis_threshold=0.3, mouse_tick_hz=tick_hz, clock=clock,
+                               mouse_response_curves={"default": curve})
+    processor.is_star = is_star
+    processor._update_mouse_move_timer(axis_dict)
+    # NOTE: the scheduler is not started, ticks are run by hand on the simulated clock
+    processor.mouse_move_timer.cancel()
+
+    (vx, vy) = processor._mouse_velocity()
+    ticks = int(duration_sec * tick_hz)
+    for i in range(ticks):
+        # each tick is late by up to jitter_sec
+        clock.now = 1000.0 + i / tick_hz + rng.uniform(0, jitter_sec)
+        processor._mouse_move()
+    elapsed = clock.now - (1000.0 - 1.0 / tick_hz)
+
+    out_event_manager.process_events()
+    # NOTE: the sub-pixel remainder not sent yet counts too, otherwise slow speeds
+    #       read up to a pixel short and the error depends on the duration
+    x = sum(r[1] for r in backend.records if r[0] == "mouse_move_rel") + processor.mouse_remainder_x
+    y = sum(r[2] for r in backend.records if r[0] == "mouse_move_rel") + processor.mouse_remainder_y
+    return (vx, vy, x / elapsed, y / elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description='check mouse ticker speed accuracy (pixels/sec) with a simulated clock',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--tick-hz', type=float, default=250.0, help='mouse tick rate')
+    parser.add_argument('-t','--duration', type=float, default=10.0, help='simulated seconds per case')
+    parser.add_argument('--jitter-ms', type=float, default=1.0, help='max simulated tick lateness (ms)')
+    parser.add_argument('--curve', type=str, default='linear', help='response curve type (linear, power, exponential, s_curve)')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='max relative speed error')
+    args = parser.parse_args()
+
+    TimerScheduler.set_singleton(TimerScheduler())
+    LayerModeState.set_singleton(LayerModeState(layer_mode=LayerMode.MOUSE))
+    rng = random.Random(0)
+
+    failed = False
+    for (name, axis_dict, is_star) in CASES:
+        (vx, vy, mx, my) = run_case(axis_dict, is_star, args.tick_hz, args.duration, args.jitter_ms / 1000, rng, args.curve)
+        expected = (vx ** 2 + vy ** 2) ** 0.5
+        measured = (mx ** 2 + my ** 2) ** 0.5
+        error = abs(measured - expected) / expected if expected > 0 else 0.0
+        ok = error <= args.tolerance
+        failed = failed or not ok
+        print(f"{name:14s} expected {expected:8.1f} px/s ({vx / args.tick_hz:6.3f} px/tick), "
+              f"measured {measured:8.1f} px/s, error {error * 100:5.2f}% {'ok' if ok else 'NG'}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
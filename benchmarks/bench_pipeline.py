@@ -0,0 +1,364 @@
+import gc
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import datetime
+import functools
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid_utils import DeviceMode, JoyConType, ButtonStates, DeviceState
+from gamepad_input_helper import TimerScheduler, LayerModeState, SoftwareKeyRepeatManager, Keymap
+from gamepad_input_helper.modes import LayerMode, JPInputMode
+from gamepad_input_helper.out_events import OutputBackend
+from gamepad_input_helper.event_processor import (OutEventManager, EventProcessorManager,
+    RomajiProcessor, AlphabetProcessor, FlickProcessor, MouseProcessor)
+from report_streams import STREAM_TARGETS, ReplayDevice, target_name, synthetic_reports, synthetic_session, load_capture
+print = functools.partial(print, flush=True)
+
+# NOTE:
+#
+# pushes report streams through each stage of the input path:
+#
+#   decode/<device>       HIDDevice decoding (report -> button events, axis values)
+#   process/<processor>   EventProcessor.process on decoded reports
+#   output                OutEventManager batches on a no-op backend
+#   pipeline/<device>     all of the above per report, as in the main loop
+#
+# events are button events for decode and pipeline, out events for process and output.
+# timers (long press, mouse ticks) are run inline between reports, outside the timed section
+
+PROCESSOR_LAYERS = {
+    RomajiProcessor: (LayerMode.KEYBOARD_JP, JPInputMode.ROMAJI),
+    FlickProcessor: (LayerMode.KEYBOARD_JP, JPInputMode.FLICK),
+    AlphabetProcessor: (LayerMode.KEYBOARD_EN, JPInputMode.ROMAJI),
+    MouseProcessor: (LayerMode.MOUSE, JPInputMode.ROMAJI),
+}
+
+class NullBackend(OutputBackend):
+    # accepts every output call and does nothing
+    def key_press(self, key: str):
+        pass
+
+    def key_down(self, key: str):
+        pass
+
+    def key_up(self, key: str):
+        pass
+
+    def hotkey(self, *keys: str):
+        pass
+
+    def type_text(self, text: str, interval_sec: float | None = None):
+        pass
+
+    def mouse_move_rel(self, dx: int, dy: int):
+        pass
+
+    def mouse_click(self, button = None, count: int = 1):
+        pass
+
+    def mouse_scroll(self, x: int | None = None, y: int | None = None):
+        pass
+
+def measure(items, fn, after=None, repeat: int = 3) -> dict[str, float]:
+    # fn(item) returns the number of events it produced, after() runs untimed after each item.
+    # the fastest of repeat timed passes is reported, to keep runs comparable on a noisy machine
+    n = len(items)
+
+    # first pass: warm up, and count the memory blocks still allocated afterwards
+    # (CPython has no allocation counter, so per-report garbage shows up only if it is kept)
+    gc.collect()
+    gc.disable()
+    blocks = sys.getallocatedblocks()
+    for item in items:
+        fn(item)
+        if after is not None:
+            after()
+    retained_blocks = sys.getallocatedblocks() - blocks
+    gc.enable()
+
+    perf_counter_ns = time.perf_counter_ns
+    best = None
+    for _ in range(repeat):
+        latencies = [0] * n
+        events = 0
+        for i in range(n):
+            item = items[i]
+            t = perf_counter_ns()
+            events += fn(item)
+            latencies[i] = perf_counter_ns() - t
+            if after is not None:
+                after()
+        total_ns = sum(latencies)
+        if best is None or total_ns < best[0]:
+            best = (total_ns, latencies, events)
+
+    (total_ns, latencies, events) = best
+    total_sec = total_ns / 1e9
+    latencies.sort()
+    return {
+        "reports": n,
+        "reports_per_sec": n / total_sec if total_sec > 0 else 0.0,
+        "events_per_sec": events / total_sec if total_sec > 0 else 0.0,
+        "events_per_report": events / n if n > 0 else 0.0,
+        "alloc_blocks_per_report": retained_blocks / n if n > 0 else 0.0,
+        "p50_us": latencies[n // 2] / 1000 if n > 0 else 0.0,
+        "p99_us": latencies[min(int(n * 0.99), n - 1)] / 1000 if n > 0 else 0.0,
+    }
+
+class Runtime:
+    # singletons and processors, as set up by gamepad-input.py
+    def __init__(self, axis_threshold: float):
+        self.axis_threshold = axis_threshold
+        self.timer_scheduler = TimerScheduler()
+        TimerScheduler.set_singleton(self.timer_scheduler)
+        self.layer_mode_state = LayerModeState()
+        LayerModeState.set_singleton(self.layer_mode_state)
+        self.output_backend = NullBackend()
+        OutputBackend.set_singleton(self.output_backend)
+        self.out_event_manager = OutEventManager(output_backend=self.output_backend)
+        SoftwareKeyRepeatManager.set_singleton(SoftwareKeyRepeatManager(
+            delay_sec_first=0.3, delay_sec=0.06, enabled=False, out_event_manager=self.out_event_manager))
+
+        keymap = Keymap.load_default({"use_ctrl_space_for_kanji_key": True})
+        oem = self.out_event_manager
+        self.event_processor_manager = EventProcessorManager()
+        EventProcessorManager.set_singleton(self.event_processor_manager)
+        for processor in [
+                RomajiProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, keymap=keymap),
+                AlphabetProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, keymap=keymap),
+                FlickProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, flick_axis_threshold=0.3),
+                MouseProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, keymap=keymap)]:
+            self.event_processor_manager.add_event_processor(processor)
+
+    def set_layer(self, processor_type):
+        (layer_mode, jp_input_mode) = PROCESSOR_LAYERS[processor_type]
+        self.layer_mode_state.set_layer_mode(layer_mode)
+        self.layer_mode_state.set_jp_input_mode(jp_input_mode)
+
+    def get_current_event_processor(self):
+        m = self.layer_mode_state.get_layer_mode()
+        gp = self.event_processor_manager.get_event_processor
+        if m == LayerMode.KEYBOARD_JP:
+            if self.layer_mode_state.get_jp_input_mode() == JPInputMode.FLICK:
+                return gp(FlickProcessor)
+            return gp(RomajiProcessor)
+        elif m == LayerMode.KEYBOARD_EN:
+            return gp(AlphabetProcessor)
+        return gp(MouseProcessor)
+
+    def run_timers(self):
+        self.timer_scheduler.run_pending()
+
+    def drain(self) -> list:
+        # out events queued so far, without executing them
+        with self.out_event_manager._condition:
+            batch = [oev for (oev, _, _, _) in self.out_event_manager.out_events]
+            self.out_event_manager.out_events.clear()
+        return batch
+
+def decode_stream(mode: DeviceMode, joycon_types: list[JoyConType], stream, axis_threshold: float) -> list:
+    # (events, axis values, button states) per report, like HIDReport
+    devices = [ReplayDevice(mode, joycon_type, axis_threshold) for joycon_type in joycon_types]
+    axis_values = DeviceState().get_axis_values()
+    decoded = []
+    for (device_index, raw) in stream:
+        device = devices[device_index]
+        events = device._read_states(raw)
+        # NOTE: | makes a new array, so each entry keeps its own axis values
+        axis_values = axis_values | device.get_axis_values()
+        mask = 0
+        for d in devices:
+            mask |= d.get_button_mask()
+        decoded.append((events, axis_values, ButtonStates(mask)))
+    return decoded
+
+def run_decode_stage(mode: DeviceMode, joycon_type: JoyConType, raws: list, axis_threshold: float, repeat: int) -> dict:
+    device = ReplayDevice(mode, joycon_type, axis_threshold)
+    read_states = device._read_states
+    return measure(raws, lambda raw: len(read_states(raw)), repeat=repeat)
+
+def run_process_stage(runtime: Runtime, processor_type, decoded: list, repeat: int) -> dict:
+    runtime.set_layer(processor_type)
+    processor = runtime.event_processor_manager.get_event_processor(processor_type)
+    oem = runtime.out_event_manager
+
+    def fn(item):
+        (events, axis_dict, states) = item
+        depth = len(oem.out_events)
+        with processor.lock:
+            processor.process(events, axis_dict, states)
+        return len(oem.out_events) - depth
+
+    def after():
+        runtime.run_timers()
+        runtime.drain()
+
+    result = measure(decoded, fn, after, repeat=repeat)
+    runtime.set_layer(AlphabetProcessor)
+    return result
+
+def collect_batches(runtime: Runtime, decoded: list) -> list:
+    # out events each processor queues per report (untimed)
+    batches = []
+    for processor_type in PROCESSOR_LAYERS:
+        runtime.set_layer(processor_type)
+        processor = runtime.event_processor_manager.get_event_processor(processor_type)
+        for (events, axis_dict, states) in decoded:
+            with processor.lock:
+                processor.process(events, axis_dict, states)
+            runtime.run_timers()
+            batch = runtime.drain()
+            if batch:
+                batches.append(batch)
+    runtime.set_layer(AlphabetProcessor)
+    return batches
+
+def run_output_stage(runtime: Runtime, batches: list, repeat: int) -> dict:
+    oem = runtime.out_event_manager
+
+    def fn(batch):
+        for oev in batch:
+            oem.add_event(oev)
+        return oem.process_events()
+
+    return measure(batches, fn, repeat=repeat)
+
+def run_pipeline_stage(runtime: Runtime, mode: DeviceMode, joycon_types: list[JoyConType], stream, axis_threshold: float, repeat: int) -> dict:
+    devices = [ReplayDevice(mode, joycon_type, axis_threshold) for joycon_type in joycon_types]
+    oem = runtime.out_event_manager
+    axis_values = DeviceState().get_axis_values()
+
+    def fn(item):
+        nonlocal axis_values
+        (device_index, raw) = item
+        device = devices[device_index]
+        events = device._read_states(raw)
+        axis_values = axis_values | device.get_axis_values()
+        mask = 0
+        for d in devices:
+            mask |= d.get_button_mask()
+        processor = runtime.get_current_event_processor()
+        with processor.lock:
+            processor.cause_ns = events[0].timestamp_ns if events else None
+            processor.process(events, axis_values, ButtonStates(mask))
+            processor.cause_ns = None
+        oem.process_events()
+        return len(events)
+
+    def after():
+        runtime.run_timers()
+        oem.process_events()
+
+    return measure(stream, fn, after, repeat=repeat)
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_result(name: str, r: dict):
+    print(f"{name:28s} {r['reports_per_sec']:10.0f} reports/s {r['events_per_sec']:10.0f} events/s  "
+          f"p50 {r['p50_us']:7.2f} us  p99 {r['p99_us']:7.2f} us  {r['alloc_blocks_per_report']:6.2f} blocks/report")
+
+def compare(base: dict, results: dict, max_regression: float) -> bool:
+    # True if no stage got slower than max_regression (reports/s)
+    ok = True
+    print("")
+    print(f"compare with {base['meta'].get('commit')} ({base['meta'].get('time')})")
+    for (name, r) in results["stages"].items():
+        b = base["stages"].get(name)
+        if b is None or b["reports_per_sec"] <= 0:
+            print(f"{name:28s} (no base)")
+            continue
+        change = r["reports_per_sec"] / b["reports_per_sec"] - 1.0
+        p99_change = r["p99_us"] / b["p99_us"] - 1.0 if b["p99_us"] > 0 else 0.0
+        regressed = change < -max_regression
+        ok = ok and not regressed
+        print(f"{name:28s} reports/s {change * 100:+7.1f}%  p99 {p99_change * 100:+7.1f}% {'NG' if regressed else 'ok'}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark the input path stage by stage (reports/sec, events/sec, latency, allocations)',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n','--num-reports', type=int, default=20000, help='synthetic reports per stream')
+    parser.add_argument('-c','--capture', type=str, default=None, help='replay this capture (hid-raw-print.py -o) instead of synthetic streams')
+    parser.add_argument('--process-mode', type=str, choices=[x.name for x in DeviceMode],
+                        default=DeviceMode.SWITCH_PRO.name, help='synthetic device for the process/output stages')
+    parser.add_argument('--axis-threshold', type=float, default=0.5, help='axis threshold')
+    parser.add_argument('-r','--repeat', type=int, default=3, help='timed passes per stage (the fastest is reported)')
+    parser.add_argument('--seed', type=int, default=0, help='synthetic stream seed')
+    parser.add_argument('-o','--output', type=str, default=None, help='save results as JSON')
+    parser.add_argument('--compare', type=str, default=None, help='compare with a saved JSON result')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='max reports/sec drop per stage for --compare')
+    args = parser.parse_args()
+
+    if args.capture is not None:
+        (mode, joycon_types, stream) = load_capture(args.capture)
+        sessions = [(mode, joycon_types, stream)]
+        decode_targets = [(mode, joycon_type, [raw for (i, raw) in stream if i == index])
+                          for (index, joycon_type) in enumerate(joycon_types)]
+        process_session = sessions[0]
+    else:
+        decode_targets = [(mode, joycon_type, [raw for (_, raw) in synthetic_reports(mode, joycon_type, args.num_reports, seed=args.seed)])
+                          for (mode, joycon_type) in STREAM_TARGETS]
+        sessions = []
+        for mode in [DeviceMode.DINPUT, DeviceMode.XINPUT, DeviceMode.JOYCON, DeviceMode.SWITCH_PRO]:
+            (joycon_types, stream) = synthetic_session(mode, args.num_reports, seed=args.seed)
+            sessions.append((mode, joycon_types, stream))
+        process_session = next(s for s in sessions if s[0].name == args.process_mode)
+
+    runtime = Runtime(args.axis_threshold)
+    stages: dict[str, dict] = {}
+
+    def add(name: str, result: dict):
+        stages[name] = result
+        print_result(name, result)
+
+    for (mode, joycon_type, raws) in decode_targets:
+        add(f"decode/{target_name(mode, joycon_type)}", run_decode_stage(mode, joycon_type, raws, args.axis_threshold, args.repeat))
+
+    (mode, joycon_types, stream) = process_session
+    decoded = decode_stream(mode, joycon_types, stream, args.axis_threshold)
+    for processor_type in PROCESSOR_LAYERS:
+        add(f"process/{processor_type.__name__}", run_process_stage(runtime, processor_type, decoded, args.repeat))
+
+    add("output", run_output_stage(runtime, collect_batches(runtime, decoded), args.repeat))
+
+    for (mode, joycon_types, stream) in sessions:
+        add(f"pipeline/{mode.name}", run_pipeline_stage(runtime, mode, joycon_types, stream, args.axis_threshold, args.repeat))
+
+    results = {
+        "meta": {
+            "commit": get_commit(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "capture": args.capture,
+            "num_reports": args.num_reports,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "stages": stages,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            base = json.load(f)
+        if not compare(base, results, args.max_regression):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import sys
+import time
+import threading
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid_utils import (DeviceMode, JoyConType, ButtonStates, HIDDevice, HIDReport, HIDBackend, FakeHIDBackend,
+    HIDDeviceReaderGroup, SyntheticReports)
+from gamepad_input_helper import TimerScheduler, LayerModeState, SoftwareKeyRepeatManager, Keymap, ControllerSession
+from gamepad_input_helper.out_events import OutputBackend
+from gamepad_input_helper.event_processor import (OutEventManager,
+    RomajiProcessor, AlphabetProcessor, FlickProcessor, MouseProcessor)
+from bench_pipeline import NullBackend, measure
+from report_streams import ReplayDevice, synthetic_session
+print = functools.partial(print, flush=True)
+
+# NOTE:
+#
+# how one process scales with the number of controllers (ControllerSession each,
+# sharing the out event manager, the timer scheduler and the output backend):
+#
+#   process    reports of all controllers in turns through ControllerSession, on one thread,
+#              as fast as possible. capacity is how many controllers at --rate that would keep busy
+#   realtime   every device serves synthetic reports at --rate (FakeHIDBackend), read by
+#              HIDDeviceReaderGroup and processed as in gamepad-input.py for --duration seconds.
+#              ok if each controller gets at least 95% of its reports through and none is dropped
+
+def create_session(name: str, out_event_manager: OutEventManager, keymap: Keymap, devices: list) -> ControllerSession:
+    # processors as set up by gamepad-input.py (settings.yaml values)
+    session = ControllerSession(name, LayerModeState(),
+        SoftwareKeyRepeatManager(delay_sec_first=0.3, delay_sec=0.06, enabled=True, out_event_manager=out_event_manager),
+        devices)
+    oem = out_event_manager
+    for processor in [
+            RomajiProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, keymap=keymap),
+            AlphabetProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, keymap=keymap),
+            FlickProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, flick_axis_threshold=0.3),
+            MouseProcessor(oem, use_ctrl_space_for_kanji_key=True, long_press_threshold_sec=0.2, keymap=keymap)]:
+        session.add_event_processor(processor)
+    return session
+
+def get_joycon_types(mode: DeviceMode) -> list[JoyConType]:
+    return [JoyConType.L, JoyConType.R] if mode == DeviceMode.JOYCON else [JoyConType.NONE]
+
+def run_process(num_controllers: int, mode: DeviceMode, keymap: Keymap, num_reports: int,
+        axis_threshold: float, repeat: int) -> dict:
+    timer_scheduler = TimerScheduler()
+    TimerScheduler.set_singleton(timer_scheduler)
+    oem = OutEventManager(output_backend=OutputBackend.get_singleton())
+
+    # reports of the controllers in turns: (session, device, raw)
+    streams = []
+    for i in range(num_controllers):
+        (joycon_types, stream) = synthetic_session(mode, num_reports, seed=i * 2)
+        devices = [ReplayDevice(mode, joycon_type, axis_threshold) for joycon_type in joycon_types]
+        session = create_session(f"controller{i}", oem, keymap, devices)
+        streams.append([(session, devices[device_index], raw) for (device_index, raw) in stream])
+    items = [item for turn in zip(*streams) for item in turn]
+
+    def fn(item):
+        (session, device, raw) = item
+        events = device._read_states(raw)
+        report = HIDReport(device, 0, raw, events, ButtonStates(device.state.button_mask), device.axis_values)
+        (axis_dict, state_dict) = session.merge_report(report)
+        session.process(events, axis_dict, state_dict)
+        oem.process_events()
+        return len(events)
+
+    def after():
+        timer_scheduler.run_pending()
+        oem.process_events()
+
+    return measure(items, fn, after, repeat=repeat)
+
+def run_realtime(num_controllers: int, mode: DeviceMode, keymap: Keymap, rate_hz: float,
+        duration_sec: float, axis_threshold: float) -> dict:
+    interval_ns = int(1e9 / rate_hz)
+    backend = FakeHIDBackend()
+    # NOTE: devices are opened by vendor and product id, so every device gets its own product id
+    device_specs = []
+    for i in range(num_controllers):
+        for (j, joycon_type) in enumerate(get_joycon_types(mode)):
+            product_id = 0x1000 + len(device_specs)
+            backend.add_device(0x1209, product_id, f"Fake {mode.name} {i}",
+                               lambda joycon_type=joycon_type, seed=i * 2 + j:
+                                   ((interval_ns, raw) for raw in SyntheticReports(mode, joycon_type, seed=seed)))
+            device_specs.append((i, product_id, joycon_type))
+    HIDBackend.set_singleton(backend)
+
+    timer_scheduler = TimerScheduler()
+    TimerScheduler.set_singleton(timer_scheduler)
+    oem = OutEventManager(output_backend=OutputBackend.get_singleton())
+
+    sessions = [create_session(f"controller{i}", oem, keymap, []) for i in range(num_controllers)]
+    # NOTE: opened last, reports are due from the open on
+    for (i, product_id, joycon_type) in device_specs:
+        sessions[i].devices.append(HIDDevice(0x1209, product_id, mode=mode, joycon_type=joycon_type,
+                                             axis_threshold=axis_threshold, nonblocking=False))
+    session_by_device = {device: session for session in sessions for device in session.devices}
+    all_devices = [device for session in sessions for device in session.devices]
+
+    is_running = True
+    def output_thread():
+        while is_running:
+            oem.process_events(timeout_sec=0.05)
+
+    output = threading.Thread(target=output_thread, daemon=True)
+    reader_group = HIDDeviceReaderGroup(all_devices)
+    timer_scheduler.start()
+    output.start()
+    reader_group.start()
+
+    latencies = []
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    while time.monotonic() - started < duration_sec:
+        # NOTE: the read to processed latency includes waiting behind the reports of other controllers
+        for report in reader_group.get_reports(0.1):
+            session = session_by_device[report.device]
+            (axis_dict, state_dict) = session.merge_report(report)
+            session.process(report.events, axis_dict, state_dict, cause_ns=report.timestamp_ns)
+            latencies.append(time.monotonic_ns() - report.timestamp_ns)
+    elapsed = time.monotonic() - started
+    cpu_sec = time.process_time() - cpu_started
+    ended_ns = time.monotonic_ns()
+
+    reader_group.stop()
+    timer_scheduler.stop()
+    is_running = False
+    output.join()
+
+    # reports due per controller since its devices were opened (a Joy-Con pair is two devices)
+    min_ratio = min(session.report_count / sum(rate_hz * (ended_ns - device.opened_ns) / 1e9 for device in session.devices)
+                    for session in sessions)
+    dropped = backend.get_dropped_count()
+    n = len(latencies)
+    latencies.sort()
+    return {
+        "reports_per_sec": n / elapsed,
+        "min_rate_ratio": min_ratio,
+        "dropped": dropped,
+        "cpu_percent": cpu_sec / elapsed * 100,
+        "p50_ms": latencies[n // 2] / 1e6 if n > 0 else 0.0,
+        "p99_ms": latencies[min(int(n * 0.99), n - 1)] / 1e6 if n > 0 else 0.0,
+        "out_events": oem.processed_count,
+        "ok": min_ratio >= 0.95 and dropped == 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark one process driving several controllers (reports/sec, latency, cpu)',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n','--controllers', type=str, default="1,2,4,8,16", help='comma separated numbers of controllers')
+    parser.add_argument('-m','--device-mode', type=str, choices=[x.name for x in DeviceMode],
+                        default=DeviceMode.SWITCH_PRO.name, help='device mode of every controller')
+    parser.add_argument('--rate', type=float, default=120.0, help='reports/sec per device')
+    parser.add_argument('-t','--duration', type=float, default=3.0, help='seconds per realtime run')
+    parser.add_argument('--num-reports', type=int, default=5000, help='synthetic reports per controller for the process stage')
+    parser.add_argument('--axis-threshold', type=float, default=0.5, help='axis threshold')
+    parser.add_argument('-r','--repeat', type=int, default=3, help='timed passes of the process stage (the fastest is reported)')
+    parser.add_argument('--no-realtime', action='store_true', help='process stage only')
+    args = parser.parse_args()
+
+    mode = DeviceMode.from_str(args.device_mode)
+    counts = [int(x) for x in args.controllers.split(",")]
+    if any(count <= 0 for count in counts):
+        print(f"[Error] number of controllers must be positive: {args.controllers}", file=sys.stderr)
+        sys.exit(1)
+
+    OutputBackend.set_singleton(NullBackend())
+    keymap = Keymap.load_default({"use_ctrl_space_for_kanji_key": True})
+    devices_per_controller = len(get_joycon_types(mode))
+
+    print(f"{mode.name}, {args.rate:.0f} Hz per device")
+    for count in counts:
+        r = run_process(count, mode, keymap, args.num_reports, args.axis_threshold, args.repeat)
+        capacity = r["reports_per_sec"] / (args.rate * devices_per_controller)
+        print(f"process  {count:3d} controllers {r['reports_per_sec']:10.0f} reports/s  "
+              f"p50 {r['p50_us']:7.2f} us  p99 {r['p99_us']:7.2f} us  capacity {capacity:6.0f} controllers")
+
+    if args.no_realtime:
+        return
+
+    for count in counts:
+        r = run_realtime(count, mode, keymap, args.rate, args.duration, args.axis_threshold)
+        print(f"realtime {count:3d} controllers {r['reports_per_sec']:10.0f} reports/s  "
+              f"min rate {r['min_rate_ratio'] * 100:5.1f}%  dropped {r['dropped']:5d}  cpu {r['cpu_percent']:5.1f}%  "
+              f"p50 {r['p50_ms']:6.2f} ms  p99 {r['p99_ms']:6.2f} ms  {r['out_events']:6d} out events  "
+              f"{'ok' if r['ok'] else 'NG'}")
+
+if __name__ == "__main__":
+    main()
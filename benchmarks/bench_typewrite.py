@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import types
+import argparse
+import functools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gamepad_input_helper.out_events import TypeWrite, OutputBackend
+from gamepad_input_helper.event_processor import OutEventManager
+print = functools.partial(print, flush=True)
+
+SYLLABLES = ["ka", "si", "xtsu", "nn", "sya", "a", "ltu", "kyo"]
+
+def create_stand_in_pyautogui(round_trip_us: float) -> types.ModuleType:
+    # pyautogui stand-in with the same pause semantics:
+    # typewrite() presses each character, sleeps interval after each one,
+    # then sleeps PAUSE unless _pause=False. every key event costs one round trip (busy wait)
+    module = types.ModuleType("pyautogui")
+    module.PAUSE = 0.1
+    module.key_events = 0
+    round_trip_ns = int(round_trip_us * 1000)
+
+    def round_trip():
+        module.key_events += 1
+        deadline = time.perf_counter_ns() + round_trip_ns
+        while time.perf_counter_ns() < deadline:
+            pass
+
+    def press(key, _pause=True):
+        round_trip()
+        round_trip()
+        if _pause:
+            time.sleep(module.PAUSE)
+
+    def typewrite(message, interval=0.0, _pause=True):
+        for c in message:
+            press(c, _pause=False)
+            time.sleep(interval)
+        if _pause:
+            time.sleep(module.PAUSE)
+
+    module.press = press
+    module.typewrite = typewrite
+    return module
+
+class StandInPyMouse:
+    # mouse output is not used here
+    def screen_size(self):
+        return (1920, 1080)
+
+def run(out_event_manager: OutEventManager, num_syllables: int) -> tuple[float, float]:
+    # one syllable per batch, as typed on the gamepad
+    latencies = []
+    for i in range(num_syllables):
+        t = time.perf_counter_ns()
+        out_event_manager.add_event(TypeWrite(SYLLABLES[i % len(SYLLABLES)]))
+        out_event_manager.process_events()
+        latencies.append(time.perf_counter_ns() - t)
+
+    latencies.sort()
+    avg_ms = sum(latencies) / len(latencies) / 1e6
+    max_ms = latencies[-1] / 1e6
+    return (avg_ms, max_ms)
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark TypeWrite end-to-end time per romaji syllable (pyautogui backend)',
+                                        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n','--num-syllables', type=int, default=40, help='number of syllables typed')
+    parser.add_argument('--pause-sec', type=float, default=0.03, help='pyautogui.PAUSE (pyautogui_pause_sec)')
+    parser.add_argument('--round-trip-us', type=float, default=50.0, help='simulated display server round trip (us)')
+    args = parser.parse_args()
+
+    # NOTE: stand-in modules, PyAutoGUIBackend imports pyautogui and pymouse in __init__
+    pyautogui = create_stand_in_pyautogui(args.round_trip_us)
+    sys.modules["pyautogui"] = pyautogui
+    sys.modules["pymouse"] = types.SimpleNamespace(PyMouse=StandInPyMouse)
+    from gamepad_input_helper.out_events.PyAutoGUIBackend import PyAutoGUIBackend
+
+    class LegacyPyAutoGUIBackend(PyAutoGUIBackend):
+        # type_text before whole-string injection: pause after every character and at the end
+        def type_text(self, text: str, interval_sec: float | None = None):
+            self.pyautogui.typewrite(text, interval=self.pyautogui.PAUSE)
+
+    targets = [
+        ("legacy", LegacyPyAutoGUIBackend),
+        ("batched", PyAutoGUIBackend),
+    ]
+
+    chars = sum(len(SYLLABLES[i % len(SYLLABLES)]) for i in range(args.num_syllables))
+    for (name, create) in targets:
+        backend = create(pause_sec=args.pause_sec)
+        OutputBackend.set_singleton(backend)
+        out_event_manager = OutEventManager(output_backend=backend)
+
+        pyautogui.key_events = 0
+        (avg_ms, max_ms) = run(out_event_manager, args.num_syllables)
+        print(f"{name:8s} {avg_ms:8.2f} ms/syllable avg, {max_ms:8.2f} ms max, "
+              f"{pyautogui.key_events / chars:.1f} key events/char")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import itertools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hid_utils import DeviceMode, JoyConType, HIDDevice, HIDCaptureReader, DeviceState
+from hid_utils.ReportDecoder import ReportDecoder
+from hid_utils.SyntheticReports import SyntheticReports
+
+# NOTE: report streams shared by the benchmarks: synthetic sessions per device, or a capture
+#       recorded with `hid-raw-print.py -o`. a stream is a list of (device_index, raw)
+
+STREAM_TARGETS = [
+    (DeviceMode.DINPUT, JoyConType.NONE),
+    (DeviceMode.XINPUT, JoyConType.NONE),
+    (DeviceMode.JOYCON, JoyConType.L),
+    (DeviceMode.JOYCON, JoyConType.R),
+    (DeviceMode.SWITCH_PRO, JoyConType.NONE),
+]
+
+def target_name(mode: DeviceMode, joycon_type: JoyConType) -> str:
+    return mode.name if joycon_type == JoyConType.NONE else f"{mode.name}_{joycon_type.name}"
+
+class ReplayDevice:
+    # decodes reports like HIDDevice, without opening a device
+    _read_states = HIDDevice._read_states
+    get_axis_values = HIDDevice.get_axis_values
+    get_button_mask = HIDDevice.get_button_mask
+
+    def __init__(self, mode: DeviceMode, joycon_type: JoyConType = JoyConType.NONE, axis_threshold: float = 0.5):
+        self.mode = mode
+        self.joycon_type = joycon_type
+        self.decoder = ReportDecoder.create(mode, joycon_type, axis_threshold)
+        self.state = DeviceState()
+        self.axis_values = self.state.get_axis_values(tuple(self.decoder.axis_types))
+
+def synthetic_reports(mode: DeviceMode, joycon_type: JoyConType, num_reports: int,
+        seed: int = 0, report_size: int = 64, press_rate: float = 0.05) -> list[tuple[int, list[int]]]:
+    reports = SyntheticReports(mode, joycon_type, seed=seed, report_size=report_size, press_rate=press_rate)
+    return [(0, raw) for raw in itertools.islice(reports, num_reports)]
+
+def synthetic_session(mode: DeviceMode, num_reports: int, seed: int = 0) -> tuple[list[JoyConType], list[tuple[int, list[int]]]]:
+    # (joycon type per device index, stream), both Joy-Cons report in turns on JOYCON
+    if mode != DeviceMode.JOYCON:
+        return ([JoyConType.NONE], synthetic_reports(mode, JoyConType.NONE, num_reports, seed=seed))
+    l_stream = synthetic_reports(mode, JoyConType.L, (num_reports + 1) // 2, seed=seed)
+    r_stream = synthetic_reports(mode, JoyConType.R, num_reports // 2, seed=seed + 1)
+    stream = []
+    for i in range(num_reports):
+        (_, raw) = (l_stream if i % 2 == 0 else r_stream)[i // 2]
+        stream.append((i % 2, raw))
+    return ([JoyConType.L, JoyConType.R], stream)
+
+def load_capture(path: str) -> tuple[DeviceMode, list[JoyConType], list[tuple[int, list[int]]]]:
+    # (mode, joycon type per device index, stream)
+    with HIDCaptureReader(path) as reader:
+        mode = reader.mode
+        joycon_types = [joycon_type for (_, _, joycon_type) in reader.devices]
+        stream = [(device_index, list(raw)) for (_, device_index, raw) in reader]
+    return (mode, joycon_types, stream)
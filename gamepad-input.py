@@ -5,18 +5,19 @@ import time
 # import asyncio
 import threading
 import argparse
-import pyautogui
 from enum import Enum
 
-from hid_utils import HIDDeviceManager, DeviceMode, JoyConType, AxisType, ButtonType
-from gamepad_input_helper import SoftwareKeyRepeatManager, DebugState, LayerModeState
+from hid_utils import HIDDeviceManager, HIDDevice, HIDDeviceMonitor, HIDBackend, FakeHIDBackend, HIDDeviceReaderGroup, DeviceMode, JoyConType, AxisType, ButtonType, ButtonStates, AxisValues, ReaderMode, StickCalibration, StickCalibrator, CalibrationStore, AxisHysteresis
+from gamepad_input_helper import SoftwareKeyRepeatManager, DebugState, LayerModeState, ReaderStats, Keymap, TimerScheduler, LatencyStats, ControllerSession
 from gamepad_input_helper.modes import LayerMode, JPInputMode, SymbolMode
+from gamepad_input_helper.out_events import OutputBackend
 from gamepad_input_helper.event_processor import OutEventManager, RomajiProcessor, FlickProcessor, AlphabetProcessor, MouseProcessor, EventProcessorManager
 
 import functools
 print = functools.partial(print, flush=True)
 
 mode_names = [x.name for x in DeviceMode]
+reader_mode_names = [x.name for x in ReaderMode]
 
 parser = argparse.ArgumentParser(description='gamepad input',
                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
@@ -24,6 +25,8 @@ parser.add_argument('-i','--vendor', type=lambda x: int(x,0), default=0x046d, he
 parser.add_argument('-p','--product', type=lambda x: int(x,0), default=0xc216, help='product id')
 parser.add_argument('-m','--device-mode', type=str, choices=mode_names,
                      default=DeviceMode.DINPUT.name, help='device mode')
+parser.add_argument('-r','--reader-mode', type=str, choices=reader_mode_names,
+                     default=ReaderMode.POLL.name, help='reader mode (POLL: nonblocking read and 1ms sleep, BLOCK: blocking read until a report arrives, THREAD: blocking reader thread per device)')
 # parser.add_argument('-t','--threshold', type=float, default=0.5, help='axis threshold')
 parser.add_argument('-s','--settings-file', type=str, default="settings.yaml", help='settings file')
 parser.add_argument('-vv','--verbose', action='store_true', help='verbose')
@@ -31,12 +34,18 @@ parser.add_argument('-d','--debug', action='store_true', help='debug')
 parser.add_argument('-de','--debug-event', action='store_true', help='debug events')
 parser.add_argument('-da','--debug-axis', action='store_true', help='debug axis values')
 parser.add_argument('-ds','--debug-states', action='store_true', help='debug button states')
+parser.add_argument('-st','--stats', action='store_true', help='print cpu usage, wakeups and report latency periodically')
+parser.add_argument('-lt','--latency', action='store_true', help='record per-stage latency histograms (HID read to output), dump on SIGUSR1 and at exit')
+parser.add_argument('--fake-hid', type=str, default=None, metavar='SOURCE', help='run without hardware: "synthetic" reports or a capture file recorded by hid-raw-print.py -o')
+parser.add_argument('--fake-hid-rate', type=float, default=None, metavar='HZ', help='report rate of --fake-hid (synthetic: 125, capture: recorded timing)')
+parser.add_argument('--calibrate', type=float, default=None, metavar='SEC', help='learn the stick centers, ranges and deadzone for SEC seconds at startup, and save them to stick_calibration_file')
 parser.add_argument('-v','--version', action='version', version='%(prog)s 0.0.1', help='show version')
 args = parser.parse_args()
 
 vendor_id = args.vendor
 product_id = args.product
 device_mode = DeviceMode.from_str(args.device_mode)
+reader_mode = ReaderMode.from_str(args.reader_mode)
 
 is_debug = args.debug
 is_verbose = args.verbose
@@ -47,6 +56,11 @@ DebugState.set_verbose(is_verbose)
 is_debug_event = args.debug_event
 is_debug_axis = args.debug_axis
 is_debug_states = args.debug_states
+is_stats = args.stats
+is_latency = args.latency
+fake_hid_source = args.fake_hid
+fake_hid_rate = args.fake_hid_rate
+calibrate_sec = args.calibrate
 
 settings_file = args.settings_file
 
@@ -63,7 +77,59 @@ def get_setting_or(key: str, default: any):
     else:
         return default
     
-axis_threshold = get_setting_or('axis_threshold', 0.3)
+def get_controller_setting_or(controller: dict, key: str, default: any):
+    # settings of a controller entry override the top-level ones
+    if key in controller:
+        return controller[key]
+    return get_setting_or(key, default)
+
+# NOTE: several controllers in one process (e.g. two operators, or a macro pad next to the main pad),
+#       each with its own layer state, key repeat and processors. without "controllers" in the settings,
+#       the one controller of the args
+controller_settings = get_setting_or('controllers', None) or []
+if controller_settings:
+    print("[Info] controllers are set in the settings file, device mode, vendor and product id will be ignored", file=sys.stderr)
+else:
+    controller_settings = [{"name": "main", "device_mode": device_mode.name, "vendor_id": vendor_id, "product_id": product_id}]
+
+def get_controller_device_ids(mode: DeviceMode, vendor_id: int, product_id: int) -> list[tuple[int, int, JoyConType]]:
+    if mode == DeviceMode.JOYCON:
+        return [(0x057e, 0x2006, JoyConType.L), (0x057e, 0x2007, JoyConType.R)]
+    if mode == DeviceMode.SWITCH_PRO:
+        return [(0x057e, 0x2009, JoyConType.NONE)]
+    return [(vendor_id, product_id, JoyConType.NONE)]
+
+# (name, device mode, device ids, settings) per controller
+controllers = []
+_used_device_ids = {}
+for (index, controller) in enumerate(controller_settings):
+    name = str(controller.get('name', f"controller{index}"))
+    try:
+        mode = DeviceMode.from_str(controller.get('device_mode', DeviceMode.DINPUT.name))
+    except ValueError as e:
+        print(f"[Error] controller {name}: {e}", file=sys.stderr)
+        sys.exit(1)
+    device_ids = get_controller_device_ids(mode,
+                                           controller.get('vendor_id', 0x046d),
+                                           controller.get('product_id', 0xc216))
+    # NOTE: devices are opened by vendor and product id, so one model serves one controller
+    for (_vendor_id, _product_id, _) in device_ids:
+        if (_vendor_id, _product_id) in _used_device_ids:
+            print(f"[Error] controllers {_used_device_ids[(_vendor_id, _product_id)]} and {name} "
+                  f"both use 0x{_vendor_id:04x}:0x{_product_id:04x}", file=sys.stderr)
+            sys.exit(1)
+        _used_device_ids[(_vendor_id, _product_id)] = name
+    controllers.append((name, mode, device_ids, controller))
+
+if device_mode == DeviceMode.JOYCON and len(controllers) == 1:
+    print("[Info] on JOYCON mode, vendor and product id will be ignored", file=sys.stderr)
+
+if len(controllers) > 1 and reader_mode != ReaderMode.THREAD:
+    print(f"[Info] {len(controllers)} controllers, reader mode {reader_mode.name} is replaced by THREAD", file=sys.stderr)
+    reader_mode = ReaderMode.THREAD
+
+reader_idle_timeout_sec = get_setting_or('reader_idle_timeout_sec', 0.1)
+nonblocking = reader_mode == ReaderMode.POLL
 
 if is_debug:
     print(f"settings: {_settings}")
@@ -71,31 +137,48 @@ if is_debug:
 # for device in hid.enumerate():
 #     print(f"0x{device['vendor_id']:04x}:0x{device['product_id']:04x} {device['product_string']}")
 
-manager = HIDDeviceManager()
-gamepad = None
-joycon_l = None
-joycon_r = None
-
-# if DeviceMode.SWITCH_PRO
-if device_mode == DeviceMode.SWITCH_PRO:
-    vendor_id = 0x057e
-    product_id = 0x2009
-
-if device_mode == DeviceMode.JOYCON:
-    vendor_id_l = 0x057e
-    product_id_l = 0x2006
-    vendor_id_r = 0x057e
-    product_id_r = 0x2007
+if fake_hid_source is not None:
+    try:
+        if fake_hid_source == "synthetic":
+            fake_hid_backend = FakeHIDBackend()
+            for (index, (name, mode, device_ids, controller)) in enumerate(controllers):
+                (_vendor_id, _product_id, _) = device_ids[0]
+                fake_hid_backend.add_synthetic(mode, rate_hz=fake_hid_rate or 125.0,
+                                               vendor_id=_vendor_id, product_id=_product_id, seed=index * 2)
+        else:
+            fake_hid_backend = FakeHIDBackend.from_capture(fake_hid_source, rate_hz=fake_hid_rate)
+    except (OSError, ValueError) as e:
+        print(f"[Error] fake hid: {e}", file=sys.stderr)
+        sys.exit(1)
+    HIDBackend.set_singleton(fake_hid_backend)
+    print(f"[Info] fake hid: {fake_hid_source}", file=sys.stderr)
 
-    print("[Info] on JOYCON mode, vendor and product id will be ignored", file=sys.stderr)
+manager = HIDDeviceManager()
 
-    for (vendor_id, product_id) in [(vendor_id_l, product_id_l), (vendor_id_r, product_id_r)]:
+# stick calibration profiles per device serial number, compiled into the decoder tables when a device is opened
+calibration_store = CalibrationStore.load(get_setting_or('stick_calibration_file', '.stick_calibration.json'))
+
+def get_device_calibration(vendor_id: int, product_id: int, controller: dict) -> StickCalibration | None:
+    calibration = calibration_store.get(vendor_id, product_id, manager.get_serial_number(vendor_id, product_id))
+    # a radial deadzone in the settings overrides the one of the profile
+    radial_deadzone = get_controller_setting_or(controller, 'stick_radial_deadzone', None)
+    if radial_deadzone is not None:
+        calibration = (calibration or StickCalibration()).with_radial_deadzone(radial_deadzone)
+    return calibration
+
+def get_axis_hysteresis(controller: dict) -> AxisHysteresis | None:
+    hysteresis = AxisHysteresis(release_threshold=get_controller_setting_or(controller, 'axis_release_threshold', None),
+                                min_dwell_sec=get_controller_setting_or(controller, 'axis_min_dwell_sec', 0.0))
+    return hysteresis if hysteresis.is_enabled() else None
+
+def open_controller_devices(mode: DeviceMode, device_ids: list[tuple[int, int, JoyConType]], controller: dict) -> list[HIDDevice]:
+    devices = []
+    for (vendor_id, product_id, joycon_type) in device_ids:
         if not manager.has_device(vendor_id, product_id):
-            # print(f"[Error] device not found: 0x{vendor_id:04x}:0x{product_id:04x}", file=sys.stderr)
-            if product_id == product_id_l:
-                print(f"[Error] JOYCON_L device not found: 0x{vendor_id_l:04x}:0x{product_id_l:04x}", file=sys.stderr)
+            if joycon_type == JoyConType.NONE:
+                print(f"[Error] device not found: 0x{vendor_id:04x}:0x{product_id:04x}", file=sys.stderr)
             else:
-                print(f"[Error] JOYCON_R device not found: 0x{vendor_id_r:04x}:0x{product_id_r:04x}", file=sys.stderr)
+                print(f"[Error] JOYCON_{joycon_type.name} device not found: 0x{vendor_id:04x}:0x{product_id:04x}", file=sys.stderr)
 
             # current device list
             print("", file=sys.stderr)
@@ -103,105 +186,225 @@ if device_mode == DeviceMode.JOYCON:
             manager.list_devices(out=sys.stderr)
             sys.exit(1)
 
-        joycon_type = JoyConType.NONE
-
-        if product_id == product_id_l:
-            joycon_type = JoyConType.L
-        else:
-            joycon_type = JoyConType.R
-
-        _gamepad = manager.get_device(vendor_id, product_id,
-                                      mode=device_mode,
-                                      joycon_type=joycon_type,
-                                      axis_threshold=axis_threshold)
-        if product_id == product_id_l:
-            joycon_l = _gamepad
-        else:
-            joycon_r = _gamepad
-
-
-    # raise NotImplementedError("JOYCON mode is not implemented yet")
+        try:
+            calibration = get_device_calibration(vendor_id, product_id, controller)
+        except ValueError as e:
+            print(f"[Error] stick calibration of 0x{vendor_id:04x}:0x{product_id:04x}: {e}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            device = manager.get_device(vendor_id, product_id,
+                                        mode=mode,
+                                        joycon_type=joycon_type,
+                                        axis_threshold=get_controller_setting_or(controller, 'axis_threshold', 0.3),
+                                        nonblocking=nonblocking,
+                                        calibration=calibration,
+                                        hysteresis=get_axis_hysteresis(controller),
+                                        trigger_threshold=get_controller_setting_or(controller, 'trigger_threshold', 0.5))
+        except ValueError as e:
+            print(f"[Error] 0x{vendor_id:04x}:0x{product_id:04x}: {e}", file=sys.stderr)
+            sys.exit(1)
+        if is_debug:
+            print(f"{device.get_name()} serial: {device.serial_number}, {device.get_calibration()}")
+        devices.append(device)
+    return devices
+
+controller_devices = [open_controller_devices(mode, device_ids, controller) for (_, mode, device_ids, controller) in controllers]
+all_devices = [device for devices in controller_devices for device in devices]
+
+def calibrate_devices(duration_sec: float):
+    # reads the reports itself, before the readers start (button events are dropped)
+    calibrators = []
+    for ((_, _, _, controller), devices) in zip(controllers, controller_devices):
+        for device in devices:
+            # NOTE: DINPUT sticks are 8-bit with a fixed center, nothing to learn
+            if device.decoder.stick_ranges:
+                calibrators.append((device, controller, StickCalibrator(device.decoder)))
+    if not calibrators:
+        print("[Warning] no device to calibrate (only JOYCON and SWITCH_PRO sticks are calibrated)", file=sys.stderr)
+        return
+
+    print(f"[Info] calibrating sticks for {duration_sec:.0f} sec: "
+          "leave the sticks alone for a few seconds, then rotate each stick along its edge", file=sys.stderr)
+    started = time.monotonic()
+    next_progress = started + 1.0
+    while time.monotonic() - started < duration_sec:
+        has_read = False
+        for (device, _, calibrator) in calibrators:
+            report = device.read_report(timeout_ms=5)
+            if report is not None and report.raw:
+                calibrator.feed(report.raw)
+                has_read = True
+        if not has_read and nonblocking:
+            time.sleep(0.002)
+        if time.monotonic() >= next_progress:
+            next_progress += 1.0
+            for (device, _, calibrator) in calibrators:
+                print(f"[Info] {device.get_name()}: {calibrator.get_progress()}", file=sys.stderr)
+
+    for (device, controller, calibrator) in calibrators:
+        if calibrator.report_count == 0:
+            print(f"[Warning] no reports from {device.get_name()}, calibration is kept", file=sys.stderr)
+            continue
+        axes_without_rest = calibrator.get_axes_without_rest()
+        if axes_without_rest:
+            print(f"[Warning] {device.get_name()}: {', '.join(axes_without_rest)} never at rest, center kept", file=sys.stderr)
+        calibration = calibrator.get_calibration()
+        radial_deadzone = get_controller_setting_or(controller, 'stick_radial_deadzone', None)
+        if radial_deadzone is not None:
+            calibration = calibration.with_radial_deadzone(radial_deadzone)
+        device.set_calibration(calibration)
+        calibration_store.set(device.vendor_id, device.product_id, device.serial_number, calibration)
+        print(f"[Info] {device.get_name()}: {calibration}", file=sys.stderr)
+
+    try:
+        calibration_store.save()
+        print(f"[Info] stick calibration saved: {calibration_store.path}", file=sys.stderr)
+    except OSError as e:
+        print(f"[Error] failed to save stick calibration {calibration_store.path}: {e}", file=sys.stderr)
+
+if calibrate_sec is not None:
+    calibrate_devices(calibrate_sec)
+
+# the first controller, read directly on POLL/BLOCK
+device_mode = controllers[0][1]
+gamepad = None
+joycon_l = None
+joycon_r = None
+if device_mode == DeviceMode.JOYCON:
+    (joycon_l, joycon_r) = controller_devices[0]
 else:
+    gamepad = controller_devices[0][0]
+
+# reopen lost devices (Bluetooth link drops, unplugging) without a restart
+device_monitor = None
+if get_setting_or('hid_hotplug_enabled', True):
+    # NOTE: only devices that report continuously can be detected by silence
+    stale_devices = [device for device in all_devices if device.mode in [DeviceMode.JOYCON, DeviceMode.SWITCH_PRO]]
+    stale_timeout_sec = None
+    if stale_devices:
+        stale_timeout_sec = get_setting_or('hid_stale_timeout_sec', 1.0)
+    device_monitor = HIDDeviceMonitor(manager, all_devices,
+                                      poll_interval_sec=get_setting_or('hid_poll_interval_sec', 1.0),
+                                      stale_timeout_sec=stale_timeout_sec,
+                                      stale_devices=stale_devices)
+    device_monitor.start()
+
+    if is_debug:
+        print(f"device_monitor: {device_monitor}")
+
+# previous axis values per session, for --debug-axis
+_old_axis_dicts: dict[ControllerSession, AxisValues] = {}
+
+# long press, software key repeat and mouse move timers
+timer_scheduler = TimerScheduler()
+TimerScheduler.set_singleton(timer_scheduler)
+
+output_backend_name = get_setting_or('output_backend', 'pyautogui')
+typewrite_interval_sec = get_setting_or('typewrite_interval_sec', 0.0)
+if output_backend_name == 'pyautogui':
+    output_backend = OutputBackend.create('pyautogui',
+                                          pause_sec=get_setting_or('pyautogui_pause_sec', 0.005),
+                                          mouse_resync_interval_sec=get_setting_or('mouse_resync_interval_sec', 0.5),
+                                          type_interval_sec=typewrite_interval_sec)
+elif output_backend_name == 'uinput':
+    output_backend = OutputBackend.create('uinput',
+                                          type_interval_sec=typewrite_interval_sec)
+else:
+    output_backend = OutputBackend.create(output_backend_name)
+OutputBackend.set_singleton(output_backend)
 
-    if not manager.has_device(vendor_id, product_id):
-        print(f"[Error] device not found: 0x{vendor_id:04x}:0x{product_id:04x}", file=sys.stderr)
-
-        # current device list
-        print("", file=sys.stderr)
-        print("Current device list:", file=sys.stderr)
-        manager.list_devices(out=sys.stderr)
-        sys.exit(1)
-
-    gamepad = manager.get_device(vendor_id, product_id, device_mode, axis_threshold=axis_threshold)
-
-axis_dict: dict[AxisType, float] = {}
-state_dict: dict[ButtonType, bool] = {}
-_old_axis_dict: dict[AxisType, float] = {}
-
-software_key_repeat_enabled = get_setting_or('software_key_repeat_enabled', False)
-software_key_repeat_delay_sec = get_setting_or('software_key_repeat_delay_sec', 0.1)
-software_key_repeat_delay_sec_first = get_setting_or('software_key_repeat_delay_sec_first', 0.5)
-
-softwareKeyRepeatManager = SoftwareKeyRepeatManager(
-    delay_sec=software_key_repeat_delay_sec,
-    delay_sec_first=software_key_repeat_delay_sec_first,
-    enabled=software_key_repeat_enabled)
-
+if is_debug:
+    print(f"output_backend: {output_backend}")
+
+latency_stats = LatencyStats() if is_latency else None
+if latency_stats is not None and not latency_stats.install_signal_handler():
+    print("[Warning] SIGUSR1 is not available, latency is dumped at exit only", file=sys.stderr)
+
+out_event_manager = OutEventManager(max_queue_size=get_setting_or('out_event_queue_max_size', 0),
+                                    output_backend=output_backend,
+                                    latency_stats=latency_stats)
+
+# (keymap file, use_ctrl_space_for_kanji_key) -> Keymap, shared by the sessions (read only)
+_keymaps: dict[tuple[str, bool], Keymap] = {}
+
+def create_session(name: str, controller: dict, devices: list[HIDDevice]) -> ControllerSession:
+    def setting_or(key: str, default: any):
+        return get_controller_setting_or(controller, key, default)
+
+    software_key_repeat_manager = SoftwareKeyRepeatManager(
+        delay_sec=setting_or('software_key_repeat_delay_sec', 0.1),
+        delay_sec_first=setting_or('software_key_repeat_delay_sec_first', 0.5),
+        enabled=setting_or('software_key_repeat_enabled', False),
+        out_event_manager=out_event_manager)
+
+    layer_mode_state = LayerModeState(
+        layer_mode = LayerMode.KEYBOARD_EN,
+        # layer_mode = LayerMode.KEYBOARD_JP,
+        # layer_mode = LayerMode.MOUSE,
+        jp_input_mode = JPInputMode.from_str(setting_or('jp_input_mode', "ROMAJI")),
+        symbol_mode = SymbolMode.DEFAULT)
+
+    session = ControllerSession(name, layer_mode_state, software_key_repeat_manager, devices)
+
+    long_press_threshold_sec = setting_or('long_press_threshold_sec', 0.5)
+    use_ctrl_space_for_kanji_key = setting_or('use_ctrl_space_for_kanji_key', False)
+    mouse_response_curves = {"default": setting_or('mouse_response_curve', 'linear')}
+    mouse_response_curves.update(setting_or('mouse_response_curves', None) or {})
+
+    keymap_file = setting_or('keymap_file', 'keymap.yaml')
+    if (keymap_file, use_ctrl_space_for_kanji_key) not in _keymaps:
+        _keymaps[(keymap_file, use_ctrl_space_for_kanji_key)] = Keymap.load(keymap_file,
+                        {"use_ctrl_space_for_kanji_key": use_ctrl_space_for_kanji_key},
+                        cache_dir=get_setting_or('keymap_cache_dir', '.keymap_cache'))
+    keymap = _keymaps[(keymap_file, use_ctrl_space_for_kanji_key)]
+
+    session.add_event_processor(
+        RomajiProcessor(out_event_manager,
+                        use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
+                        long_press_threshold_sec=long_press_threshold_sec,
+                        keymap=keymap))
+
+    session.add_event_processor(
+        AlphabetProcessor(out_event_manager,
+                        use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
+                        long_press_threshold_sec=long_press_threshold_sec,
+                        keymap=keymap))
+
+    session.add_event_processor(
+        FlickProcessor(out_event_manager,
+                        use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
+                        long_press_threshold_sec=long_press_threshold_sec,
+                        flick_axis_threshold=setting_or('flick_axis_threshold', 0.3),
+                        flick_dakuten_double_backspace=setting_or('flick_dakuten_double_backspace', False)))
+
+    session.add_event_processor(
+        MouseProcessor(out_event_manager,
+                        use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
+                        long_press_threshold_sec=long_press_threshold_sec,
+                        mouse_axis_threshold=setting_or('mouse_axis_threshold', 0.3),
+                        mouse_move_speed_normal=setting_or('mouse_move_speed_normal', 4),
+                        mouse_move_speed_slow=setting_or('mouse_move_speed_slow', 2),
+                        mouse_move_speed_fast=setting_or('mouse_move_speed_fast', 8),
+                        mouse_move_speed_very_slow=setting_or('mouse_move_speed_very_slow', 1),
+                        keymap=keymap,
+                        mouse_tick_hz=setting_or('mouse_tick_hz', 250),
+                        mouse_response_curves=mouse_response_curves))
+    return session
+
+sessions = [create_session(name, controller, devices)
+            for ((name, _, _, controller), devices) in zip(controllers, controller_devices)]
+session_by_device = {device: session for session in sessions for device in session.devices}
+
+# NOTE: the singletons are the ones of the first controller
+softwareKeyRepeatManager = sessions[0].software_key_repeat_manager
 SoftwareKeyRepeatManager.set_singleton(softwareKeyRepeatManager)
+LayerModeState.set_singleton(sessions[0].layer_mode_state)
+EventProcessorManager.set_singleton(sessions[0].event_processor_manager)
 
 if is_debug:
-    print(f"softwareKeyRepeatManager: {softwareKeyRepeatManager}")
-
-pyautogui.PAUSE = get_setting_or('pyautogui_pause_sec', 0.005)
-
-layer_mode_state = LayerModeState(
-    layer_mode = LayerMode.KEYBOARD_EN,
-    # layer_mode = LayerMode.KEYBOARD_JP,
-    # layer_mode = LayerMode.MOUSE,
-    jp_input_mode = JPInputMode.from_str(get_setting_or('jp_input_mode', "ROMAJI")),
-    symbol_mode = SymbolMode.DEFAULT)
-LayerModeState.set_singleton(layer_mode_state)
-
-long_press_threshold_sec = get_setting_or('long_press_threshold_sec', 0.5)
-use_ctrl_space_for_kanji_key = get_setting_or('use_ctrl_space_for_kanji_key', False)
-flick_axis_threshold = get_setting_or('flick_axis_threshold', 0.3)
-flick_dakuten_double_backspace = get_setting_or('flick_dakuten_double_backspace', False)
-mouse_axis_threshold = get_setting_or('mouse_axis_threshold', 0.3)
-mouse_move_speed_normal = get_setting_or('mouse_move_speed_normal', 4)
-mouse_move_speed_slow = get_setting_or('mouse_move_speed_slow', 2)
-mouse_move_speed_fast = get_setting_or('mouse_move_speed_fast', 8)
-mouse_move_speed_very_slow = get_setting_or('mouse_move_speed_very_slow', 1)
-
-out_event_manager = OutEventManager()
-event_processor_manager = EventProcessorManager()
-EventProcessorManager.set_singleton(event_processor_manager)
-
-event_processor_manager.add_event_processor(
-    RomajiProcessor(out_event_manager,
-                    use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
-                    long_press_threshold_sec=long_press_threshold_sec))
-
-event_processor_manager.add_event_processor(
-    AlphabetProcessor(out_event_manager,
-                    use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
-                    long_press_threshold_sec=long_press_threshold_sec))
-
-event_processor_manager.add_event_processor(
-    FlickProcessor(out_event_manager,
-                    use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
-                    long_press_threshold_sec=long_press_threshold_sec,
-                    flick_axis_threshold=flick_axis_threshold,
-                    flick_dakuten_double_backspace=flick_dakuten_double_backspace))
-
-event_processor_manager.add_event_processor(
-    MouseProcessor(out_event_manager,
-                    use_ctrl_space_for_kanji_key=use_ctrl_space_for_kanji_key,
-                    long_press_threshold_sec=long_press_threshold_sec,
-                    mouse_axis_threshold=mouse_axis_threshold,
-                    mouse_move_speed_normal=mouse_move_speed_normal,
-                    mouse_move_speed_slow=mouse_move_speed_slow,
-                    mouse_move_speed_fast=mouse_move_speed_fast,
-                    mouse_move_speed_very_slow=mouse_move_speed_very_slow))
+    for session in sessions:
+        print(f"session: {session}")
+        print(f"softwareKeyRepeatManager: {session.software_key_repeat_manager}")
 
 # jp_processor_type = RomajiProcessor if layer_mode_state.get_jp_input_mode() == JPInputMode.ROMAJI else FlickProcessor
 
@@ -210,33 +413,113 @@ event_processor_manager.add_event_processor(
 #     LayerMode.KEYBOARD_EN: EnglishProcessor
 # })
 
-def software_key_repeat_manager_thread():
-    while True:
-        softwareKeyRepeatManager.update()
-        # t = time.time()
-        time.sleep(0.001)
-        # print(f"software_key_repeat_manager_thread: {time.time() - t} sec")
-
-software_key_repeat_manager_thread = threading.Thread(target=software_key_repeat_manager_thread)
-software_key_repeat_manager_thread.start()
+# sleeps until the next timer is due
+timer_scheduler.start()
 
 def process_events_thread():
     while True:
-        out_event_manager.process_events()
-        # t = time.time()
-        time.sleep(0.001)
-        # print(f"process_events_thread: {time.time() - t} sec")
+        # sleeps until an out event is added
+        out_event_manager.process_events(timeout_sec=None)
 
 process_events_thread = threading.Thread(target=process_events_thread)
 process_events_thread.start()
 
+def get_read_timeout_sec() -> float | None:
+    # NOTE: on BLOCK/THREAD mode, sleep until a report arrives.
+    #       time-based actions (long press, mouse move) run on the TimerScheduler
+    if reader_mode == ReaderMode.POLL:
+        return None
+    return reader_idle_timeout_sec
+
+def to_hid_timeout_ms(timeout_sec: float | None) -> int | None:
+    if timeout_sec is None:
+        return None
+    # hidapi treats 0 as a plain (endless) blocking read
+    return max(int(timeout_sec * 1000 + 0.999), 1)
+
+def process_events(session: ControllerSession, events, axis_dict, state_dict, read_ns: int | None = None, decoded_ns: int | None = None):
+    # Debugs
+
+    # session name only with several controllers
+    prefix = f"{session.name}: " if len(sessions) > 1 else ""
+
+    if is_debug_event:
+        for event in events:
+            print(f"{prefix}{event}")
+
+    if is_debug_axis:
+        # print if value changed
+        old_axis_dict = _old_axis_dicts.get(session, {})
+        for axis_type, value in axis_dict.items():
+            if axis_type in old_axis_dict:
+                # diff 0.005
+                if abs(value - old_axis_dict[axis_type]) > 0.005:
+                    print(f"{prefix}{axis_type}: {value}")
+
+        # copy dict
+        _old_axis_dicts[session] = axis_dict.copy()
+
+    if is_debug_states:
+        print(f"{prefix}states:")
+        print("-------")
+        for button_type, value in state_dict.items():
+            print(f"{button_type}: {value}")
+        print("-------")
+
+    # Process events
+    # event_processor_manager.get_event_processor_by_layer_mode(layer_mode_state.get_layer_mode()).process(events, axis_dict, state_dict)
+
+    session.process(events, axis_dict, state_dict, cause_ns=read_ns)
+
+    if latency_stats is not None and read_ns is not None:
+        latency_stats.on_report(read_ns, decoded_ns, time.monotonic_ns())
+
+reader_stats = ReaderStats(out_event_manager=out_event_manager,
+                           timer_scheduler=timer_scheduler,
+                           software_key_repeat_managers=[(session.name, session.software_key_repeat_manager)
+                                                         for session in sessions]) if is_stats else None
+
+reader_group = None
+if reader_mode == ReaderMode.THREAD:
+    # one reader thread per device (of all controllers), merged into a single queue ordered by read time
+    reader_group = HIDDeviceReaderGroup(all_devices)
+    reader_group.start()
+
 try:
     # Main loop
     while True:
+        timeout_sec = get_read_timeout_sec()
+
+        # Threaded readers (any device mode)
+        if reader_mode == ReaderMode.THREAD:
+            reports = reader_group.get_reports(timeout_sec)
+
+            for report in reports:
+                session = session_by_device[report.device]
+                if is_verbose:
+                    raw_str = " ".join([f"{x:03d}" for x in report.raw])
+                    if len(sessions) > 1:
+                        raw_str = f"{session.name} {raw_str}"
+                    if report.device.joycon_type != JoyConType.NONE:
+                        print(f"JOYCON_{report.device.joycon_type.name} raw: {raw_str}")
+                    else:
+                        print(raw_str)
+
+                (axis_dict, state_dict) = session.merge_report(report)
+                process_events(session, report.events, axis_dict, state_dict, report.timestamp_ns, report.decoded_ns)
+
+                if reader_stats is not None:
+                    reader_stats.on_report(report.timestamp_ns)
+
         # JoyCon events
-        if device_mode == DeviceMode.JOYCON:
-            l_events, l_raw = joycon_l.read_events_with_raw()
-            r_events, r_raw = joycon_r.read_events_with_raw()
+        elif device_mode == DeviceMode.JOYCON:
+            # NOTE: both JoyCons report continuously, so splitting the timeout
+            #       keeps one side from waiting on the other too long
+            timeout_ms = to_hid_timeout_ms(timeout_sec / 2 if timeout_sec is not None else None)
+            # NOTE: a lost JoyCon waits only briefly, so it does not hold up the other one
+            l_events, l_raw = joycon_l.read_events_with_raw(timeout_ms=timeout_ms if joycon_l.connected else 1)
+            r_events, r_raw = joycon_r.read_events_with_raw(timeout_ms=timeout_ms if joycon_r.connected else 1)
+            read_time_ns = time.monotonic_ns()
 
             if is_verbose:
                 if l_raw:
@@ -255,9 +538,21 @@ try:
             # for event in r_events:
             #     print(f"JOYCON_R {event}")
 
+            read_devices = [d for (d, raw) in [(joycon_l, l_raw), (joycon_r, r_raw)] if raw]
+            if read_devices:
+                process_events(sessions[0], events, axis_dict, state_dict,
+                               min(d.last_read_ns for d in read_devices),
+                               max(d.last_decoded_ns for d in read_devices))
+            else:
+                process_events(sessions[0], events, axis_dict, state_dict)
+
+            if reader_stats is not None and (l_raw or r_raw):
+                reader_stats.on_report(read_time_ns)
+
         # Normal gamepad events
         else:
-            events, raw = gamepad.read_events_with_raw()
+            events, raw = gamepad.read_events_with_raw(timeout_ms=to_hid_timeout_ms(timeout_sec))
+            read_time_ns = time.monotonic_ns()
             axis_dict = gamepad.get_axis_values()
             state_dict = gamepad.get_states()
             if is_verbose:
@@ -265,54 +560,36 @@ try:
                     # print(raw)
                     print(" ".join([f"{x:03d}" for x in raw]))
 
-        # Debugs
-
-        if is_debug_event:
-            for event in events:
-                print(event)
-
-        if is_debug_axis:
-            # print if value changed
-            for axis_type, value in axis_dict.items():
-                if axis_type in _old_axis_dict:
-                    # diff 0.005
-                    if abs(value - _old_axis_dict[axis_type]) > 0.005:
-                        print(f"{axis_type}: {value}")
-
-            # copy dict
-            _old_axis_dict = axis_dict.copy()
-
-        if is_debug_states:
-            print("states:")
-            print("-------")
-            for button_type, value in state_dict.items():
-                print(f"{button_type}: {value}")
-            print("-------")
-
-        # Process events
-        # event_processor_manager.get_event_processor_by_layer_mode(layer_mode_state.get_layer_mode()).process(events, axis_dict, state_dict)
-
-        m = layer_mode_state.get_layer_mode()
-        jm = layer_mode_state.get_jp_input_mode()
-        gp = event_processor_manager.get_event_processor
-
-        if m == LayerMode.KEYBOARD_JP:
-            if jm == JPInputMode.ROMAJI:
-                gp(RomajiProcessor).process(events, axis_dict, state_dict)
-            elif jm == JPInputMode.FLICK:
-                gp(FlickProcessor).process(events, axis_dict, state_dict)
+            if raw:
+                process_events(sessions[0], events, axis_dict, state_dict, gamepad.last_read_ns, gamepad.last_decoded_ns)
             else:
-                raise ValueError(f"Unknown JPInputMode: {jm}")
-        elif m == LayerMode.KEYBOARD_EN:
-            gp(AlphabetProcessor).process(events, axis_dict, state_dict)
-        elif m == LayerMode.MOUSE:
-            gp(MouseProcessor).process(events, axis_dict, state_dict)
-        else:
-            raise ValueError(f"Unknown LayerMode: {m}")
-        
-        time.sleep(0.001)
+                process_events(sessions[0], events, axis_dict, state_dict)
+
+            if reader_stats is not None and raw:
+                reader_stats.on_report(read_time_ns)
+
+        if reader_stats is not None:
+            reader_stats.on_wakeup()
+            reader_stats.maybe_print()
+
+        if reader_mode == ReaderMode.POLL:
+            time.sleep(0.001)
 
 except KeyboardInterrupt:
     print("KeyboardInterrupt")
+    output_backend.close()
+    if latency_stats is not None:
+        latency_stats.dump()
+    if fake_hid_source is not None:
+        print(f"[Info] {fake_hid_backend}", file=sys.stderr)
+    if len(sessions) > 1:
+        for session in sessions:
+            print(f"[Info] {session}", file=sys.stderr)
+    for device in all_devices:
+        decoder = device.decoder
+        if decoder.hysteresis is not None:
+            print(f"[Info] {device.get_name()}: stick direction edges {decoder.analog_edge_count}, "
+                  f"suppressed {decoder.get_suppressed_count()} "
+                  f"(hysteresis holds {decoder.hysteresis_hold_count}, dwell holds {decoder.dwell_hold_count})", file=sys.stderr)
     # exit with killing all threads
     os._exit(1)
\ No newline at end of file
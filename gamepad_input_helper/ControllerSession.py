@@ -0,0 +1,76 @@
+from .LayerModeState import LayerModeState
+from .SoftwareKeyRepeatManager import SoftwareKeyRepeatManager
+from .modes import LayerMode, JPInputMode
+from .event_processor import (EventProcessor, EventProcessorManager,
+    RomajiProcessor, FlickProcessor, AlphabetProcessor, MouseProcessor)
+from hid_utils import ButtonEvent, ButtonStates, AxisValues, DeviceState, HIDReport
+
+# NOTE:
+#
+# one controller (a gamepad, or a Joy-Con pair) with its own layer state, key repeat
+# and processors, so several controllers can be driven from one process.
+# all sessions share the OutEventManager, the TimerScheduler and the OutputBackend,
+# out events carry their session to the output thread (see out_events).
+
+class ControllerSession:
+    def __init__(self, name: str,
+            layer_mode_state: LayerModeState,
+            software_key_repeat_manager: SoftwareKeyRepeatManager,
+            devices: list | None = None):
+        self.name = name
+        self.layer_mode_state = layer_mode_state
+        self.software_key_repeat_manager = software_key_repeat_manager
+        self.event_processor_manager = EventProcessorManager()
+        # HIDDevices of this controller (both Joy-Cons of a pair)
+        self.devices = devices if devices is not None else []
+        # axis values and button mask per device of the latest reports, merged for the processors
+        self.axis_dict: AxisValues = DeviceState().get_axis_values()
+        self.device_button_masks: dict = {}
+        self.report_count = 0
+
+    def add_event_processor(self, event_processor: EventProcessor):
+        event_processor.session = self
+        self.event_processor_manager.add_event_processor(event_processor)
+
+    def get_current_event_processor(self) -> EventProcessor:
+        m = self.layer_mode_state.get_layer_mode()
+        jm = self.layer_mode_state.get_jp_input_mode()
+        gp = self.event_processor_manager.get_event_processor
+
+        if m == LayerMode.KEYBOARD_JP:
+            if jm == JPInputMode.ROMAJI:
+                return gp(RomajiProcessor)
+            elif jm == JPInputMode.FLICK:
+                return gp(FlickProcessor)
+            else:
+                raise ValueError(f"Unknown JPInputMode: {jm}")
+        elif m == LayerMode.KEYBOARD_EN:
+            return gp(AlphabetProcessor)
+        elif m == LayerMode.MOUSE:
+            return gp(MouseProcessor)
+        else:
+            raise ValueError(f"Unknown LayerMode: {m}")
+
+    def merge_report(self, report: HIDReport) -> tuple[AxisValues, ButtonStates]:
+        # axis values and button states of the whole controller after this report
+        self.axis_dict = self.axis_dict | report.axis_values
+        self.device_button_masks[report.device] = report.states.mask
+        button_mask = 0
+        for mask in self.device_button_masks.values():
+            button_mask |= mask
+        return (self.axis_dict, ButtonStates(button_mask))
+
+    def process(self, events: list[ButtonEvent], axis_dict: AxisValues, state_dict: ButtonStates,
+            cause_ns: int | None = None):
+        event_processor = self.get_current_event_processor()
+        with event_processor.lock:
+            # out events are traced back to the report read time carried by the button events
+            # (cause_ns, the read time of a report without events)
+            event_processor.cause_ns = events[0].timestamp_ns if events else cause_ns
+            event_processor.process(events, axis_dict, state_dict)
+            event_processor.cause_ns = None
+        self.report_count += 1
+
+    def __str__(self):
+        return (f"ControllerSession({self.name}, devices={len(self.devices)}, "
+                f"layer_mode={self.layer_mode_state.get_layer_mode().name}, reports={self.report_count})")
@@ -0,0 +1,147 @@
+import os
+import sys
+import yaml
+import pickle
+import hashlib
+from hid_utils import ButtonType
+from .modes import LayerMode, Modifier
+from .out_events import OutEvent, KeyPress, KeyDown, KeyUp, TypeWrite, HotKey, SetLayerMode, MouseClick, MouseButton
+
+import functools
+print = functools.partial(print, flush=True)
+
+# (layout, modifiers, button_type, state) -> (out_events, release_out_events)
+KeymapKey = tuple[str, int, ButtonType, bool]
+KeymapEntry = tuple[tuple[OutEvent, ...], tuple[OutEvent, ...]]
+
+_ALL_MODIFIERS = [
+    Modifier.NONE,
+    Modifier.SHIFT,
+    Modifier.STAR,
+    Modifier.SHIFT | Modifier.STAR,
+]
+
+class Keymap:
+    DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "keymap.yaml")
+
+    # bump when the compiled format (or an out event class) changes, invalidates the cache
+    VERSION = 2
+
+    def __init__(self, table: dict[KeymapKey, KeymapEntry]):
+        self.table = table
+
+    def lookup(self, layout: str, modifiers: int, button_type: ButtonType, state: bool) -> KeymapEntry | None:
+        return self.table.get((layout, modifiers, button_type, state))
+
+    @staticmethod
+    def compile(keymap_dict: dict, options: dict = {}) -> 'Keymap':
+        table: dict[KeymapKey, KeymapEntry] = {}
+
+        for layout, modifier_dict in keymap_dict.items():
+            for modifier_label, button_dict in modifier_dict.items():
+                if modifier_label == "any":
+                    modifiers_list = _ALL_MODIFIERS
+                else:
+                    modifiers_list = [Modifier.from_str(modifier_label)]
+
+                for button_label, action in (button_dict or {}).items():
+                    (button_type, state) = Keymap._parse_button(str(button_label))
+                    (out_events, release_out_events) = Keymap._compile_action(action, options)
+
+                    for modifiers in modifiers_list:
+                        key = (layout, int(modifiers), button_type, state)
+                        # NOTE: "any" rules and modifier rules for the same button are run in order
+                        (old_out_events, old_release_out_events) = table.get(key, ((), ()))
+                        table[key] = (old_out_events + out_events,
+                                      old_release_out_events + release_out_events)
+
+        return Keymap(table)
+
+    @staticmethod
+    def _parse_button(label: str) -> tuple[ButtonType, bool]:
+        state = True
+        if label.endswith(".release"):
+            label = label[:-len(".release")]
+            state = False
+        if label not in ButtonType.__members__:
+            raise ValueError(f"Unknown button in keymap: {label}")
+        return (ButtonType[label], state)
+
+    @staticmethod
+    def _compile_action(action, options: dict) -> KeymapEntry:
+        if isinstance(action, list):
+            out_events = ()
+            release_out_events = ()
+            for a in action:
+                (o, r) = Keymap._compile_action(a, options)
+                out_events += o
+                release_out_events += r
+            return (out_events, release_out_events)
+
+        if not isinstance(action, dict):
+            key = str(action)
+            if key == "kanji" and options.get("use_ctrl_space_for_kanji_key", False):
+                return ((HotKey("ctrl", "space"),), ())
+            return ((KeyPress(key),), ())
+
+        if len(action) != 1:
+            raise ValueError(f"Keymap action must have exactly one type: {action}")
+
+        (action_type, value) = next(iter(action.items()))
+
+        if action_type == "text":
+            return ((TypeWrite(str(value)),), ())
+        elif action_type == "shift":
+            return ((KeyDown("shift"), KeyPress(str(value)), KeyUp("shift")), ())
+        elif action_type == "hold":
+            return ((KeyDown(str(value), repeat=True),), (KeyUp(str(value)),))
+        elif action_type == "hotkey":
+            return ((HotKey(*[str(v) for v in value]),), ())
+        elif action_type == "layer":
+            return ((SetLayerMode(layer_mode=LayerMode[value]),), ())
+        elif action_type == "click":
+            return ((MouseClick(MouseButton[value]),), ())
+        else:
+            raise ValueError(f"Unknown keymap action: {action_type}")
+
+    @staticmethod
+    def load(path: str, options: dict = {}, cache_dir: str | None = None) -> 'Keymap':
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if cache_dir is None:
+            return Keymap.compile(yaml.safe_load(data), options)
+
+        # NOTE: the compiled table is cached by hash of keymap file, compile options and VERSION
+        h = hashlib.sha256()
+        h.update(data)
+        h.update(repr(sorted(options.items())).encode('utf-8'))
+        h.update(str(Keymap.VERSION).encode('utf-8'))
+        cache_path = os.path.join(cache_dir, f"keymap-{h.hexdigest()[:16]}.pickle")
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    return pickle.load(f)
+            except Exception as e:
+                print(f"[Warning] failed to load keymap cache {cache_path}: {e}", file=sys.stderr)
+
+        keymap = Keymap.compile(yaml.safe_load(data), options)
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(keymap, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"[Warning] failed to write keymap cache {cache_path}: {e}", file=sys.stderr)
+
+        return keymap
+
+    @staticmethod
+    def load_default(options: dict = {}) -> 'Keymap':
+        return Keymap.load(Keymap.DEFAULT_PATH, options)
+
+    def __str__(self):
+        return f"Keymap({len(self.table)} entries)"
@@ -0,0 +1,65 @@
+class LatencyHistogram:
+    # HDR-style log-linear histogram of nanosecond latencies.
+    # values below 2 * SUB_BUCKETS are exact, above that every power of two is split
+    # into SUB_BUCKETS buckets (relative error < 1 / SUB_BUCKETS). recording is O(1), no allocation.
+
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << (SUB_BUCKET_BITS - 1)
+    # up to 2^40 ns (~18 min)
+    MAX_SHIFT = 40 - SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.counts = [0] * (2 * self.SUB_BUCKETS + self.MAX_SHIFT * self.SUB_BUCKETS)
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def _index(self, value_ns: int) -> int:
+        if value_ns < 2 * self.SUB_BUCKETS:
+            return value_ns
+        shift = value_ns.bit_length() - self.SUB_BUCKET_BITS
+        if shift > self.MAX_SHIFT:
+            return len(self.counts) - 1
+        return self.SUB_BUCKETS * shift + (value_ns >> shift)
+
+    def _upper_bound(self, index: int) -> int:
+        # largest value that falls into the bucket
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        shift = index // self.SUB_BUCKETS - 1
+        top = index % self.SUB_BUCKETS + self.SUB_BUCKETS
+        return ((top + 1) << shift) - 1
+
+    def record(self, value_ns: int):
+        if value_ns < 0:
+            value_ns = 0
+        self.counts[self._index(value_ns)] += 1
+        self.count += 1
+        self.sum_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, q: float) -> int:
+        # q in 0.0 .. 100.0, returns the bucket upper bound (capped by the max) in ns
+        if self.count == 0:
+            return 0
+        rank = max(int(self.count * q / 100.0 + 0.5), 1)
+        seen = 0
+        for (index, count) in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max_ns)
+        return self.max_ns
+
+    def get_mean_ns(self) -> float:
+        return self.sum_ns / self.count if self.count > 0 else 0.0
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def __str__(self):
+        return (f"LatencyHistogram(count={self.count}, p50={self.percentile(50) / 1e6:.3f} ms, "
+                f"p99={self.percentile(99) / 1e6:.3f} ms, max={self.max_ns / 1e6:.3f} ms)")
@@ -0,0 +1,64 @@
+import sys
+import time
+import signal
+import threading
+from .LatencyHistogram import LatencyHistogram
+
+import functools
+print = functools.partial(print, flush=True)
+
+class LatencyStats:
+    # per-stage latency histograms of the input path, from HID read to injected output:
+    #
+    #   read_to_decode       report read -> decoded into button events
+    #   decode_to_processed  decoded -> event processor done with the report
+    #   enqueue_to_execute   out event queued -> its execute() starts
+    #   execute              execute() duration
+    #   report_to_output     report read -> output flushed, for out events caused by a report
+    #
+    # NOTE: each histogram has one writer (the first two the main thread, the rest the output thread)
+    STAGES = ["read_to_decode", "decode_to_processed", "enqueue_to_execute", "execute", "report_to_output"]
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.started_time = time.monotonic()
+        self._dump_lock = threading.RLock()
+
+    def record(self, stage: str, latency_ns: int):
+        self.histograms[stage].record(latency_ns)
+
+    def on_report(self, read_ns: int, decoded_ns: int, processed_ns: int):
+        self.histograms["read_to_decode"].record(decoded_ns - read_ns)
+        self.histograms["decode_to_processed"].record(processed_ns - decoded_ns)
+
+    def on_out_event(self, enqueue_ns: int, start_ns: int, end_ns: int):
+        self.histograms["enqueue_to_execute"].record(start_ns - enqueue_ns)
+        self.histograms["execute"].record(end_ns - start_ns)
+
+    def on_output(self, cause_ns: int, output_ns: int):
+        self.histograms["report_to_output"].record(output_ns - cause_ns)
+
+    def dump(self, out=sys.stderr):
+        with self._dump_lock:
+            elapsed = time.monotonic() - self.started_time
+            print(f"[Latency] {elapsed:.1f} sec, ms:", file=out)
+            print(f"[Latency] {'stage':20s} {'count':>8s} {'avg':>8s} {'p50':>8s} {'p90':>8s} {'p99':>8s} {'p99.9':>8s} {'max':>8s}", file=out)
+            for stage in self.STAGES:
+                h = self.histograms[stage]
+                print(f"[Latency] {stage:20s} {h.count:8d} {h.get_mean_ns() / 1e6:8.3f} "
+                      f"{h.percentile(50) / 1e6:8.3f} {h.percentile(90) / 1e6:8.3f} {h.percentile(99) / 1e6:8.3f} "
+                      f"{h.percentile(99.9) / 1e6:8.3f} {h.max_ns / 1e6:8.3f}", file=out)
+
+    def install_signal_handler(self, signum: int | None = None) -> bool:
+        # dump on a signal (SIGUSR1 by default, `kill -USR1 <pid>`). returns False where it is not available
+        if signum is None:
+            signum = getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False
+        # NOTE: python runs the handler on the main thread between bytecodes,
+        #       so a blocking HID read delays the dump by up to the read timeout
+        signal.signal(signum, lambda signum, frame: self.dump())
+        return True
+
+    def __str__(self):
+        return f"LatencyStats({', '.join(f'{stage}={h.count}' for stage, h in self.histograms.items())})"
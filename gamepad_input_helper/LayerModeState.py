@@ -1,9 +1,10 @@
-from .Singleton import Singleton
 from .modes import LayerMode, JPInputMode, SymbolMode
 # from .event_processor import EventProcessorManager
 from typing import Any
 
-class LayerModeState(metaclass=Singleton):
+class LayerModeState:
+    # layer, JP input and symbol mode of one controller (see ControllerSession),
+    # the singleton is the state of the first one
     def __init__(self,
         layer_mode = LayerMode.KEYBOARD_EN,
         jp_input_mode = JPInputMode.ROMAJI,
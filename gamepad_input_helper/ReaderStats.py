@@ -0,0 +1,70 @@
+import time
+
+import functools
+print = functools.partial(print, flush=True)
+
+class ReaderStats:
+    def __init__(self, interval_sec: float = 5.0, out_event_manager=None, timer_scheduler=None,
+            software_key_repeat_managers: list[tuple] | None = None):
+        self.interval_sec = interval_sec
+        self.out_event_manager = out_event_manager
+        self.timer_scheduler = timer_scheduler
+        # (session name, SoftwareKeyRepeatManager) per ControllerSession
+        self.software_key_repeat_managers = software_key_repeat_managers if software_key_repeat_managers is not None else []
+        self._reset(time.monotonic(), time.process_time())
+
+    def _reset(self, wall_time: float, cpu_time: float):
+        self.started_wall_time = wall_time
+        self.started_cpu_time = cpu_time
+        self.wakeups = 0
+        self.reports = 0
+        self.latency_sum_ns = 0
+        self.latency_max_ns = 0
+
+    def on_wakeup(self):
+        self.wakeups += 1
+
+    def on_report(self, read_time_ns: int):
+        # latency from the report being handed to us by hidapi until the processor is done with it
+        latency_ns = time.monotonic_ns() - read_time_ns
+        self.reports += 1
+        self.latency_sum_ns += latency_ns
+        if latency_ns > self.latency_max_ns:
+            self.latency_max_ns = latency_ns
+
+    def maybe_print(self):
+        wall_time = time.monotonic()
+        elapsed = wall_time - self.started_wall_time
+        if elapsed < self.interval_sec:
+            return
+
+        cpu_time = time.process_time()
+        cpu_percent = (cpu_time - self.started_cpu_time) / elapsed * 100.0
+        latency_avg_ms = self.latency_sum_ns / self.reports / 1e6 if self.reports > 0 else 0.0
+        latency_max_ms = self.latency_max_ns / 1e6
+
+        print(f"[Stats] cpu: {cpu_percent:.1f}%, wakeups: {self.wakeups / elapsed:.0f}/s, "
+              f"reports: {self.reports / elapsed:.0f}/s, "
+              f"latency avg: {latency_avg_ms:.3f} ms, max: {latency_max_ms:.3f} ms")
+
+        if self.out_event_manager is not None:
+            out_stats = self.out_event_manager.get_stats()
+            print(f"[Stats] out events: depth: {out_stats['queue_depth']} (max {out_stats['max_queue_depth']}), "
+                  f"processed: {out_stats['processed']}, dropped: {out_stats['dropped']}, "
+                  f"coalesced moves: {out_stats['coalesced_moves']}, wheels: {out_stats['coalesced_wheels']}")
+
+        if self.timer_scheduler is not None:
+            timer_stats = self.timer_scheduler.get_stats()
+            print(f"[Stats] timers: pending: {timer_stats['pending']}, wakeups: {timer_stats['wakeups']}, "
+                  f"fired: {timer_stats['fired']}, lateness avg: {timer_stats['lateness_avg_ms']:.3f} ms, "
+                  f"max: {timer_stats['lateness_max_ms']:.3f} ms")
+
+        for (name, software_key_repeat_manager) in self.software_key_repeat_managers:
+            # session name only with several controllers
+            prefix = f"{name}: " if len(self.software_key_repeat_managers) > 1 else ""
+            for key, repeat_stats in software_key_repeat_manager.get_repeat_stats().items():
+                print(f"[Stats] {prefix}key repeat {key}: repeats: {repeat_stats['repeats']}, "
+                      f"rate: {repeat_stats['rate_hz']:.1f}/s (expected {repeat_stats['expected_rate_hz']:.1f}/s), "
+                      f"drift avg: {repeat_stats['drift_avg_ms']:.3f} ms, max: {repeat_stats['drift_max_ms']:.3f} ms")
+
+        self._reset(wall_time, cpu_time)
@@ -0,0 +1,90 @@
+import math
+import bisect
+
+class ResponseCurve:
+    # maps stick deflection (0.0 center .. 1.0 full tilt) to output (0.0 .. 1.0)
+
+    # odd, so that the center axis value 0.5 has its own (zero) entry, and finer than 12-bit sticks
+    TABLE_SIZE = 4097
+
+    def __init__(self, name: str, fn):
+        self.name = name
+        self.fn = fn
+
+    def __call__(self, x: float) -> float:
+        return self.fn(x)
+
+    def build_axis_table(self, speed: float, table_size: int = TABLE_SIZE) -> list[float]:
+        # axis value (0.0 .. 1.0, center 0.5) quantized to table_size steps -> signed speed.
+        # look up with table[int(axis_value * (table_size - 1) + 0.5)]
+        scale = table_size - 1
+        table = [0.0] * table_size
+        for i in range(table_size):
+            rate = i / scale * 2.0 - 1.0
+            table[i] = math.copysign(self.fn(abs(rate)) * speed, rate) if rate != 0.0 else 0.0
+        return table
+
+    @staticmethod
+    def from_spec(spec) -> 'ResponseCurve':
+        # "linear", or a dict with type and parameters:
+        #   {type: power, exponent: 2.0}
+        #   {type: exponential, k: 3.0}
+        #   {type: s_curve, steepness: 2.0}
+        #   {type: points, points: [[0.0, 0.0], [0.5, 0.2], [1.0, 1.0]]}
+        if spec is None:
+            spec = "linear"
+        if isinstance(spec, str):
+            spec = {"type": spec}
+        if not isinstance(spec, dict) or "type" not in spec:
+            raise ValueError(f"Invalid response curve: {spec}")
+
+        curve_type = spec["type"]
+
+        if curve_type == "linear":
+            return ResponseCurve("linear", lambda x: x)
+
+        elif curve_type == "power":
+            exponent = float(spec.get("exponent", 2.0))
+            if exponent <= 0:
+                raise ValueError(f"Response curve exponent must be positive: {exponent}")
+            return ResponseCurve(f"power({exponent})", lambda x: x ** exponent)
+
+        elif curve_type == "exponential":
+            k = float(spec.get("k", 3.0))
+            if k == 0:
+                return ResponseCurve("linear", lambda x: x)
+            denom = math.expm1(k)
+            return ResponseCurve(f"exponential({k})", lambda x: math.expm1(k * x) / denom)
+
+        elif curve_type == "s_curve":
+            steepness = float(spec.get("steepness", 2.0))
+            if steepness <= 0:
+                raise ValueError(f"Response curve steepness must be positive: {steepness}")
+            def s_curve(x: float) -> float:
+                a = x ** steepness
+                b = (1.0 - x) ** steepness
+                return a / (a + b) if a + b > 0 else 0.0
+            return ResponseCurve(f"s_curve({steepness})", s_curve)
+
+        elif curve_type == "points":
+            points = sorted((float(x), float(y)) for (x, y) in spec.get("points", []))
+            if len(points) < 2:
+                raise ValueError(f"Response curve needs at least 2 points: {spec}")
+            xs = [x for (x, _) in points]
+            ys = [y for (_, y) in points]
+            def interpolate(x: float) -> float:
+                # piecewise linear, clamped to the first and last point
+                if x <= xs[0]:
+                    return ys[0]
+                if x >= xs[-1]:
+                    return ys[-1]
+                i = bisect.bisect_right(xs, x)
+                t = (x - xs[i - 1]) / (xs[i] - xs[i - 1])
+                return ys[i - 1] + (ys[i] - ys[i - 1]) * t
+            return ResponseCurve(f"points({len(points)})", interpolate)
+
+        else:
+            raise ValueError(f"Unknown response curve type: {curve_type}")
+
+    def __str__(self):
+        return f"ResponseCurve({self.name})"
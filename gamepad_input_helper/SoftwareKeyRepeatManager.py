@@ -1,20 +1,27 @@
 import time
 import threading
-import pyautogui
 from .DebugState import DebugState
-from .Singleton import Singleton
+from .TimerScheduler import TimerScheduler, Timer
 
-class SoftwareKeyRepeatManager(metaclass=Singleton):
+class SoftwareKeyRepeatManager:
+    # NOTE: one per controller (see ControllerSession), the singleton is the one of the first
     def __init__(self,
             delay_sec_first: float = 0.5,
             delay_sec: float = 0.1,
-            enabled: bool = False):
-        self.pressing_dict: dict[str, bool] = {}
-        self.press_start_dict: dict[str, float] = {}
-        self.repeat_started_dict: dict[str, bool] = {}
+            enabled: bool = False,
+            out_event_manager = None):
+        # key -> repeat timer on the TimerScheduler
+        self.repeat_timers: dict[str, Timer] = {}
+        # key -> (time of keyDown or of the last executed repeat, repeats since keyDown)
+        self.last_repeat: dict[str, tuple[int, int]] = {}
+        self.repeat_stats: dict[str, dict[str, int]] = {}
         self.delay_sec_first = delay_sec_first
         self.delay_sec = delay_sec
         self.enabled = enabled
+        # NOTE: repeats go through the same queue as KeyDown/KeyUp,
+        #       so a repeat is never executed after the KeyUp of its key
+        self.out_event_manager = out_event_manager
+        self._lock = threading.Lock()
 
     def set_delay_sec(self, delay_sec: float):
         self.delay_sec = delay_sec
@@ -22,41 +29,86 @@ class SoftwareKeyRepeatManager(metaclass=Singleton):
     def set_enabled(self, enabled: bool):
         self.enabled = enabled
 
+    def set_out_event_manager(self, out_event_manager):
+        self.out_event_manager = out_event_manager
+
     def keyDown(self, key: str):
-        self.pressing_dict[key] = True
-        self.press_start_dict[key] = time.time_ns()
-    
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if key in self.repeat_timers:
+                self.repeat_timers[key].cancel()
+            timer = TimerScheduler.get_singleton().schedule(
+                self.delay_sec_first, lambda: self._repeat(key, timer), interval_sec=self.delay_sec)
+            self.repeat_timers[key] = timer
+            self.last_repeat[key] = (time.monotonic_ns(), 0)
+
     def keyUp(self, key: str):
-        if key in self.pressing_dict:
-            del self.pressing_dict[key]
-        
-        if key in self.press_start_dict:
-            del self.press_start_dict[key]
+        with self._lock:
+            if key in self.repeat_timers:
+                self.repeat_timers.pop(key).cancel()
+            if key in self.last_repeat:
+                del self.last_repeat[key]
 
-        if key in self.repeat_started_dict:
-            del self.repeat_started_dict[key]
+    def is_repeating(self, key: str, timer: Timer) -> bool:
+        with self._lock:
+            return self.repeat_timers.get(key) is timer
 
-    def update(self):
-        if not self.enabled:
-            return 
-        
-        # supress RuntimeError: dictionary changed size during iteration
-        pressing_dict_current = self.pressing_dict.copy()
-
-        for key, is_pressing in pressing_dict_current.items():
-            if is_pressing:
-                delay_sec = self.delay_sec_first if key not in self.repeat_started_dict else self.delay_sec
-                if key not in self.press_start_dict:
-                    continue
-                if time.time_ns() - self.press_start_dict[key] > delay_sec * 1e9:
-                    def fn():
-                        pyautogui.keyUp(key)
-                        pyautogui.keyDown(key)
-                    threading.Thread(target=fn).start()
-                    self.repeat_started_dict[key] = True
-                    self.press_start_dict[key] = time.time_ns()
-                    if DebugState.is_debug():
-                        print(f"soft key repeat: {key}")
+    def _repeat(self, key: str, timer: Timer):
+        # called on the timer thread
+        from .out_events import KeyRepeat
+
+        if not self.is_repeating(key, timer):
+            return
+
+        if self.out_event_manager is None:
+            KeyRepeat(key, timer, manager=self).execute()
+        else:
+            self.out_event_manager.add_event(KeyRepeat(key, timer, manager=self))
+
+    def on_repeat_executed(self, key: str):
+        # called on the output thread after a repeat is sent
+        now_ns = time.monotonic_ns()
+        with self._lock:
+            if key not in self.last_repeat:
+                return
+            (last_time_ns, count) = self.last_repeat[key]
+            self.last_repeat[key] = (now_ns, count + 1)
+
+            interval_ns = now_ns - last_time_ns
+            expected_ns = int((self.delay_sec_first if count == 0 else self.delay_sec) * 1e9)
+            drift_ns = abs(interval_ns - expected_ns)
+
+            stats = self.repeat_stats.setdefault(key, {
+                "repeats": 0,
+                "intervals": 0,
+                "interval_sum_ns": 0,
+                "drift_sum_ns": 0,
+                "drift_max_ns": 0,
+            })
+            stats["repeats"] += 1
+            # the first repeat waits delay_sec_first, only later ones count for the rate
+            if count > 0:
+                stats["intervals"] += 1
+                stats["interval_sum_ns"] += interval_ns
+            stats["drift_sum_ns"] += drift_ns
+            if drift_ns > stats["drift_max_ns"]:
+                stats["drift_max_ns"] = drift_ns
+
+        if DebugState.is_debug():
+            print(f"soft key repeat: {key}")
+
+    def get_repeat_stats(self) -> dict[str, dict[str, float]]:
+        # key -> achieved repeat rate and drift from the configured delay
+        with self._lock:
+            return {key: {
+                "repeats": stats["repeats"],
+                "rate_hz": stats["intervals"] / (stats["interval_sum_ns"] / 1e9) if stats["interval_sum_ns"] > 0 else 0.0,
+                "expected_rate_hz": 1.0 / self.delay_sec if self.delay_sec > 0 else 0.0,
+                "drift_avg_ms": stats["drift_sum_ns"] / stats["repeats"] / 1e6,
+                "drift_max_ms": stats["drift_max_ns"] / 1e6,
+            } for key, stats in self.repeat_stats.items()}
 
     def __str__(self):
         return f"SoftwareKeyRepeatManager(delay_sec_first={self.delay_sec_first}, delay_sec={self.delay_sec}, enabled={self.enabled})"
@@ -0,0 +1,156 @@
+import sys
+import time
+import heapq
+import threading
+
+import functools
+print = functools.partial(print, flush=True)
+
+class Timer:
+    __slots__ = ("callback", "interval_ns", "cancelled")
+
+    def __init__(self, callback, interval_ns: int | None = None):
+        self.callback = callback
+        self.interval_ns = interval_ns
+        self.cancelled = False
+
+    def cancel(self):
+        # NOTE: safe from any thread, the scheduler drops cancelled timers lazily
+        self.cancelled = True
+
+    def __str__(self):
+        return f"Timer(interval_ns={self.interval_ns}, cancelled={self.cancelled})"
+
+class TimerScheduler:
+    def __init__(self):
+        # heap of (deadline_ns, seq, timer), seq keeps timers with the same deadline in FIFO order
+        self._heap: list[tuple[int, int, Timer]] = []
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        self.wakeup_count = 0
+        self.fired_count = 0
+        self.lateness_sum_ns = 0
+        self.lateness_max_ns = 0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def schedule(self, delay_sec: float, callback, interval_sec: float | None = None) -> Timer:
+        # call callback on the scheduler thread after delay_sec,
+        # then every interval_sec (if given) until the timer is cancelled
+        interval_ns = int(interval_sec * 1e9) if interval_sec is not None else None
+        timer = Timer(callback, interval_ns)
+        self._push(time.monotonic_ns() + int(delay_sec * 1e9), timer)
+        return timer
+
+    def _push(self, deadline_ns: int, timer: Timer):
+        with self._condition:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline_ns, self._seq, timer))
+            # only wake up the thread when the earliest deadline changed
+            if self._heap[0][2] is timer:
+                self._condition.notify()
+
+    def get_pending_count(self) -> int:
+        with self._condition:
+            return sum(1 for (_, _, timer) in self._heap if not timer.cancelled)
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    def run_pending(self) -> int:
+        # fire every timer that is due now, returns the number of fired timers
+        now_ns = time.monotonic_ns()
+        due: list[tuple[int, Timer]] = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now_ns:
+                (deadline_ns, _, timer) = heapq.heappop(self._heap)
+                if not timer.cancelled:
+                    due.append((deadline_ns, timer))
+
+        # callbacks run without holding the lock, so they can schedule or cancel timers
+        for (deadline_ns, timer) in due:
+            if timer.cancelled:
+                continue
+
+            lateness_ns = time.monotonic_ns() - deadline_ns
+            self.fired_count += 1
+            self.lateness_sum_ns += lateness_ns
+            if lateness_ns > self.lateness_max_ns:
+                self.lateness_max_ns = lateness_ns
+
+            try:
+                timer.callback()
+            except Exception as e:
+                print(f"[Error] timer callback failed: {e}", file=sys.stderr)
+
+            if timer.interval_ns is not None and not timer.cancelled:
+                next_deadline_ns = deadline_ns + timer.interval_ns
+                # NOTE: skip missed ticks instead of firing them in a burst
+                if next_deadline_ns <= now_ns:
+                    next_deadline_ns = now_ns + timer.interval_ns
+                self._push(next_deadline_ns, timer)
+
+        return len(due)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # sleep exactly until the earliest deadline (or until a timer is scheduled)
+                while self._running:
+                    self._drop_cancelled()
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    timeout_ns = self._heap[0][0] - time.monotonic_ns()
+                    if timeout_ns <= 0:
+                        break
+                    self._condition.wait(timeout_ns / 1e9)
+
+                if not self._running:
+                    return
+                self.wakeup_count += 1
+
+            self.run_pending()
+
+    def get_stats(self) -> dict[str, float]:
+        return {
+            "pending": self.get_pending_count(),
+            "wakeups": self.wakeup_count,
+            "fired": self.fired_count,
+            "lateness_avg_ms": self.lateness_sum_ns / self.fired_count / 1e6 if self.fired_count > 0 else 0.0,
+            "lateness_max_ms": self.lateness_max_ns / 1e6,
+        }
+
+    def __str__(self):
+        return f"TimerScheduler(pending={self.get_pending_count()})"
+
+    @staticmethod
+    def get_singleton() -> 'TimerScheduler':
+        global timerScheduler
+        if timerScheduler is None:
+            raise RuntimeError("TimerScheduler singleton is not initialized")
+        return timerScheduler
+
+    @staticmethod
+    def set_singleton(instance):
+        global timerScheduler
+        timerScheduler = instance
+
+timerScheduler = None
@@ -1,4 +1,11 @@
 from .SoftwareKeyRepeatManager import SoftwareKeyRepeatManager
 from .DebugState import DebugState
 from .Singleton import Singleton
-from .LayerModeState import LayerModeState
\ No newline at end of file
+from .LayerModeState import LayerModeState
+from .ReaderStats import ReaderStats
+from .Keymap import Keymap
+from .TimerScheduler import TimerScheduler, Timer
+from .ResponseCurve import ResponseCurve
+from .LatencyHistogram import LatencyHistogram
+from .LatencyStats import LatencyStats
+from .ControllerSession import ControllerSession
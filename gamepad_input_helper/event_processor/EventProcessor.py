@@ -1,10 +1,27 @@
+import threading
 from .OutEventManager import OutEventManager
+from ..Keymap import Keymap
+from ..TimerScheduler import TimerScheduler, Timer
+from ..LayerModeState import LayerModeState
 from hid_utils import ButtonEvent, AxisType, ButtonType
 from typing import Any
 
 class EventProcessor():
-    def __init__(self, out_event_manager: OutEventManager):
+    def __init__(self, out_event_manager: OutEventManager, keymap: Keymap | None = None):
         self.out_event_manager = out_event_manager
+        self.keymap = keymap
+        # out events to add when a button is released (keymap "hold" actions)
+        self.release_out_events: dict[ButtonType, tuple] = {}
+        # NOTE: process() runs on the main thread and timer callbacks on the scheduler thread,
+        #       both hold this lock while touching processor state
+        self.lock = threading.RLock()
+        self.long_press_timers: dict[ButtonType, Timer] = {}
+        # read time of the report being processed, passed on to the out events it causes.
+        # set by the caller (holding the lock) around process(), so timer callbacks see None
+        self.cause_ns: int | None = None
+        # ControllerSession this processor belongs to (set by ControllerSession.add_event_processor),
+        # None uses the singletons
+        self.session = None
 
     def process(self,
             events: list[ButtonEvent],
@@ -12,9 +29,42 @@ class EventProcessor():
             state_dict: dict[ButtonType, bool]
         ):
         raise NotImplementedError()
-    
+
+    def _schedule_timer(self, delay_sec: float, callback, interval_sec: float | None = None) -> Timer:
+        def fn():
+            with self.lock:
+                callback()
+        return TimerScheduler.get_singleton().schedule(delay_sec, fn, interval_sec=interval_sec)
+
+    def _start_long_press_timer(self, button_type: ButtonType, callback):
+        self._cancel_long_press_timer(button_type)
+        self.long_press_timers[button_type] = self._schedule_timer(self.long_press_threshold_sec, callback)
+
+    def _cancel_long_press_timer(self, button_type: ButtonType):
+        timer = self.long_press_timers.pop(button_type, None)
+        if timer is not None:
+            timer.cancel()
+
     def _add_out_event(self, event):
-        self.out_event_manager.add_event(event)
+        self.out_event_manager.add_event(event, cause_ns=self.cause_ns, session=self.session)
+
+    def _get_layer_mode_state(self) -> LayerModeState:
+        if self.session is None:
+            return LayerModeState.get_singleton()
+        return self.session.layer_mode_state
+
+    def _dispatch_keymap(self, layout: str, modifiers: int, button_type: ButtonType, state: bool):
+        entry = self.keymap.lookup(layout, modifiers, button_type, state)
+        if entry is not None:
+            (out_events, release_out_events) = entry
+            for oev in out_events:
+                self._add_out_event(oev)
+            if release_out_events:
+                self.release_out_events[button_type] = release_out_events
+
+        if not state and button_type in self.release_out_events:
+            for oev in self.release_out_events.pop(button_type):
+                self._add_out_event(oev)
 
     # def set_property(self, key, value):
     #     raise NotImplementedError()
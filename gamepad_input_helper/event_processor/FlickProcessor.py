@@ -1,4 +1,3 @@
-import time
 from enum import Enum
 
 from .EventProcessor import EventProcessor
@@ -35,9 +34,7 @@ class FlickProcessor(EventProcessor):
         # self.is_shift_long_pressing = False
         # self.prev_is_shift_long_pressing = False
         self.pre_star_flag = False
-        self.star_press_started_time = None
         self.is_star_long_pressing = False
-        self.prev_is_star_long_pressing = False
 
         self.use_ctrl_space_for_kanji_key = use_ctrl_space_for_kanji_key
         self.long_press_threshold_sec = long_press_threshold_sec
@@ -46,9 +43,7 @@ class FlickProcessor(EventProcessor):
 
     def get_flick_state(self, state_dict: dict[ButtonType, bool], axis_dict: dict[AxisType, float]) -> FlickState:
         def get_axis_value(axis_type: AxisType, _default_value=0.5):
-            if axis_type not in axis_dict:
-                return _default_value
-            return axis_dict[axis_type]
+            return axis_dict.get(axis_type, _default_value)
         
         def get_value(axis_type: ButtonType):
             if axis_type not in state_dict:
@@ -94,6 +89,10 @@ class FlickProcessor(EventProcessor):
         
         raise Exception("invalid flick state")
 
+    def _on_star_long_press(self):
+        self.is_star_long_pressing = True
+        self._add_out_event(DebugPrint("star long press"))
+
     def process(self,
             events: list[ButtonEvent],
             axis_dict: dict[AxisType, float],
@@ -116,16 +115,18 @@ class FlickProcessor(EventProcessor):
             if bt == ButtonType.L and st == True:
                 if not self.pre_star_flag:
                     self.pre_star_flag = True
-                    self.star_press_started_time = time.time()
+                    self._start_long_press_timer(ButtonType.L, self._on_star_long_press)
                     add_oev(DebugPrint("star on"))
                 elif self.pre_star_flag:
                     self.pre_star_flag = False
-                    self.star_press_started_time = None
+                    self._cancel_long_press_timer(ButtonType.L)
                     add_oev(DebugPrint("star off"))
             elif bt == ButtonType.L and st == False:
+                self._cancel_long_press_timer(ButtonType.L)
                 if self.is_star_long_pressing:
+                    # set by the long press timer, cleared here
                     self.pre_star_flag = False
-                    self.star_press_started_time = None
+                    self.is_star_long_pressing = False
                     add_oev(DebugPrint("star off"))
             
             is_star = self.pre_star_flag or self.is_star_long_pressing
@@ -443,17 +444,5 @@ class FlickProcessor(EventProcessor):
             if not self.is_star_long_pressing and self.pre_star_flag:
                 if st == False and bt != ButtonType.L:
                     self.pre_star_flag = False
-                    self.star_press_started_time = None
-                    add_oev(DebugPrint("star off"))
-
-        # Star long press
-        self.prev_is_star_long_pressing = self.is_star_long_pressing
-        self.is_star_long_pressing = (
-            bool(ButtonType.L in state_dict and state_dict[ButtonType.L])
-            and (
-                self.star_press_started_time is not None
-                and time.time() - self.star_press_started_time > self.long_press_threshold_sec
-            )
-        )
-        if self.is_star_long_pressing and not self.prev_is_star_long_pressing:
-            add_oev(DebugPrint("star long press"))
\ No newline at end of file
+                    self._cancel_long_press_timer(ButtonType.L)
+                    add_oev(DebugPrint("star off"))
\ No newline at end of file
@@ -2,12 +2,23 @@ import time
 from .EventProcessor import EventProcessor
 from ..out_events import OutEvent, DebugPrint, KeyPress, KeyDown, KeyUp, TypeWrite, HotKey, SetLayerMode, MouseClick, MouseWheel, MouseMoveRel, MouseButton
 from hid_utils import ButtonEvent, AxisType, ButtonType
-from ..modes import LayerMode
+from ..modes import LayerMode, Modifier
+from ..Keymap import Keymap
+from ..ResponseCurve import ResponseCurve
 
 import functools
 print = functools.partial(print, flush=True)
 
 class MouseProcessor(EventProcessor):
+    keymap_layout = "mouse"
+
+    # NOTE: mouse_move_speed_* are pixels per tick at full tilt, at the tick rates
+    #       mouse movement used to run at (R stick every 2 ms, L stick every 5 ms)
+    R_STICK_SPEED_HZ = 500.0
+    L_STICK_SPEED_HZ = 200.0
+    # longest time integrated by one tick, so a stalled tick does not jump the cursor
+    MAX_TICK_DT_SEC = 0.05
+
     def __init__(self, out_event_manager,
             use_ctrl_space_for_kanji_key = False,
             long_press_threshold_sec = 0.5,
@@ -15,18 +26,21 @@ class MouseProcessor(EventProcessor):
             mouse_move_speed_normal:float = 4.0,
             mouse_move_speed_slow:float = 2.0,
             mouse_move_speed_fast:float = 8.0,
-            mouse_move_speed_very_slow:float = 1.0
+            mouse_move_speed_very_slow:float = 1.0,
+            keymap: Keymap | None = None,
+            mouse_tick_hz: float = 250.0,
+            clock = time.monotonic,
+            mouse_response_curves: dict | None = None
         ):
-        super().__init__(out_event_manager)
-        self.pressing_dict: dict[str, bool] = {}
+        if keymap is None:
+            keymap = Keymap.load_default({"use_ctrl_space_for_kanji_key": use_ctrl_space_for_kanji_key})
+        super().__init__(out_event_manager, keymap=keymap)
         self.pre_shift_flag = False
         self.shift_press_started_time = None
         self.is_shift_long_pressing = False
-        self.prev_is_shift_long_pressing = False
         self.pre_star_flag = False
         self.star_press_started_time = None
         self.is_star_long_pressing = False
-        self.prev_is_star_long_pressing = False
 
         self.use_ctrl_space_for_kanji_key = use_ctrl_space_for_kanji_key
         self.long_press_threshold_sec = long_press_threshold_sec
@@ -39,77 +53,136 @@ class MouseProcessor(EventProcessor):
         self.is_shift = False
         self.is_star = False
 
-        self.prev_mouse_move_time = None
+        # speed layer -> (curve, speed at full tilt in px/s), "default" curve for layers not listed
+        curve_specs = mouse_response_curves or {}
+        layers = {
+            "normal": mouse_move_speed_normal * self.R_STICK_SPEED_HZ,
+            "slow": mouse_move_speed_slow * self.L_STICK_SPEED_HZ,
+            "fast": mouse_move_speed_fast * self.R_STICK_SPEED_HZ,
+            "very_slow": mouse_move_speed_very_slow * self.L_STICK_SPEED_HZ,
+        }
+        for layer in curve_specs:
+            if layer != "default" and layer not in layers:
+                raise ValueError(f"Unknown mouse speed layer: {layer}")
+        self.response_curves: dict[str, ResponseCurve] = {
+            layer: ResponseCurve.from_spec(curve_specs.get(layer, curve_specs.get("default")))
+            for layer in layers
+        }
+        # NOTE: axis value -> signed velocity (px/s), one table per speed layer, so a tick
+        #       maps each axis with a single index instead of curve math
+        self.velocity_tables: dict[str, list[float]] = {
+            layer: self.response_curves[layer].build_axis_table(speed)
+            for (layer, speed) in layers.items()
+        }
 
-    def _mouse_process(self,
-            axis_dict: dict[AxisType, float],
-            state_dict: dict[ButtonType, bool]
-        ):
+        # latest axis values, read by the mouse move timer
+        self.axis_dict: dict[AxisType, float] = {}
+        self.mouse_tick_hz = mouse_tick_hz
+        self.clock = clock
+        self.mouse_move_timer = None
+        self.prev_mouse_tick_time = None
+        # sub-pixel movement carried over to the next tick
+        self.mouse_remainder_x = 0.0
+        self.mouse_remainder_y = 0.0
 
-        add_oev = self._add_out_event
+    def _on_shift_long_press(self):
+        self.is_shift_long_pressing = True
+        self._add_out_event(DebugPrint("shift long press"))
 
+    def _on_star_long_press(self):
+        self.is_star_long_pressing = True
+        self._add_out_event(DebugPrint("star long press"))
+
+    def _axis_rates(self) -> tuple[float, float, float, float]:
         def axis_value(axis_type: AxisType) -> float:
-            return axis_dict[axis_type] if axis_type in axis_dict else 0.5
-        
+            return self.axis_dict.get(axis_type, 0.5)
+
         l_down_rate = axis_value(AxisType.ANALOG_L_DOWN)*2.0 - 1.0
         l_right_rate = axis_value(AxisType.ANALOG_L_RIGHT)*2.0 - 1.0
         r_down_rate = axis_value(AxisType.ANALOG_R_DOWN)*2.0 - 1.0
         r_right_rate = axis_value(AxisType.ANALOG_R_RIGHT)*2.0 - 1.0
+        return (l_down_rate, l_right_rate, r_down_rate, r_right_rate)
 
-        # print(f"l_v_rate {l_down_rate}, l_h_rate {l_right_rate}")
-        # print(f"r_v_rate {r_down_rate}, r_h_rate {r_right_rate}")
+    def _mouse_velocity(self) -> tuple[float, float]:
+        # cursor velocity in pixels per second
+        (l_down_rate, l_right_rate, r_down_rate, r_right_rate) = self._axis_rates()
 
-        if not self.is_shift and not self.is_star:
-            # normal mouse move (analog_r_stick)
-            if self.prev_mouse_move_time is not None and time.time() - self.prev_mouse_move_time < 0.002:
-                pass
-            else:
-                if abs(r_down_rate) > self.mouse_axis_threshold or abs(r_right_rate) > self.mouse_axis_threshold:
-                    add_oev(MouseMoveRel(
-                        int(r_right_rate * self.mouse_move_speed_normal),
-                        int(r_down_rate * self.mouse_move_speed_normal)
-                    ))
-                    self.prev_mouse_move_time = time.time()
-                    # print(f"mouse dx: {r_right_rate * self.mouse_move_speed_normal}, dy: {r_down_rate * self.mouse_move_speed_normal}")
-
-            # slow mouse move (analog_l_stick)
-            if self.prev_mouse_move_time is not None and time.time() - self.prev_mouse_move_time < 0.005:
-                pass
-            else:
-                if abs(l_down_rate) > self.mouse_axis_threshold or abs(l_right_rate) > self.mouse_axis_threshold:
-                    add_oev(MouseMoveRel(
-                        int(l_right_rate * self.mouse_move_speed_slow),
-                        int(l_down_rate * self.mouse_move_speed_slow)
-                    ))
-                    self.prev_mouse_move_time = time.time()
-                    # print(f"mouse dx: {l_right_rate * self.mouse_move_speed_slow}, dy: {l_down_rate * self.mouse_move_speed_slow}")
+        is_r_tilted = abs(r_down_rate) > self.mouse_axis_threshold or abs(r_right_rate) > self.mouse_axis_threshold
+        is_l_tilted = abs(l_down_rate) > self.mouse_axis_threshold or abs(l_right_rate) > self.mouse_axis_threshold
 
+        if not self.is_shift and not self.is_star:
+            if is_r_tilted:
+                # normal mouse move (analog_r_stick)
+                return self._stick_velocity("normal", AxisType.ANALOG_R_RIGHT, AxisType.ANALOG_R_DOWN)
+            elif is_l_tilted:
+                # slow mouse move (analog_l_stick)
+                return self._stick_velocity("slow", AxisType.ANALOG_L_RIGHT, AxisType.ANALOG_L_DOWN)
 
         elif self.is_star:
-            # fast mouse move (analog_r_stick)
-            if self.prev_mouse_move_time is not None and time.time() - self.prev_mouse_move_time < 0.002:
-                pass
-            else:
-                if abs(r_down_rate) > self.mouse_axis_threshold or abs(r_right_rate) > self.mouse_axis_threshold:
-                    add_oev(MouseMoveRel(
-                        int(r_right_rate * self.mouse_move_speed_fast),
-                        int(r_down_rate * self.mouse_move_speed_fast)
-                    ))
-                    self.prev_mouse_move_time = time.time()
-                    # print(f"mouse dx: {r_right_rate * self.mouse_move_speed_fast}, dy: {r_down_rate * self.mouse_move_speed_fast}")
-
-            # very slow mouse move (analog_l_stick)
-            if self.prev_mouse_move_time is not None and time.time() - self.prev_mouse_move_time < 0.005:
-                pass
-            else:
-                if abs(l_down_rate) > self.mouse_axis_threshold or abs(l_right_rate) > self.mouse_axis_threshold:
-                    add_oev(MouseMoveRel(
-                        int(l_right_rate * self.mouse_move_speed_very_slow),
-                        int(l_down_rate * self.mouse_move_speed_very_slow)
-                    ))
-                    self.prev_mouse_move_time = time.time()
-                    # print(f"mouse dx: {l_right_rate * self.mouse_move_speed_very_slow}, dy: {l_down_rate * self.mouse_move_speed_very_slow}")
+            if is_r_tilted:
+                # fast mouse move (analog_r_stick)
+                return self._stick_velocity("fast", AxisType.ANALOG_R_RIGHT, AxisType.ANALOG_R_DOWN)
+            elif is_l_tilted:
+                # very slow mouse move (analog_l_stick)
+                return self._stick_velocity("very_slow", AxisType.ANALOG_L_RIGHT, AxisType.ANALOG_L_DOWN)
+
+        return (0.0, 0.0)
 
+    def _stick_velocity(self, layer: str, x_axis_type: AxisType, y_axis_type: AxisType) -> tuple[float, float]:
+        table = self.velocity_tables[layer]
+        scale = len(table) - 1
+        x = self.axis_dict.get(x_axis_type, 0.5)
+        y = self.axis_dict.get(y_axis_type, 0.5)
+        return (table[int(x * scale + 0.5)], table[int(y * scale + 0.5)])
+
+    def _update_mouse_move_timer(self, axis_dict: dict[AxisType, float]):
+        # NOTE: a snapshot, the caller's axis values change with the next report
+        self.axis_dict = axis_dict.copy()
+        (vx, vy) = self._mouse_velocity()
+
+        # keep moving at mouse_tick_hz while any stick is tilted, without waiting
+        # for new reports (most gamepads only report on change)
+        if vx == 0.0 and vy == 0.0:
+            self._stop_mouse_move_timer()
+        elif self.mouse_move_timer is None:
+            # the first tick moves right away, by one tick worth of motion
+            self.prev_mouse_tick_time = self.clock() - 1.0 / self.mouse_tick_hz
+            self.mouse_move_timer = self._schedule_timer(0, self._mouse_move, interval_sec=1.0 / self.mouse_tick_hz)
+
+    def _stop_mouse_move_timer(self):
+        if self.mouse_move_timer is not None:
+            self.mouse_move_timer.cancel()
+        self.mouse_move_timer = None
+        self.prev_mouse_tick_time = None
+        self.mouse_remainder_x = 0.0
+        self.mouse_remainder_y = 0.0
+
+    def _mouse_move(self):
+        # NOTE: process() is not called any more once the layer is switched
+        if self._get_layer_mode_state().get_layer_mode() != LayerMode.MOUSE:
+            self._stop_mouse_move_timer()
+            return
+
+        (vx, vy) = self._mouse_velocity()
+        if vx == 0.0 and vy == 0.0:
+            self._stop_mouse_move_timer()
+            return
+
+        # integrate over the real time since the previous tick, so the speed
+        # does not depend on how punctual the ticks are
+        now = self.clock()
+        dt = min(now - self.prev_mouse_tick_time, self.MAX_TICK_DT_SEC)
+        self.prev_mouse_tick_time = now
+
+        self.mouse_remainder_x += vx * dt
+        self.mouse_remainder_y += vy * dt
+        dx = int(self.mouse_remainder_x)
+        dy = int(self.mouse_remainder_y)
+        self.mouse_remainder_x -= dx
+        self.mouse_remainder_y -= dy
+
+        if dx != 0 or dy != 0:
+            self._add_out_event(MouseMoveRel(dx, dy))
 
     def process(self,
             events: list[ButtonEvent],
@@ -119,11 +192,6 @@ class MouseProcessor(EventProcessor):
 
         add_oev = self._add_out_event
 
-        def add_shift_oev(key: str) -> str:
-            add_oev(KeyDown("shift"))
-            add_oev(KeyPress(key))
-            add_oev(KeyUp("shift"))
-
         for event in events:
             st = event.state
             bt = event.button_type
@@ -133,12 +201,15 @@ class MouseProcessor(EventProcessor):
                 if not self.pre_shift_flag:
                     self.pre_shift_flag = True
                     self.shift_press_started_time = time.time()
+                    self._start_long_press_timer(ButtonType.ZL, self._on_shift_long_press)
                     add_oev(DebugPrint("shift on"))
                 elif self.pre_shift_flag:
                     self.pre_shift_flag = False
                     self.shift_press_started_time = None
+                    self._cancel_long_press_timer(ButtonType.ZL)
                     add_oev(DebugPrint("shift off"))
             elif bt == ButtonType.ZL and st == False:
+                self._cancel_long_press_timer(ButtonType.ZL)
                 if self.is_shift_long_pressing:
                     self.pre_shift_flag = False
                     self.shift_press_started_time = None
@@ -149,12 +220,15 @@ class MouseProcessor(EventProcessor):
                 if not self.pre_star_flag:
                     self.pre_star_flag = True
                     self.star_press_started_time = time.time()
+                    self._start_long_press_timer(ButtonType.L, self._on_star_long_press)
                     add_oev(DebugPrint("star on"))
                 elif self.pre_star_flag:
                     self.pre_star_flag = False
                     self.star_press_started_time = None
+                    self._cancel_long_press_timer(ButtonType.L)
                     add_oev(DebugPrint("star off"))
             elif bt == ButtonType.L and st == False:
+                self._cancel_long_press_timer(ButtonType.L)
                 if self.is_star_long_pressing:
                     self.pre_star_flag = False
                     self.star_press_started_time = None
@@ -163,43 +237,19 @@ class MouseProcessor(EventProcessor):
             self.is_shift = self.pre_shift_flag or self.is_shift_long_pressing
             self.is_star = self.pre_star_flag or self.is_star_long_pressing
 
-            if not self.is_shift and not self.is_star:
-                if st == True:
-                    if bt == ButtonType.SELECT:
-                        self.pressing_dict["backspace"] = True
-                        add_oev(KeyDown("backspace", repeat=True))
-                    elif bt == ButtonType.START:
-                        add_oev(KeyPress("enter"))
-                    elif bt == ButtonType.ANALOG_R_PRESS:
-                        add_oev(SetLayerMode(layer_mode=LayerMode.KEYBOARD_JP))
-                    elif bt == ButtonType.R:
-                        add_oev(MouseClick())
-                    elif bt == ButtonType.ZR:
-                        add_oev(MouseClick(MouseButton.RIGHT))
-
-            elif self.is_shift and self.is_star:
-                if st == True:
-                    pass
-            elif self.is_star:
-                if st == True:
-                    if bt == ButtonType.R:
-                        add_oev(MouseClick())
-                    elif bt == ButtonType.ZR:
-                        add_oev(MouseClick(MouseButton.RIGHT))
-            elif self.is_shift:
-                if st == True:
-                    pass
-
-            if st == False and bt == ButtonType.SELECT:
-                if "backspace" in self.pressing_dict and self.pressing_dict["backspace"]:
-                    self.pressing_dict["backspace"] = False
-                    add_oev(KeyUp("backspace"))
+            modifiers = Modifier.NONE
+            if self.is_shift:
+                modifiers |= Modifier.SHIFT
+            if self.is_star:
+                modifiers |= Modifier.STAR
+            self._dispatch_keymap(self.keymap_layout, modifiers, bt, st)
 
             # Shift off when any button released
             if not self.is_shift_long_pressing and self.pre_shift_flag:
                 if st == False and bt != ButtonType.ZL:
                     self.pre_shift_flag = False
                     self.shift_press_started_time = None
+                    self._cancel_long_press_timer(ButtonType.ZL)
                     add_oev(DebugPrint("shift off"))
 
             # Star off when any button released
@@ -207,32 +257,17 @@ class MouseProcessor(EventProcessor):
                 if st == False and bt != ButtonType.L:
                     self.pre_star_flag = False
                     self.star_press_started_time = None
+                    self._cancel_long_press_timer(ButtonType.L)
                     add_oev(DebugPrint("star off"))
 
-        self._mouse_process(axis_dict, state_dict)
-
-        # Shift long press
-        self.prev_is_shift_long_pressing = self.is_shift_long_pressing
-        self.is_shift_long_pressing = (
-            bool(ButtonType.ZL in state_dict and state_dict[ButtonType.ZL])
-            and (
-                self.shift_press_started_time is not None
-                and time.time() - self.shift_press_started_time > self.long_press_threshold_sec
-            )
-        )
-        if self.is_shift_long_pressing and not self.prev_is_shift_long_pressing:
-            add_oev(DebugPrint("shift long press"))
-
-        # Star long press
-        self.prev_is_star_long_pressing = self.is_star_long_pressing
-        self.is_star_long_pressing = (
-            bool(ButtonType.L in state_dict and state_dict[ButtonType.L])
-            and (
-                self.star_press_started_time is not None
-                and time.time() - self.star_press_started_time > self.long_press_threshold_sec
-            )
-        )
-        if self.is_star_long_pressing and not self.prev_is_star_long_pressing:
-            add_oev(DebugPrint("star long press"))
+        self._update_mouse_move_timer(axis_dict)
+
+        # Shift long press (set by the timer, cleared once the button is released)
+        if self.is_shift_long_pressing and not state_dict.get(ButtonType.ZL, False):
+            self.is_shift_long_pressing = False
+
+        # Star long press (set by the timer, cleared once the button is released)
+        if self.is_star_long_pressing and not state_dict.get(ButtonType.L, False):
+            self.is_star_long_pressing = False
 
         
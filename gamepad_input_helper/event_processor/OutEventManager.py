@@ -1,16 +1,146 @@
+import sys
+import time
+import threading
+from collections import deque
 from ..DebugState import DebugState
+from ..out_events import MouseMoveRel, MouseWheel
+
+import functools
+print = functools.partial(print, flush=True)
 
 class OutEventManager:
-    def __init__(self):
-        self.out_events = []
+    def __init__(self, max_queue_size: int = 0, output_backend = None, latency_stats = None):
+        # NOTE: add_event() is called from the main (and timer) threads,
+        #       process_events() from the output thread. every access to
+        #       out_events is guarded by _condition.
+        # (event, enqueue time, cause time, session) per queued event, cause time is the read time of
+        # the report that caused the event (None for timer driven events), session is the
+        # ControllerSession the event is executed for (None for the singletons)
+        self.out_events: deque[tuple] = deque()
+        self.max_queue_size = max_queue_size
+        # flushed after each batch (e.g. UInputBackend sends one SYN per batch)
+        self.output_backend = output_backend
+        self.latency_stats = latency_stats
+        self._condition = threading.Condition()
+
+        self.processed_count = 0
+        self.dropped_count = 0
+        self.max_queue_depth = 0
+        # number of events merged into the previous one
+        self.coalesced_move_count = 0
+        self.coalesced_wheel_count = 0
+
+    def add_event(self, event, cause_ns: int | None = None, session = None) -> bool:
+        enqueue_ns = time.monotonic_ns()
+        with self._condition:
+            if self.max_queue_size > 0 and len(self.out_events) >= self.max_queue_size:
+                self.dropped_count += 1
+                return False
+
+            self.out_events.append((event, enqueue_ns, cause_ns, session))
+            if len(self.out_events) > self.max_queue_depth:
+                self.max_queue_depth = len(self.out_events)
+            self._condition.notify()
+        return True
+
+    def get_queue_depth(self) -> int:
+        with self._condition:
+            return len(self.out_events)
+
+    def process_events(self, timeout_sec: float | None = 0) -> int:
+        # wait until events are added (timeout_sec=None waits forever, 0 does not wait),
+        # then execute everything queued so far as one batch
+        with self._condition:
+            if timeout_sec is None:
+                while not self.out_events:
+                    self._condition.wait()
+            elif not self.out_events and timeout_sec > 0:
+                self._condition.wait(timeout_sec)
+
+            if not self.out_events:
+                return 0
 
-    def add_event(self, event):
-        self.out_events.append(event)
+            batch = self.out_events
+            self.out_events = deque()
 
-    def process_events(self):
-        for oev in self.out_events:
+        queued_count = len(batch)
+        batch = self._coalesce(batch)
+        latency_stats = self.latency_stats
+
+        # execute without holding the lock, so producers never wait on slow output
+        for (oev, enqueue_ns, cause_ns, session, merged_causes) in batch:
             if DebugState.is_debug():
                 print(f"{oev}")
-            oev.execute()
+            start_ns = time.monotonic_ns()
+            try:
+                oev.execute(session)
+                # the events merged into this one are done too
+                self.processed_count += 1 + len(merged_causes)
+            except Exception as e:
+                self.dropped_count += 1 + len(merged_causes)
+                print(f"[Error] failed to execute {oev}: {e}", file=sys.stderr)
+            if latency_stats is not None:
+                latency_stats.on_out_event(enqueue_ns, start_ns, time.monotonic_ns())
+
+        if self.output_backend is not None:
+            try:
+                self.output_backend.flush()
+            except Exception as e:
+                print(f"[Error] failed to flush {self.output_backend}: {e}", file=sys.stderr)
+
+        # NOTE: backends may buffer until flush(), so the output is done only now
+        if latency_stats is not None:
+            output_ns = time.monotonic_ns()
+            for (_, _, cause_ns, _, merged_causes) in batch:
+                if cause_ns is not None:
+                    latency_stats.on_output(cause_ns, output_ns)
+                for merged_ns in merged_causes:
+                    if merged_ns is not None:
+                        latency_stats.on_output(merged_ns, output_ns)
+
+        return queued_count
+
+    def _coalesce(self, batch) -> list:
+        # merge adjacent relative moves (and scrolls) into one, so a backlog of
+        # tiny moves is sent as a single move. other events keep their order.
+        # NOTE: events may be shared (prebuilt in the keymap), so merged events are new instances.
+        #       a merged event keeps the enqueue time of the first one and the earliest cause time,
+        #       the cause times of the others are kept in its merged causes (for the latency stats).
+        #       moves of different sessions are merged too, there is one cursor
+        # (event, enqueue time, cause time, session, cause times of the events merged into it) per event
+        result = []
+        for (oev, enqueue_ns, cause_ns, session) in batch:
+            prev = result[-1][0] if result else None
+            if type(oev) is MouseMoveRel and type(prev) is MouseMoveRel:
+                result[-1] = _merge(result[-1], MouseMoveRel(prev.x + oev.x, prev.y + oev.y), cause_ns)
+                self.coalesced_move_count += 1
+            elif type(oev) is MouseWheel and type(prev) is MouseWheel:
+                result[-1] = _merge(result[-1], MouseWheel(_add_delta(prev.x, oev.x), _add_delta(prev.y, oev.y)), cause_ns)
+                self.coalesced_wheel_count += 1
+            else:
+                result.append((oev, enqueue_ns, cause_ns, session, ()))
+        return result
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self.get_queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "processed": self.processed_count,
+            "dropped": self.dropped_count,
+            "coalesced_moves": self.coalesced_move_count,
+            "coalesced_wheels": self.coalesced_wheel_count,
+        }
+
+def _merge(item: tuple, event, other_ns: int | None) -> tuple:
+    (_, enqueue_ns, cause_ns, session, merged_causes) = item
+    if other_ns is not None and (cause_ns is None or other_ns < cause_ns):
+        (cause_ns, other_ns) = (other_ns, cause_ns)
+    if not merged_causes:
+        merged_causes = []
+    merged_causes.append(other_ns)
+    return (event, enqueue_ns, cause_ns, session, merged_causes)
 
-        self.out_events.clear()
\ No newline at end of file
+def _add_delta(a: int | None, b: int | None) -> int | None:
+    if a is None and b is None:
+        return None
+    return (a or 0) + (b or 0)
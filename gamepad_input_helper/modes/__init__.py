@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 
 class LayerMode(Enum):
     MOUSE = 1
@@ -19,4 +19,22 @@ class JPInputMode(Enum):
             raise ValueError(f"Unknown mode: {label}")
 
 class SymbolMode(Enum):
-    DEFAULT = 0
\ No newline at end of file
+    DEFAULT = 0
+
+class Modifier(IntFlag):
+    NONE = 0
+    SHIFT = 1
+    STAR = 2
+
+    @staticmethod
+    def from_str(label):
+        if label == "none":
+            return Modifier.NONE
+        elif label == "shift":
+            return Modifier.SHIFT
+        elif label == "star":
+            return Modifier.STAR
+        elif label == "shift_star":
+            return Modifier.SHIFT | Modifier.STAR
+        else:
+            raise ValueError(f"Unknown modifier: {label}")
\ No newline at end of file
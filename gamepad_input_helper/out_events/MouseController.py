@@ -1,5 +1,5 @@
+import time
 from .MouseButton import MouseButton
-from pymouse import PyMouse
 
 # singleton
 class MouseController:
@@ -8,23 +8,64 @@ class MouseController:
         if not hasattr(MouseController, "singleton"):
             MouseController.singleton = MouseController()
         return MouseController.singleton
-    
-    def __init__(self):
-        self.mouse = PyMouse()
+
+    def __init__(self, mouse = None, resync_interval_sec: float = 0.5):
+        if mouse is None:
+            # NOTE: imported here, pymouse needs a display on import
+            from pymouse import PyMouse
+            mouse = PyMouse()
+        self.mouse = mouse
+
+        # NOTE: the cursor position is tracked locally, so a relative move is a single move() call.
+        #       it is queried again after resync_interval_sec, in case something else moved the cursor
+        self.resync_interval_sec = resync_interval_sec
+        self.position: tuple[int, int] | None = None
+        self.position_synced_time = None
+        self.screen_size: tuple[int, int] | None = None
+        self.resync_count = 0
+
+        try:
+            self.screen_size = tuple(self.mouse.screen_size())
+        except Exception:
+            pass
+
+    def _get_position(self) -> tuple[int, int]:
+        now = time.monotonic()
+        if self.position is None or now - self.position_synced_time > self.resync_interval_sec:
+            (cx, cy) = self.mouse.position()
+            self.position = (int(cx), int(cy))
+            self.position_synced_time = now
+            self.resync_count += 1
+        return self.position
+
+    def _clamp(self, x: int, y: int) -> tuple[int, int]:
+        # the display server clamps the cursor to the screen, keep the local position in sync
+        if self.screen_size is None:
+            return (x, y)
+        (w, h) = self.screen_size
+        return (min(max(x, 0), w - 1), min(max(y, 0), h - 1))
+
+    def resync(self):
+        self.position = None
 
     def move(self, x, y):
+        (x, y) = self._clamp(x, y)
         self.mouse.move(x, y)
+        self.position = (x, y)
+        self.position_synced_time = time.monotonic()
 
     def move_rel(self, dx, dy):
-        (cx, cy) = self.mouse.position()
-        self.mouse.move(cx + dx, cy + dy)
-    
+        (cx, cy) = self._get_position()
+        (x, y) = self._clamp(cx + dx, cy + dy)
+        self.mouse.move(x, y)
+        self.position = (x, y)
+
     def click(self, button: MouseButton = MouseButton.LEFT, count = 1, x: int | None = None, y: int | None = None):
         if x is None or y is None:
-            (cx, cy) = self.mouse.position()
+            (cx, cy) = self._get_position()
             self.mouse.click(cx, cy, int(button), count)
-        else: 
+        else:
             self.mouse.click(x, y, int(button), count)
 
     def scroll(self, x: int | None = None, y: int | None = None):
-        self.mouse.scroll(horizontal=x, vertical=y)
\ No newline at end of file
+        self.mouse.scroll(horizontal=x, vertical=y)
@@ -0,0 +1,70 @@
+from .MouseButton import MouseButton
+
+class OutputBackend:
+    # NOTE: every method is called from the output thread only.
+    #       backends may buffer events until flush(), which is called
+    #       after each batch of out events.
+
+    def key_press(self, key: str):
+        self.key_down(key)
+        self.key_up(key)
+
+    def key_down(self, key: str):
+        raise NotImplementedError()
+
+    def key_up(self, key: str):
+        raise NotImplementedError()
+
+    def hotkey(self, *keys: str):
+        for key in keys:
+            self.key_down(key)
+        for key in reversed(keys):
+            self.key_up(key)
+
+    def type_text(self, text: str, interval_sec: float | None = None):
+        # the whole string in one go, interval_sec=None uses the backend default (no pause by default)
+        raise NotImplementedError()
+
+    def mouse_move_rel(self, dx: int, dy: int):
+        raise NotImplementedError()
+
+    def mouse_click(self, button: MouseButton = MouseButton.LEFT, count: int = 1):
+        raise NotImplementedError()
+
+    def mouse_scroll(self, x: int | None = None, y: int | None = None):
+        raise NotImplementedError()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def create(name: str, **options) -> 'OutputBackend':
+        name = name.lower()
+        if name == "pyautogui":
+            from .PyAutoGUIBackend import PyAutoGUIBackend
+            return PyAutoGUIBackend(**options)
+        elif name == "uinput":
+            from .UInputBackend import UInputBackend
+            return UInputBackend(**options)
+        elif name == "recording":
+            from .RecordingBackend import RecordingBackend
+            return RecordingBackend(**options)
+        else:
+            raise ValueError(f"Unknown output backend: {name}")
+
+    @staticmethod
+    def get_singleton() -> 'OutputBackend':
+        global outputBackend
+        if outputBackend is None:
+            raise RuntimeError("OutputBackend singleton is not initialized")
+        return outputBackend
+
+    @staticmethod
+    def set_singleton(instance):
+        global outputBackend
+        outputBackend = instance
+
+outputBackend = None
@@ -0,0 +1,52 @@
+from .OutputBackend import OutputBackend
+from .MouseController import MouseController
+from .MouseButton import MouseButton
+
+# NOTE:
+#
+# - key control is handled with pyautogui
+# - mouse control is handled with pymouse (PyUserInput)
+#
+# this is because pyautogui.PAUSE cause laggy mouse movement
+
+class PyAutoGUIBackend(OutputBackend):
+    def __init__(self, pause_sec: float | None = None, mouse_resync_interval_sec: float = 0.5, type_interval_sec: float = 0.0):
+        # NOTE: imported here, pyautogui needs a display on import
+        import pyautogui
+        self.pyautogui = pyautogui
+        if pause_sec is not None:
+            pyautogui.PAUSE = pause_sec
+        # NOTE: pause between the characters of type_text(), independent of pyautogui.PAUSE.
+        #       only for apps that drop fast input
+        self.type_interval_sec = type_interval_sec
+        self.mouse_controller = MouseController(resync_interval_sec=mouse_resync_interval_sec)
+
+    def key_press(self, key: str):
+        self.pyautogui.press(key)
+
+    def key_down(self, key: str):
+        self.pyautogui.keyDown(key)
+
+    def key_up(self, key: str):
+        self.pyautogui.keyUp(key)
+
+    def hotkey(self, *keys: str):
+        self.pyautogui.hotkey(*keys)
+
+    def type_text(self, text: str, interval_sec: float | None = None):
+        if interval_sec is None:
+            interval_sec = self.type_interval_sec
+        # NOTE: _pause=False skips the trailing pyautogui.PAUSE, the whole string is one injection
+        self.pyautogui.typewrite(text, interval=interval_sec, _pause=False)
+
+    def mouse_move_rel(self, dx: int, dy: int):
+        self.mouse_controller.move_rel(dx, dy)
+
+    def mouse_click(self, button: MouseButton = MouseButton.LEFT, count: int = 1):
+        self.mouse_controller.click(button=button, count=count)
+
+    def mouse_scroll(self, x: int | None = None, y: int | None = None):
+        self.mouse_controller.scroll(x=x, y=y)
+
+    def __str__(self):
+        return f"PyAutoGUIBackend(pause_sec={self.pyautogui.PAUSE}, type_interval_sec={self.type_interval_sec})"
@@ -0,0 +1,48 @@
+from collections import deque
+from .OutputBackend import OutputBackend
+from .MouseButton import MouseButton
+
+class RecordingBackend(OutputBackend):
+    # keeps every output call in memory instead of sending it, for tests and dry runs
+    def __init__(self, max_records: int = 0):
+        self.max_records = max_records
+        # NOTE: the oldest records drop out once max_records is reached (0 keeps all)
+        self.records: deque[tuple] = deque(maxlen=max_records if max_records > 0 else None)
+        self.flush_count = 0
+
+    def _record(self, *record):
+        self.records.append(record)
+
+    def key_press(self, key: str):
+        self._record("key_press", key)
+
+    def key_down(self, key: str):
+        self._record("key_down", key)
+
+    def key_up(self, key: str):
+        self._record("key_up", key)
+
+    def hotkey(self, *keys: str):
+        self._record("hotkey", *keys)
+
+    def type_text(self, text: str, interval_sec: float | None = None):
+        self._record("type_text", text)
+
+    def mouse_move_rel(self, dx: int, dy: int):
+        self._record("mouse_move_rel", dx, dy)
+
+    def mouse_click(self, button: MouseButton = MouseButton.LEFT, count: int = 1):
+        self._record("mouse_click", button, count)
+
+    def mouse_scroll(self, x: int | None = None, y: int | None = None):
+        self._record("mouse_scroll", x, y)
+
+    def flush(self):
+        self.flush_count += 1
+
+    def clear(self):
+        self.records.clear()
+        self.flush_count = 0
+
+    def __str__(self):
+        return f"RecordingBackend({len(self.records)} records)"
@@ -0,0 +1,220 @@
+import os
+import time
+import fcntl
+import struct
+from .OutputBackend import OutputBackend
+from .MouseButton import MouseButton
+
+# linux/input-event-codes.h
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_REL = 0x02
+SYN_REPORT = 0
+REL_X = 0x00
+REL_Y = 0x01
+REL_HWHEEL = 0x06
+REL_WHEEL = 0x08
+BTN_LEFT = 0x110
+BTN_RIGHT = 0x111
+BTN_MIDDLE = 0x112
+KEY_LEFTSHIFT = 42
+
+# linux/uinput.h
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_SET_RELBIT = 0x40045566
+BUS_USB = 0x03
+
+# struct input_event (timestamps are filled in by the kernel)
+_INPUT_EVENT = struct.Struct("llHHi")
+# struct uinput_user_dev: name[80], input_id, ff_effects_max, absmax/absmin/absfuzz/absflat[64]
+_UINPUT_USER_DEV = struct.Struct("80sHHHHI256i")
+
+_NAMED_KEYS = {
+    "esc": 1, "escape": 1,
+    "backspace": 14, "tab": 15,
+    "enter": 28, "return": 28,
+    "ctrl": 29, "ctrlleft": 29, "ctrlright": 97,
+    "shift": 42, "shiftleft": 42, "shiftright": 54,
+    "alt": 56, "altleft": 56, "altright": 100,
+    "space": 57, "capslock": 58,
+    "numlock": 69, "scrolllock": 70,
+    "kanji": 85, "zenkakuhankaku": 85,
+    "katakana": 90, "hiragana": 91, "henkan": 92, "muhenkan": 94, "yen": 124,
+    "home": 102, "up": 103, "pageup": 104, "pgup": 104,
+    "left": 105, "right": 106,
+    "end": 107, "down": 108, "pagedown": 109, "pgdn": 109,
+    "insert": 110, "delete": 111, "del": 111,
+    "win": 125, "winleft": 125, "winright": 126, "command": 125,
+    "f1": 59, "f2": 60, "f3": 61, "f4": 62, "f5": 63, "f6": 64,
+    "f7": 65, "f8": 66, "f9": 67, "f10": 68, "f11": 87, "f12": 88,
+}
+
+# NOTE: uinput sends physical keys, characters are mapped as on a US keyboard
+_CHAR_KEYS = {
+    "1": 2, "2": 3, "3": 4, "4": 5, "5": 6, "6": 7, "7": 8, "8": 9, "9": 10, "0": 11,
+    "-": 12, "=": 13, "[": 26, "]": 27, ";": 39, "'": 40, "`": 41, "\\": 43,
+    ",": 51, ".": 52, "/": 53, " ": 57, "\n": 28, "\t": 15,
+    "q": 16, "w": 17, "e": 18, "r": 19, "t": 20, "y": 21, "u": 22, "i": 23, "o": 24, "p": 25,
+    "a": 30, "s": 31, "d": 32, "f": 33, "g": 34, "h": 35, "j": 36, "k": 37, "l": 38,
+    "z": 44, "x": 45, "c": 46, "v": 47, "b": 48, "n": 49, "m": 50,
+}
+
+_SHIFTED_CHARS = {
+    "!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8", "(": "9", ")": "0",
+    "_": "-", "+": "=", "{": "[", "}": "]", ":": ";", "\"": "'", "~": "`", "|": "\\",
+    "<": ",", ">": ".", "?": "/",
+}
+
+def _build_key_table() -> dict[str, tuple[int, bool]]:
+    # key name -> (key code, needs shift)
+    table = {name: (code, False) for name, code in _NAMED_KEYS.items()}
+    for c, code in _CHAR_KEYS.items():
+        table[c] = (code, False)
+        if c.isalpha():
+            table[c.upper()] = (code, True)
+    for c, base in _SHIFTED_CHARS.items():
+        table[c] = (_CHAR_KEYS[base], True)
+    return table
+
+_KEY_TABLE = _build_key_table()
+
+_MOUSE_BUTTONS = {
+    MouseButton.LEFT: BTN_LEFT,
+    MouseButton.RIGHT: BTN_RIGHT,
+    MouseButton.MIDDLE: BTN_MIDDLE,
+}
+
+class UInputBackend(OutputBackend):
+    # virtual keyboard/mouse on /dev/uinput (Linux only)
+    def __init__(self,
+            path: str = "/dev/uinput",
+            device_name: str = "gamepad-input",
+            type_interval_sec: float = 0.0):
+        # NOTE: no global pause, type_interval_sec is only used between the characters of type_text()
+        self.type_interval_sec = type_interval_sec
+        self._pending: list[bytes] = []
+        # (type, code) changed since the last SYN_REPORT
+        self._frame_codes: set[tuple[int, int]] = set()
+        self._pressed_codes: set[int] = set()
+        self.write_count = 0
+
+        try:
+            self.fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            raise RuntimeError(f"failed to open {path} ({e}), check that the uinput module is loaded and writable") from e
+
+        try:
+            self._setup(device_name)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _setup(self, device_name: str):
+        for ev in (EV_SYN, EV_KEY, EV_REL):
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, ev)
+        for code in sorted({code for (code, _) in _KEY_TABLE.values()} | set(_MOUSE_BUTTONS.values())):
+            fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+        for rel in (REL_X, REL_Y, REL_WHEEL, REL_HWHEEL):
+            fcntl.ioctl(self.fd, UI_SET_RELBIT, rel)
+
+        os.write(self.fd, _UINPUT_USER_DEV.pack(device_name.encode("utf-8")[:79], BUS_USB, 0x1, 0x1, 1, 0, *([0] * 256)))
+        fcntl.ioctl(self.fd, UI_DEV_CREATE)
+
+    def _emit(self, ev_type: int, code: int, value: int):
+        # NOTE: a code may change only once per SYN_REPORT frame, otherwise readers
+        #       see the final state only (e.g. a key press collapses into nothing)
+        if (ev_type, code) in self._frame_codes:
+            self._syn()
+        self._frame_codes.add((ev_type, code))
+        self._pending.append(_INPUT_EVENT.pack(0, 0, ev_type, code, value))
+
+    def _syn(self):
+        self._pending.append(_INPUT_EVENT.pack(0, 0, EV_SYN, SYN_REPORT, 0))
+        self._frame_codes.clear()
+
+    def _key_code(self, key: str) -> tuple[int, bool]:
+        if key in _KEY_TABLE:
+            return _KEY_TABLE[key]
+        if key.lower() in _KEY_TABLE:
+            return _KEY_TABLE[key.lower()]
+        raise ValueError(f"Unknown key for uinput: {key}")
+
+    def _set_key(self, code: int, pressed: bool):
+        self._emit(EV_KEY, code, 1 if pressed else 0)
+        if pressed:
+            self._pressed_codes.add(code)
+        else:
+            self._pressed_codes.discard(code)
+
+    def key_press(self, key: str):
+        (code, needs_shift) = self._key_code(key)
+        if needs_shift:
+            self._set_key(KEY_LEFTSHIFT, True)
+        self._set_key(code, True)
+        self._set_key(code, False)
+        if needs_shift:
+            self._set_key(KEY_LEFTSHIFT, False)
+
+    def key_down(self, key: str):
+        (code, _) = self._key_code(key)
+        self._set_key(code, True)
+
+    def key_up(self, key: str):
+        (code, _) = self._key_code(key)
+        self._set_key(code, False)
+
+    def type_text(self, text: str, interval_sec: float | None = None):
+        if interval_sec is None:
+            interval_sec = self.type_interval_sec
+
+        for i, c in enumerate(text):
+            if i > 0 and interval_sec > 0:
+                # only targets that drop fast input need this
+                self.flush()
+                time.sleep(interval_sec)
+            self.key_press(c)
+
+    def mouse_move_rel(self, dx: int, dy: int):
+        if dx != 0:
+            self._emit(EV_REL, REL_X, dx)
+        if dy != 0:
+            self._emit(EV_REL, REL_Y, dy)
+
+    def mouse_click(self, button: MouseButton = MouseButton.LEFT, count: int = 1):
+        code = _MOUSE_BUTTONS[MouseButton(button)]
+        for _ in range(count):
+            self._set_key(code, True)
+            self._set_key(code, False)
+
+    def mouse_scroll(self, x: int | None = None, y: int | None = None):
+        if y:
+            self._emit(EV_REL, REL_WHEEL, y)
+        if x:
+            self._emit(EV_REL, REL_HWHEEL, x)
+
+    def flush(self):
+        # one write and one SYN_REPORT for everything since the last flush
+        if not self._pending:
+            return
+        if self._frame_codes:
+            self._syn()
+        os.write(self.fd, b"".join(self._pending))
+        self._pending = []
+        self.write_count += 1
+
+    def close(self):
+        if self.fd is None:
+            return
+        # release everything still held, so no key gets stuck
+        for code in list(self._pressed_codes):
+            self._set_key(code, False)
+        self.flush()
+        fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        os.close(self.fd)
+        self.fd = None
+
+    def __str__(self):
+        return f"UInputBackend(type_interval_sec={self.type_interval_sec})"
@@ -1,17 +1,30 @@
-import pyautogui
 from ..SoftwareKeyRepeatManager import SoftwareKeyRepeatManager
 from ..modes import LayerMode, JPInputMode, SymbolMode
 from ..LayerModeState import LayerModeState
 from .MouseController import MouseController
 from .MouseButton import MouseButton
+from .OutputBackend import OutputBackend
+from .PyAutoGUIBackend import PyAutoGUIBackend
+from .RecordingBackend import RecordingBackend
+# NOTE: UInputBackend is Linux only, create it with OutputBackend.create("uinput")
 from typing import Any
 
-# NOTE:
+# NOTE: key and mouse output goes through the OutputBackend singleton
+#       (PyAutoGUIBackend, UInputBackend or RecordingBackend)
 #
-# - key control is handled with pyautogui
-# - mouse control is handled with pymouse (PyUserInput)
-#
-# this is because pyautogui.PAUSE cause laggy mouse movement
+# execute(session) gets the ControllerSession whose processor added the event
+# (None for the singletons). events are shared between sessions (prebuilt in the keymap),
+# so the session comes with the queued event and is never kept in the event.
+
+def _get_software_key_repeat_manager(session) -> SoftwareKeyRepeatManager:
+    if session is None:
+        return SoftwareKeyRepeatManager.get_singleton()
+    return session.software_key_repeat_manager
+
+def _get_layer_mode_state(session) -> LayerModeState:
+    if session is None:
+        return LayerModeState.get_singleton()
+    return session.layer_mode_state
 
 class OutEvent:
     pass
@@ -20,7 +33,7 @@ class DebugPrint(OutEvent):
     def __init__(self, msg: str):
         self.msg = msg
 
-    def execute(self):
+    def execute(self, session = None):
         pass
 
     def __str__(self):
@@ -31,8 +44,8 @@ class KeyPress(OutEvent):
     def __init__(self, key: str):
         self.key = key
 
-    def execute(self):
-        pyautogui.press(self.key)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().key_press(self.key)
 
     def __str__(self):
         return f"KeyPress({self.key})"
@@ -42,9 +55,9 @@ class KeyDown(OutEvent):
         self.key = key
         self.repeat = repeat
 
-    def execute(self):
-        pyautogui.keyDown(self.key)
-        SoftwareKeyRepeatManager.get_singleton().keyDown(self.key)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().key_down(self.key)
+        _get_software_key_repeat_manager(session).keyDown(self.key)
 
     def __str__(self):
         return f"KeyDown({self.key}, repeat={self.repeat})"
@@ -53,22 +66,42 @@ class KeyUp(OutEvent):
     def __init__(self, key: str):
         self.key = key
 
-    def execute(self):
-        pyautogui.keyUp(self.key)
-        SoftwareKeyRepeatManager.get_singleton().keyUp(self.key)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().key_up(self.key)
+        _get_software_key_repeat_manager(session).keyUp(self.key)
 
     def __str__(self):
         return f"KeyUp({self.key})"
     
+class KeyRepeat(OutEvent):
+    # added by SoftwareKeyRepeatManager while a key is held
+    def __init__(self, key: str, timer = None, manager: SoftwareKeyRepeatManager | None = None):
+        self.key = key
+        self.timer = timer
+        # the manager that added this repeat (None for the one of the session)
+        self.manager = manager
+
+    def execute(self, session = None):
+        manager = self.manager if self.manager is not None else _get_software_key_repeat_manager(session)
+        # NOTE: skip repeats that were queued before the KeyUp of this key was executed
+        if self.timer is not None and not manager.is_repeating(self.key, self.timer):
+            return
+        backend = OutputBackend.get_singleton()
+        backend.key_up(self.key)
+        backend.key_down(self.key)
+        manager.on_repeat_executed(self.key)
+
+    def __str__(self):
+        return f"KeyRepeat({self.key})"
+
 class TypeWrite(OutEvent):
     def __init__(self, text: str, interval = None):
         self.text = text
-        if interval is None:
-            interval = pyautogui.PAUSE
+        # None uses the default of the output backend
         self.interval = interval
 
-    def execute(self):
-        pyautogui.typewrite(self.text, interval=self.interval)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().type_text(self.text, interval_sec=self.interval)
 
     def __str__(self):
         return f"TypeWrite({self.text})"
@@ -77,8 +110,8 @@ class HotKey(OutEvent):
     def __init__(self, *args):
         self.args = args
 
-    def execute(self):
-        pyautogui.hotkey(*self.args)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().hotkey(*self.args)
 
     def __str__(self):
         return f"HotKey({self.args})"
@@ -88,9 +121,8 @@ class MouseMoveRel(OutEvent):
         self.x = x
         self.y = y
 
-    def execute(self):
-        mc = MouseController.get_singleton()
-        mc.move_rel(self.x, self.y)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().mouse_move_rel(self.x, self.y)
         # old_pause = None
         # if self.pause is False:
         #     old_pause = pyautogui.PAUSE
@@ -107,9 +139,8 @@ class MouseClick(OutEvent):
         self.button = button
         self.count = count
 
-    def execute(self):
-        mc = MouseController.get_singleton()
-        mc.click(button=self.button, count=self.count)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().mouse_click(button=self.button, count=self.count)
         # pyautogui.click(x=None, y=None, button=self.button)
 
     def __str__(self):
@@ -120,9 +151,8 @@ class MouseWheel(OutEvent):
         self.x = x
         self.y = y
 
-    def execute(self):
-        mc = MouseController.get_singleton()
-        mc.scroll(x=self.x, y=self.y)
+    def execute(self, session = None):
+        OutputBackend.get_singleton().mouse_scroll(x=self.x, y=self.y)
         # pyautogui.scroll(clicks=self.clicks, x=self.x, y=self.y, _pause=self.pause)
 
     def __str__(self):
@@ -134,8 +164,8 @@ class SetLayerMode(OutEvent):
         self.layer_mode = layer_mode
         # self.properties = properties
 
-    def execute(self):
-        layerModeState = LayerModeState.get_singleton()
+    def execute(self, session = None):
+        layerModeState = _get_layer_mode_state(session)
         layerModeState.set_layer_mode(self.layer_mode)
         # layerModeState.set_layer_mode(self.layer_mode, self.properties)
 
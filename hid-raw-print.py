@@ -1,35 +1,102 @@
-import hid
+import time
 import argparse
 import functools
 import sys
-from hid_utils import HIDDeviceManager
+from hid_utils import HIDDeviceManager, HIDCaptureWriter, HIDCaptureReader, DeviceMode, JoyConType
 print = functools.partial(print, flush=True)
 
+JOYCON_L = (0x057e, 0x2006, JoyConType.L)
+JOYCON_R = (0x057e, 0x2007, JoyConType.R)
+
+def format_raw(raw) -> str:
+    # each 0-255 value print with empty padding to 3 digits
+    return " ".join([f"{x:03d}" for x in raw])
+
+def print_capture(path: str):
+    with HIDCaptureReader(path) as reader:
+        print(f"# {reader}, {reader.get_duration_sec():.3f} sec", file=sys.stderr)
+        start_ns = None
+        raw = None
+        for (timestamp_ns, device_index, raw) in reader:
+            if start_ns is None:
+                start_ns = timestamp_ns
+            print(f"{(timestamp_ns - start_ns) / 1e9:10.6f} {device_index} {format_raw(raw)}")
+        # NOTE: the last record view must be dropped before the reader closes the mapping
+        raw = None
+
 def main():
-    parser = argparse.ArgumentParser(description='print raw HID output',
+    mode_names = [x.name for x in DeviceMode]
+
+    parser = argparse.ArgumentParser(description='print raw HID output, or record it to a binary capture file',
                                         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-i','--vendor', type=lambda x: int(x,0), default=0x057e, help='vendor id')
     parser.add_argument('-p','--product', type=lambda x: int(x,0), default=0x2006, help='product id')
+    parser.add_argument('-m','--device-mode', type=str, choices=mode_names,
+                        default=DeviceMode.DINPUT.name, help='device mode stored in the capture (JOYCON records both Joy-Cons, vendor and product id are ignored)')
+    parser.add_argument('-o','--output', type=str, default=None, help='record reports to this capture file instead of printing them')
+    parser.add_argument('--input', type=str, default=None, help='print the reports of a capture file (no device needed)')
+    parser.add_argument('--report-size', type=int, default=64, help='bytes per report')
     args = parser.parse_args()
 
-    vendor_id = args.vendor
-    product_id = args.product
+    if args.input is not None:
+        try:
+            print_capture(args.input)
+        except (OSError, ValueError) as e:
+            print(f"[Error] failed to read capture: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    device_mode = DeviceMode.from_str(args.device_mode)
+    if device_mode == DeviceMode.JOYCON:
+        targets = [JOYCON_L, JOYCON_R]
+    else:
+        targets = [(args.vendor, args.product, JoyConType.NONE)]
 
     device_manager = HIDDeviceManager()
 
-    if not device_manager.has_device(vendor_id, product_id):
-        print(f"[Error] device not found: 0x{vendor_id:04x}:0x{product_id:04x}", file=sys.stderr)
-        print("", file=sys.stderr)
-        print("Current device list:", file=sys.stderr)
-        device_manager.list_devices()
-        sys.exit(1)
+    devices = []
+    for (vendor_id, product_id, joycon_type) in targets:
+        if not device_manager.has_device(vendor_id, product_id):
+            print(f"[Error] device not found: 0x{vendor_id:04x}:0x{product_id:04x}", file=sys.stderr)
+            print("", file=sys.stderr)
+            print("Current device list:", file=sys.stderr)
+            device_manager.list_devices()
+            sys.exit(1)
+        devices.append(device_manager.get_device(vendor_id, product_id, device_mode, joycon_type=joycon_type))
+
+    if args.output is None:
+        while True:
+            for device in devices:
+                raw = device.read_raw(size=args.report_size)
+                if raw:
+                    print(format_raw(raw))
+            if len(devices) > 1:
+                time.sleep(0.001)
+
+    # NOTE: record mode polls nonblocking devices, and prints the record count once per second
+    writer = HIDCaptureWriter(args.output, targets, mode=device_mode, report_size=args.report_size)
+    print(f"[Info] recording to {args.output}, Ctrl+C to stop", file=sys.stderr)
+    last_status_time = time.monotonic()
+    try:
+        while True:
+            received = False
+            for (device_index, device) in enumerate(devices):
+                raw = device.read_raw(size=args.report_size)
+                if raw:
+                    writer.write(raw, timestamp_ns=time.monotonic_ns(), device_index=device_index)
+                    received = True
+            if not received:
+                time.sleep(0.0005)
 
-    device = device_manager.get_device(vendor_id, product_id)
-    while True:
-        raw = device.read_raw()
-        if raw:
-            # each 0-255 value print with empty padding to 3 digits
-            print(" ".join([f"{x:03d}" for x in raw]))
+            now = time.monotonic()
+            if now - last_status_time >= 1.0:
+                last_status_time = now
+                print(f"[Info] {writer.record_count} reports", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        print(f"[Info] recorded {writer.record_count} reports to {args.output}", file=sys.stderr)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,17 @@
+class AxisHysteresis:
+    # ANALOG_L_* / ANALOG_R_* directions press past the axis threshold of the decoder and release
+    # only below release_threshold (None is the axis threshold, no hysteresis).
+    # min_dwell_sec keeps each direction pressed (or released) at least this long after it changed
+    def __init__(self, release_threshold: float | None = None, min_dwell_sec: float = 0.0):
+        if release_threshold is not None and not 0.0 <= release_threshold < 1.0:
+            raise ValueError(f"release_threshold must be 0.0 <= x < 1.0: {release_threshold}")
+        if min_dwell_sec < 0.0:
+            raise ValueError(f"min_dwell_sec must be >= 0.0: {min_dwell_sec}")
+        self.release_threshold = release_threshold
+        self.min_dwell_sec = float(min_dwell_sec)
+
+    def is_enabled(self) -> bool:
+        return self.release_threshold is not None or self.min_dwell_sec > 0.0
+
+    def __str__(self):
+        return f"AxisHysteresis(release_threshold={self.release_threshold}, min_dwell_sec={self.min_dwell_sec})"
@@ -0,0 +1,63 @@
+from collections.abc import Mapping
+from .AxisType import AxisType
+
+# axis value at the stick center (values are 0.0 .. 1.0)
+AXIS_CENTER = 0.5
+# length of an axis value array, indexed by AxisType.value
+AXIS_COUNT = len(AxisType)
+
+def get_axis_mask(axis_types) -> int:
+    mask = 0
+    for axis_type in axis_types:
+        mask |= 1 << axis_type.value
+    return mask
+
+class AxisValues(Mapping):
+    # read-only dict[AxisType, float] view over an axis value array,
+    # limited to the axes a device reports (axis_mask has bit 1 << AxisType.value set for each)
+    # NOTE: lookups index the array directly, AxisType keys are never hashed
+    __slots__ = ("values", "axis_types", "axis_mask")
+
+    def __init__(self, values: list[float], axis_types: tuple[AxisType, ...] = (), axis_mask: int | None = None):
+        self.values = values
+        self.axis_types = axis_types
+        self.axis_mask = axis_mask if axis_mask is not None else get_axis_mask(axis_types)
+
+    def __getitem__(self, axis_type: AxisType) -> float:
+        if type(axis_type) is AxisType and self.axis_mask >> axis_type._value_ & 1:
+            return self.values[axis_type._value_]
+        raise KeyError(axis_type)
+
+    def get(self, axis_type: AxisType, default=None):
+        if type(axis_type) is AxisType and self.axis_mask >> axis_type._value_ & 1:
+            return self.values[axis_type._value_]
+        return default
+
+    def __contains__(self, axis_type) -> bool:
+        return type(axis_type) is AxisType and bool(self.axis_mask >> axis_type._value_ & 1)
+
+    def __iter__(self):
+        return iter(self.axis_types)
+
+    def __len__(self) -> int:
+        return len(self.axis_types)
+
+    def copy(self) -> 'AxisValues':
+        # snapshot of a live view
+        return AxisValues(self.values.copy(), self.axis_types, self.axis_mask)
+
+    def __or__(self, other: 'AxisValues') -> 'AxisValues':
+        # the axes of both, other wins where both have one
+        values = self.values.copy()
+        other_values = other.values
+        axis_types = self.axis_types
+        for axis_type in other.axis_types:
+            index = axis_type._value_
+            values[index] = other_values[index]
+            if not self.axis_mask >> index & 1:
+                axis_types = axis_types + (axis_type,)
+        return AxisValues(values, axis_types, self.axis_mask | other.axis_mask)
+
+    def __str__(self):
+        values_str = ", ".join([f"{axis_type.name}={self.values[axis_type.value]:.3f}" for axis_type in self.axis_types])
+        return f"AxisValues({values_str})"
@@ -0,0 +1,200 @@
+import numpy as np
+from .DeviceMode import DeviceMode
+from .JoyConType import JoyConType
+from .AxisType import AxisType
+from .ButtonType import ButtonType
+from .HIDCapture import HIDCaptureReader
+from .StickCalibration import StickCalibration
+from .ReportDecoder import (ReportDecoder, DInputDecoder, XInputDecoder, JoyConLDecoder, JoyConRDecoder, SwitchProDecoder,
+    _DINPUT_BYTE4_TABLE, _DINPUT_BYTE5_TABLE, _AXIS8_VALUE_TABLE,
+    _XINPUT_HAT_TABLE, _XINPUT_BYTE14_TABLE, _XINPUT_BYTE15_TABLE, _AXIS16_HIGH_VALUE_TABLE, _AXIS16_LOW_VALUE_TABLE,
+    _SWITCH_BYTE3_TABLE, _SWITCH_BYTE4_TABLE, _SWITCH_BYTE5_TABLE)
+
+# NOTE:
+#
+# decodes many reports at once for offline analysis (needs numpy, not used by the input path).
+# the lookup tables are the ones of the scalar ReportDecoder, indexed with whole columns,
+# so the results are exactly those of ReportDecoder.decode() report by report.
+# AxisHysteresis is not applied, it depends on the reports before (see bench_hysteresis.py).
+#
+# stick sources: (axis, kind, byte offset)
+#   "8":   raw[offset] (DINPUT)
+#   "12h": raw[offset] | (raw[offset + 1] & 0xf) << 8
+#   "12v": (raw[offset + 1] >> 4) | raw[offset + 2] << 4
+#   "16":  raw[offset] | raw[offset + 1] << 8 (XINPUT, the mask table is indexed by the high byte,
+#          the axis value is the sum of the high and low byte value tables)
+
+_LEFT_STICK12 = [(AxisType.ANALOG_L_RIGHT, "12h", 6), (AxisType.ANALOG_L_DOWN, "12v", 6)]
+_RIGHT_STICK12 = [(AxisType.ANALOG_R_RIGHT, "12h", 9), (AxisType.ANALOG_R_DOWN, "12v", 9)]
+
+def _table(values, dtype) -> np.ndarray:
+    return np.array(values, dtype=dtype)
+
+class BatchDecodeResult:
+    def __init__(self, button_masks: np.ndarray,
+            stick_values: dict[AxisType, np.ndarray],
+            axis_values: dict[AxisType, np.ndarray]):
+        # (N,) uint64, pressed buttons as OR of ButtonType values
+        self.button_masks = button_masks
+        # (N,) uint16 per axis, raw stick values (12-bit, 8-bit on DINPUT, 16-bit on XINPUT)
+        self.stick_values = stick_values
+        # (N,) float64 per axis, the values of HIDDevice.get_axis_values()
+        self.axis_values = axis_values
+
+    def __len__(self) -> int:
+        return len(self.button_masks)
+
+    def is_pressed(self, button_type: ButtonType) -> np.ndarray:
+        return (self.button_masks & np.uint64(button_type.value)) != 0
+
+    def get_changed_indexes(self) -> np.ndarray:
+        # indexes of the reports that produce button events (the first one compares with no buttons pressed)
+        previous = np.concatenate(([np.uint64(0)], self.button_masks[:-1]))
+        return np.flatnonzero(self.button_masks != previous)
+
+    def __str__(self):
+        return f"BatchDecodeResult(reports={len(self)}, axes={[axis.name for axis in self.axis_values]})"
+
+class BatchDecoder:
+    def __init__(self, mode: DeviceMode,
+            joycon_type: JoyConType = JoyConType.NONE,
+            axis_threshold: float = 0.1,
+            calibration: StickCalibration | None = None,
+            trigger_threshold: float = 0.5):
+        self.mode = mode
+        self.joycon_type = joycon_type
+        self.axis_threshold = axis_threshold
+        decoder = ReportDecoder.create(mode, joycon_type, axis_threshold, calibration, trigger_threshold=trigger_threshold)
+        self.decoder = decoder
+
+        mask_dtype = np.uint64
+        # 10-bit analog triggers: (byte offset of the low byte, [high byte][low byte] table)
+        trigger_tables = []
+        if isinstance(decoder, DInputDecoder):
+            byte_tables = [(4, _DINPUT_BYTE4_TABLE), (5, _DINPUT_BYTE5_TABLE)]
+            axis8_value_table = _table(_AXIS8_VALUE_TABLE, np.float64)
+            sticks = [
+                (AxisType.ANALOG_L_RIGHT, "8", 0, decoder.l_horizontal_table, axis8_value_table),
+                (AxisType.ANALOG_L_DOWN, "8", 1, decoder.l_vertical_table, axis8_value_table),
+                (AxisType.ANALOG_R_RIGHT, "8", 2, decoder.r_horizontal_table, axis8_value_table),
+                (AxisType.ANALOG_R_DOWN, "8", 3, decoder.r_vertical_table, axis8_value_table),
+            ]
+        elif isinstance(decoder, XInputDecoder):
+            byte_tables = [(13, _XINPUT_HAT_TABLE), (14, _XINPUT_BYTE14_TABLE), (15, _XINPUT_BYTE15_TABLE)]
+            trigger_tables = [(9, decoder.l_trigger_table), (11, decoder.r_trigger_table)]
+            sticks = [
+                (AxisType.ANALOG_L_RIGHT, "16", 1, decoder.l_horizontal_table, None),
+                (AxisType.ANALOG_L_DOWN, "16", 3, decoder.l_vertical_table, None),
+                (AxisType.ANALOG_R_RIGHT, "16", 5, decoder.r_horizontal_table, None),
+                (AxisType.ANALOG_R_DOWN, "16", 7, decoder.r_vertical_table, None),
+            ]
+        elif isinstance(decoder, JoyConLDecoder):
+            byte_tables = [(4, [mask & decoder.byte4_mask for mask in _SWITCH_BYTE4_TABLE]), (5, _SWITCH_BYTE5_TABLE)]
+            sticks = self._stick12_specs(_LEFT_STICK12,
+                [(decoder.l_horizontal_table, decoder.l_horizontal_value_table),
+                 (decoder.l_vertical_table, decoder.l_vertical_value_table)])
+        elif isinstance(decoder, JoyConRDecoder):
+            byte_tables = [(3, _SWITCH_BYTE3_TABLE), (4, [mask & decoder.byte4_mask for mask in _SWITCH_BYTE4_TABLE])]
+            sticks = self._stick12_specs(_RIGHT_STICK12,
+                [(decoder.r_horizontal_table, decoder.r_horizontal_value_table),
+                 (decoder.r_vertical_table, decoder.r_vertical_value_table)])
+        elif isinstance(decoder, SwitchProDecoder):
+            byte_tables = [(3, _SWITCH_BYTE3_TABLE), (4, _SWITCH_BYTE4_TABLE), (5, _SWITCH_BYTE5_TABLE)]
+            sticks = self._stick12_specs(_LEFT_STICK12 + _RIGHT_STICK12,
+                [(decoder.l_horizontal_table, decoder.l_horizontal_value_table),
+                 (decoder.l_vertical_table, decoder.l_vertical_value_table),
+                 (decoder.r_horizontal_table, decoder.r_horizontal_value_table),
+                 (decoder.r_vertical_table, decoder.r_vertical_value_table)])
+        else:
+            raise ValueError(f"No batch decoder for {decoder}")
+
+        # radial deadzone per stick: (index of the horizontal and the vertical entry of self.sticks,
+        # deadzone tables and centers of the scalar decoder)
+        deadzones = []
+        if getattr(decoder, "l_deadzone", None) is not None:
+            deadzones.append((0, 1, decoder.l_deadzone))
+        if getattr(decoder, "r_deadzone", None) is not None:
+            deadzones.append((len(sticks) - 2, len(sticks) - 1, decoder.r_deadzone))
+        self.deadzones = [(h_index, v_index, _table(h_table, np.float64), _table(v_table, np.float64), h_center, v_center)
+                          for (h_index, v_index, (h_table, v_table, h_center, v_center)) in deadzones]
+
+        self.byte_tables = [(index, _table(table, mask_dtype)) for (index, table) in byte_tables]
+        # NOTE: flattened, indexed by high byte << 8 | low byte
+        self.trigger_tables = [(offset, _table(table, mask_dtype).reshape(-1)) for (offset, table) in trigger_tables]
+        self.axis16_high_value_table = _table(_AXIS16_HIGH_VALUE_TABLE, np.float64)
+        self.axis16_low_value_table = _table(_AXIS16_LOW_VALUE_TABLE, np.float64)
+        self.sticks = [(axis, kind, offset, _table(mask_table, mask_dtype),
+                        _table(value_table, np.float64) if value_table is not None else None)
+                       for (axis, kind, offset, mask_table, value_table) in sticks]
+        # shortest report this decoder reads
+        stick_sizes = {"8": 1, "12h": 3, "12v": 3, "16": 2}
+        self.min_report_size = max([index + 1 for (index, _) in self.byte_tables]
+                                   + [offset + 2 for (offset, _) in self.trigger_tables]
+                                   + [offset + stick_sizes[kind] for (_, kind, offset, _, _) in self.sticks])
+
+    @staticmethod
+    def _stick12_specs(sources, tables):
+        return [(axis, kind, offset, mask_table, value_table)
+                for ((axis, kind, offset), (mask_table, value_table)) in zip(sources, tables)]
+
+    @staticmethod
+    def _unpack_stick(reports: np.ndarray, kind: str, offset: int) -> np.ndarray:
+        if kind == "8":
+            return reports[:, offset].astype(np.uint16)
+        if kind == "16":
+            return reports[:, offset].astype(np.uint16) | (reports[:, offset + 1].astype(np.uint16) << 8)
+        if kind == "12h":
+            return reports[:, offset].astype(np.uint16) | ((reports[:, offset + 1].astype(np.uint16) & 0xf) << 8)
+        return (reports[:, offset + 1].astype(np.uint16) >> 4) | (reports[:, offset + 2].astype(np.uint16) << 4)
+
+    def decode(self, reports) -> BatchDecodeResult:
+        # reports: (N, report size) uint8 array (or anything np.asarray turns into one)
+        reports = np.asarray(reports, dtype=np.uint8)
+        if reports.ndim != 2:
+            raise ValueError(f"reports must be a 2-D array (N, report size), got shape {reports.shape}")
+        if reports.shape[1] < self.min_report_size:
+            raise ValueError(f"reports must have at least {self.min_report_size} bytes, got {reports.shape[1]}")
+
+        button_masks = np.zeros(len(reports), dtype=np.uint64)
+        for (index, table) in self.byte_tables:
+            button_masks |= table[reports[:, index]]
+        for (offset, table) in self.trigger_tables:
+            button_masks |= table[(reports[:, offset + 1].astype(np.uint16) << 8) | reports[:, offset]]
+
+        stick_values: dict[AxisType, np.ndarray] = {}
+        axis_values: dict[AxisType, np.ndarray] = {}
+        columns = [self._unpack_stick(reports, kind, offset) for (_, kind, offset, _, _) in self.sticks]
+        # sticks inside the radial deadzone are decoded as if they were at the centers (raw values are kept)
+        indexes = columns.copy()
+        for (h_index, v_index, h_table, v_table, h_center, v_center) in self.deadzones:
+            inside = (h_table[columns[h_index]] + v_table[columns[v_index]]) < 1.0
+            indexes[h_index] = np.where(inside, np.uint16(h_center), columns[h_index])
+            indexes[v_index] = np.where(inside, np.uint16(v_center), columns[v_index])
+        for ((axis, kind, _, mask_table, value_table), values, index) in zip(self.sticks, columns, indexes):
+            stick_values[axis] = values
+            if kind == "16":
+                high = values >> 8
+                button_masks |= mask_table[high]
+                axis_values[axis] = self.axis16_high_value_table[high] + self.axis16_low_value_table[values & 0xff]
+                continue
+            button_masks |= mask_table[index]
+            axis_values[axis] = value_table[index]
+
+        return BatchDecodeResult(button_masks, stick_values, axis_values)
+
+    def __str__(self):
+        return f"BatchDecoder({self.mode.name}, {self.joycon_type.name}, axis_threshold={self.axis_threshold})"
+
+def load_capture_arrays(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (timestamps_ns (N,) uint64, device_indexes (N,) uint8, reports (N, report size) uint8) of a capture,
+    # read straight from the file without decoding record by record
+    with HIDCaptureReader(path) as reader:
+        record_dtype = np.dtype([
+            ('timestamp_ns', '<u8'),
+            ('length', '<u2'),
+            ('device_index', 'u1'),
+            ('pad', 'u1'),
+            ('raw', 'u1', (reader.report_size,)),
+        ])
+        records = np.fromfile(path, dtype=record_dtype, count=reader.record_count, offset=reader.data_offset)
+    return (records['timestamp_ns'].copy(), records['device_index'].copy(), records['raw'].copy())
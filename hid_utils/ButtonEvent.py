@@ -1,9 +1,11 @@
 from .ButtonType import ButtonType
 
 class ButtonEvent:
-    def __init__(self, button_type: ButtonType, state: bool):
+    def __init__(self, button_type: ButtonType, state: bool, timestamp_ns: int | None = None):
         self.button_type = button_type
         self.state = state
+        # time.monotonic_ns() when the report causing this event was read
+        self.timestamp_ns = timestamp_ns
 
     def __str__(self):
         button_type_str = f"{self.button_type}"
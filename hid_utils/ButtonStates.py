@@ -0,0 +1,35 @@
+from collections.abc import Mapping
+from .ButtonType import ButtonType
+
+BUTTON_TYPE_BY_BIT: dict[int, ButtonType] = {button_type.value: button_type for button_type in ButtonType}
+
+class ButtonStates(Mapping):
+    # read-only dict[ButtonType, bool] view over a pressed-button bitmask
+    __slots__ = ("mask",)
+
+    def __init__(self, mask: int = 0):
+        self.mask = mask
+
+    def __getitem__(self, button_type: ButtonType) -> bool:
+        if not isinstance(button_type, ButtonType):
+            raise KeyError(button_type)
+        return bool(self.mask & button_type.value)
+
+    def __contains__(self, button_type) -> bool:
+        return isinstance(button_type, ButtonType)
+
+    def __iter__(self):
+        return iter(ButtonType)
+
+    def __len__(self) -> int:
+        return len(ButtonType)
+
+    def __or__(self, other: 'ButtonStates') -> 'ButtonStates':
+        return ButtonStates(self.mask | other.mask)
+
+    def pressed(self) -> list[ButtonType]:
+        return [button_type for button_type in ButtonType if self.mask & button_type.value]
+
+    def __str__(self):
+        pressed_str = ", ".join([button_type.name for button_type in self.pressed()])
+        return f"ButtonStates({pressed_str})"
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import functools
+from .StickCalibration import StickCalibration
+print = functools.partial(print, flush=True)
+
+class CalibrationStore:
+    # stick calibration profiles per device in a small JSON file,
+    # keyed by vendor id, product id and serial number
+    # NOTE: devices without a serial number (many DINPUT pads) share the profile of their model
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.profiles: dict[str, StickCalibration] = {}
+
+    @staticmethod
+    def _key(vendor_id: int, product_id: int, serial_number: str | None) -> str:
+        return f"{vendor_id:04x}:{product_id:04x}:{serial_number or ''}"
+
+    def get(self, vendor_id: int, product_id: int, serial_number: str | None) -> StickCalibration | None:
+        return self.profiles.get(self._key(vendor_id, product_id, serial_number))
+
+    def set(self, vendor_id: int, product_id: int, serial_number: str | None, calibration: StickCalibration):
+        self.profiles[self._key(vendor_id, product_id, serial_number)] = calibration
+
+    @staticmethod
+    def load(path: str) -> 'CalibrationStore':
+        # a missing or broken file is an empty store
+        store = CalibrationStore(path)
+        if not os.path.exists(path):
+            return store
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != CalibrationStore.VERSION:
+                raise ValueError(f"unknown version {data.get('version')}")
+            for (key, profile) in data.get("profiles", {}).items():
+                store.profiles[key] = StickCalibration.from_dict(profile)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"[Warning] failed to load stick calibration {path}: {e}", file=sys.stderr)
+            store.profiles = {}
+        return store
+
+    def save(self):
+        data = {
+            "version": self.VERSION,
+            "profiles": {key: calibration.to_dict() for (key, calibration) in self.profiles.items()},
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def __str__(self):
+        return f"CalibrationStore({self.path}, profiles={len(self.profiles)})"
@@ -0,0 +1,30 @@
+from .ButtonStates import ButtonStates
+from .AxisValues import AxisValues, AXIS_CENTER, AXIS_COUNT
+
+class DeviceState:
+    # buttons and axes of one device, updated in place by its decoder:
+    # pressed buttons as OR of ButtonType values, axis values indexed by AxisType.value
+    __slots__ = ("button_mask", "axis_values")
+
+    def __init__(self, button_mask: int = 0, axis_values: list[float] | None = None):
+        self.button_mask = button_mask
+        self.axis_values = axis_values if axis_values is not None else [AXIS_CENTER] * AXIS_COUNT
+
+    def snapshot(self) -> 'DeviceState':
+        # NOTE: the mask is an int, so this copies just AXIS_COUNT floats
+        return DeviceState(self.button_mask, self.axis_values.copy())
+
+    def reset(self):
+        # no buttons pressed, sticks at the center
+        self.button_mask = 0
+        self.axis_values[:] = [AXIS_CENTER] * AXIS_COUNT
+
+    def get_states(self) -> ButtonStates:
+        return ButtonStates(self.button_mask)
+
+    def get_axis_values(self, axis_types: tuple = (), axis_mask: int | None = None) -> AxisValues:
+        # live view of the given axes
+        return AxisValues(self.axis_values, axis_types, axis_mask)
+
+    def __str__(self):
+        return f"DeviceState({ButtonStates(self.button_mask)}, {self.axis_values})"
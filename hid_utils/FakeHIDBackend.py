@@ -0,0 +1,191 @@
+import sys
+import time
+import itertools
+from collections import deque
+from typing import Callable, Iterator
+from .HIDBackend import HIDBackend
+from .DeviceMode import DeviceMode
+from .JoyConType import JoyConType
+from .HIDCapture import HIDCaptureReader
+from .SyntheticReports import SyntheticReports
+import functools
+print = functools.partial(print, flush=True)
+
+# a report source is an endless iterator of (interval_ns since the previous report, raw)
+ReportSource = Iterator[tuple[int, list[int]]]
+
+class FakeHIDDevice:
+    # device handle with hidapi read semantics, fed by a report source on a wall clock schedule.
+    # due reports wait in a backlog like the hidraw buffer; when it is full, new reports are dropped
+    def __init__(self, source: ReportSource, backlog_size: int = 64):
+        self.source = source
+        self.backlog: deque[list[int]] = deque()
+        self.backlog_size = backlog_size
+        self.nonblocking = False
+        # unplugged by FakeHIDBackend.set_connected(), reads fail like hidapi on a removed device
+        self.unplugged = False
+        self.report_count = 0
+        self.dropped_count = 0
+        (interval_ns, self._next_raw) = next(self.source)
+        self._next_due_ns = time.monotonic_ns() + interval_ns
+
+    def _pump(self, now_ns: int):
+        while self._next_due_ns <= now_ns:
+            self.report_count += 1
+            if len(self.backlog) < self.backlog_size:
+                self.backlog.append(self._next_raw)
+            else:
+                self.dropped_count += 1
+            (interval_ns, self._next_raw) = next(self.source)
+            self._next_due_ns += interval_ns
+
+    def set_nonblocking(self, nonblocking) -> int:
+        self.nonblocking = bool(nonblocking)
+        return 0
+
+    def read(self, max_length: int, timeout_ms: int = 0) -> list[int]:
+        if self.source is None:
+            raise ValueError("not open")
+        if self.unplugged:
+            raise OSError("read error")
+        now_ns = time.monotonic_ns()
+        self._pump(now_ns)
+
+        # NOTE: like hidapi, a positive timeout waits even on a nonblocking device,
+        #       otherwise a blocking device waits until a report arrives
+        if not self.backlog and (timeout_ms > 0 or not self.nonblocking):
+            wake_ns = self._next_due_ns
+            if timeout_ms > 0:
+                wake_ns = min(wake_ns, now_ns + timeout_ms * 1_000_000)
+            if wake_ns > now_ns:
+                time.sleep((wake_ns - now_ns) / 1e9)
+            self._pump(time.monotonic_ns())
+
+        if not self.backlog:
+            return []
+        return self.backlog.popleft()[:max_length]
+
+    def close(self):
+        self.source = None
+        self.backlog.clear()
+
+    def __str__(self):
+        return f"FakeHIDDevice(reports={self.report_count}, dropped={self.dropped_count}, backlog={len(self.backlog)})"
+
+class FakeHIDBackend(HIDBackend):
+    # hardware-free devices serving synthetic or captured reports at a given rate
+    def __init__(self, backlog_size: int = 64):
+        self.backlog_size = backlog_size
+        # (vendor_id, product_id) -> (product_string, source factory)
+        self._devices: dict[tuple[int, int], tuple[str, Callable[[], ReportSource]]] = {}
+        self.opened_devices: list[FakeHIDDevice] = []
+        # (vendor_id, product_id) of unplugged devices, hidden from enumerate() and open()
+        self._unplugged: set[tuple[int, int]] = set()
+        self._opened_keys: list[tuple[int, int]] = []
+
+    def add_device(self, vendor_id: int, product_id: int, product_string: str, source_factory: Callable[[], ReportSource]):
+        self._devices[(vendor_id, product_id)] = (product_string, source_factory)
+
+    def set_connected(self, vendor_id: int, product_id: int, connected: bool):
+        # simulates unplugging (or a lost Bluetooth link) and plugging back in
+        key = (vendor_id, product_id)
+        if connected:
+            self._unplugged.discard(key)
+        else:
+            self._unplugged.add(key)
+            for (device_key, device) in zip(self._opened_keys, self.opened_devices):
+                if device_key == key:
+                    device.unplugged = True
+
+    def enumerate(self) -> list[dict]:
+        return [{
+            'path': f"fake:{vendor_id:04x}:{product_id:04x}".encode(),
+            'vendor_id': vendor_id,
+            'product_id': product_id,
+            'serial_number': f"fake-{index}",
+            'release_number': 0,
+            'manufacturer_string': "Fake",
+            'product_string': product_string,
+            'usage_page': 0,
+            'usage': 0,
+            'interface_number': -1,
+        } for (index, ((vendor_id, product_id), (product_string, _))) in enumerate(self._devices.items())
+          if (vendor_id, product_id) not in self._unplugged]
+
+    def open(self, vendor_id: int, product_id: int) -> FakeHIDDevice:
+        if (vendor_id, product_id) not in self._devices or (vendor_id, product_id) in self._unplugged:
+            # NOTE: same error as hidapi
+            raise OSError("open failed")
+        (_, source_factory) = self._devices[(vendor_id, product_id)]
+        device = FakeHIDDevice(source_factory(), self.backlog_size)
+        self.opened_devices.append(device)
+        self._opened_keys.append((vendor_id, product_id))
+        return device
+
+    def get_dropped_count(self) -> int:
+        return sum(device.dropped_count for device in self.opened_devices)
+
+    def add_synthetic(self, mode: DeviceMode, rate_hz: float = 125.0,
+            vendor_id: int = 0x046d, product_id: int = 0xc216, seed: int = 0):
+        # vendor_id and product_id are used on DINPUT, Nintendo ids otherwise
+        if rate_hz <= 0:
+            raise ValueError(f"rate_hz must be positive: {rate_hz}")
+        interval_ns = int(1e9 / rate_hz)
+        if mode == DeviceMode.JOYCON:
+            devices = [(0x057e, 0x2006, JoyConType.L, "Fake Joy-Con (L)"), (0x057e, 0x2007, JoyConType.R, "Fake Joy-Con (R)")]
+        elif mode == DeviceMode.SWITCH_PRO:
+            devices = [(0x057e, 0x2009, JoyConType.NONE, "Fake Pro Controller")]
+        else:
+            devices = [(vendor_id, product_id, JoyConType.NONE, f"Fake {mode.name} Gamepad")]
+
+        for (index, (_vendor_id, _product_id, joycon_type, product_string)) in enumerate(devices):
+            # check the mode now, not on open
+            SyntheticReports(mode, joycon_type)
+            self.add_device(_vendor_id, _product_id, product_string,
+                            lambda joycon_type=joycon_type, seed=seed + index:
+                                ((interval_ns, raw) for raw in SyntheticReports(mode, joycon_type, seed=seed)))
+
+    @staticmethod
+    def from_synthetic(mode: DeviceMode, rate_hz: float = 125.0,
+            vendor_id: int = 0x046d, product_id: int = 0xc216, seed: int = 0) -> 'FakeHIDBackend':
+        backend = FakeHIDBackend()
+        backend.add_synthetic(mode, rate_hz=rate_hz, vendor_id=vendor_id, product_id=product_id, seed=seed)
+        return backend
+
+    @staticmethod
+    def from_capture(path: str, rate_hz: float | None = None) -> 'FakeHIDBackend':
+        # loops the capture of each device. without rate_hz the recorded intervals are replayed
+        if rate_hz is not None and rate_hz <= 0:
+            raise ValueError(f"rate_hz must be positive: {rate_hz}")
+        with HIDCaptureReader(path) as reader:
+            # NOTE: copied out in a comprehension, so no view into the mmap outlives the reader
+            records: list[list[tuple[int, list[int]]]] = [
+                [(timestamp_ns, list(raw)) for (timestamp_ns, _device_index, raw) in reader if _device_index == device_index]
+                for device_index in range(len(reader.devices))]
+            devices = reader.devices
+            mode = reader.mode
+
+        backend = FakeHIDBackend()
+        for ((vendor_id, product_id, joycon_type), device_records) in zip(devices, records):
+            if not device_records:
+                print(f"[Warning] no reports for 0x{vendor_id:04x}:0x{product_id:04x} in {path}", file=sys.stderr)
+                continue
+            timestamps = [timestamp_ns for (timestamp_ns, _) in device_records]
+            if rate_hz is not None or len(timestamps) < 2:
+                intervals = [int(1e9 / (rate_hz or 125.0))] * len(timestamps)
+            else:
+                # NOTE: the first report follows the last one by the mean interval when looping
+                mean_ns = (timestamps[-1] - timestamps[0]) // (len(timestamps) - 1)
+                intervals = [mean_ns] + [b - a for (a, b) in zip(timestamps, timestamps[1:])]
+            reports = [(interval_ns, raw) for (interval_ns, (_, raw)) in zip(intervals, device_records)]
+            name = mode.name if joycon_type == JoyConType.NONE else f"{mode.name} {joycon_type.name}"
+            backend.add_device(vendor_id, product_id, f"Fake {name} ({len(reports)} reports)",
+                               lambda reports=reports: itertools.cycle(reports))
+        return backend
+
+    def __str__(self):
+        return (f"FakeHIDBackend(devices={len(self._devices)}, opened={len(self.opened_devices)}, "
+                f"dropped={self.get_dropped_count()})")
+
+if __name__ == "__main__":
+    print("[Error] this file is a module", file=sys.stderr)
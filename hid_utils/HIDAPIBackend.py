@@ -0,0 +1,19 @@
+from .HIDBackend import HIDBackend
+
+class HIDAPIBackend(HIDBackend):
+    # real devices through hidapi
+    def __init__(self):
+        # NOTE: imported here, so fake backends run without hidapi installed
+        import hid
+        self.hid = hid
+
+    def enumerate(self) -> list[dict]:
+        return self.hid.enumerate()
+
+    def open(self, vendor_id: int, product_id: int):
+        device = self.hid.device()
+        device.open(vendor_id, product_id)
+        return device
+
+    def __str__(self):
+        return "HIDAPIBackend()"
@@ -0,0 +1,26 @@
+class HIDBackend:
+    # source of HID devices, with the same shape as the hid (hidapi) module:
+    #
+    #   enumerate() -> list of dicts with vendor_id, product_id, product_string, ...
+    #   open(vendor_id, product_id) -> handle with read(size[, timeout_ms]), set_nonblocking(bool), close()
+
+    def enumerate(self) -> list[dict]:
+        raise NotImplementedError()
+
+    def open(self, vendor_id: int, product_id: int):
+        raise NotImplementedError()
+
+    @staticmethod
+    def get_singleton() -> 'HIDBackend':
+        global hidBackend
+        if hidBackend is None:
+            from .HIDAPIBackend import HIDAPIBackend
+            hidBackend = HIDAPIBackend()
+        return hidBackend
+
+    @staticmethod
+    def set_singleton(instance):
+        global hidBackend
+        hidBackend = instance
+
+hidBackend = None
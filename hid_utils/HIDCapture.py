@@ -0,0 +1,160 @@
+import mmap
+import time
+import struct
+from .DeviceMode import DeviceMode
+from .JoyConType import JoyConType
+
+# NOTE:
+#
+# binary capture of raw HID reports (little endian)
+#
+#   header:  magic "GPHIDCAP", version, DeviceMode, device count, report size
+#   devices: (vendor id, product id, JoyConType) per device, in device index order
+#   records: (monotonic ns timestamp, report length, device index, report bytes padded to report size)
+#
+# every record has the same size, so the reader can index records directly.
+# a record cut short by a crash or a kill is ignored.
+
+MAGIC = b"GPHIDCAP"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHBBH")
+_DEVICE = struct.Struct("<HHBx")
+_RECORD = struct.Struct("<QHBx")
+
+class HIDCaptureWriter:
+    def __init__(self, path: str,
+            devices: list[tuple[int, int, JoyConType]],
+            mode: DeviceMode = DeviceMode.DINPUT,
+            report_size: int = 64):
+        # devices: (vendor_id, product_id, joycon_type), the index is the device_index of write()
+        if not devices or len(devices) > 255:
+            raise ValueError(f"Invalid number of capture devices: {len(devices)}")
+        if report_size <= 0 or report_size > 0xffff:
+            raise ValueError(f"Invalid capture report size: {report_size}")
+
+        self.path = path
+        self.devices = devices
+        self.mode = mode
+        self.report_size = report_size
+        self.record_count = 0
+        self._record = bytearray(_RECORD.size + report_size)
+
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(MAGIC, VERSION, mode.value, len(devices), report_size))
+        for (vendor_id, product_id, joycon_type) in devices:
+            self.file.write(_DEVICE.pack(vendor_id, product_id, joycon_type.value))
+
+    def write(self, raw, timestamp_ns: int | None = None, device_index: int = 0):
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        length = min(len(raw), self.report_size)
+
+        # NOTE: one preallocated record buffer, the padding of a shorter report is zeroed
+        record = self._record
+        _RECORD.pack_into(record, 0, timestamp_ns, length, device_index)
+        record[_RECORD.size:_RECORD.size + length] = bytes(raw[:length])
+        if length < self.report_size:
+            record[_RECORD.size + length:] = bytes(self.report_size - length)
+        self.file.write(record)
+        self.record_count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        return f"HIDCaptureWriter({self.path}, {self.mode.name}, records={self.record_count})"
+
+class HIDCaptureReader:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+
+        try:
+            if len(self.mmap) < _HEADER.size:
+                raise ValueError(f"Not a HID capture file: {path}")
+            (magic, version, mode, device_count, report_size) = _HEADER.unpack_from(self.mmap, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not a HID capture file: {path}")
+            if version != VERSION:
+                raise ValueError(f"Unsupported HID capture version: {version}")
+
+            self.mode = DeviceMode(mode)
+            self.report_size = report_size
+            self.devices: list[tuple[int, int, JoyConType]] = []
+            offset = _HEADER.size
+            for _ in range(device_count):
+                (vendor_id, product_id, joycon_type) = _DEVICE.unpack_from(self.mmap, offset)
+                self.devices.append((vendor_id, product_id, JoyConType(joycon_type)))
+                offset += _DEVICE.size
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+        self.data_offset = offset
+        self.record_size = _RECORD.size + report_size
+        self.record_count = (len(self.mmap) - offset) // self.record_size
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def get_record(self, index: int) -> tuple[int, int, memoryview]:
+        # (timestamp_ns, device_index, raw)
+        if index < 0:
+            index += self.record_count
+        if index < 0 or index >= self.record_count:
+            raise IndexError(f"HID capture record out of range: {index}")
+        offset = self.data_offset + index * self.record_size
+        (timestamp_ns, length, device_index) = _RECORD.unpack_from(self.mmap, offset)
+        start = offset + _RECORD.size
+        return (timestamp_ns, device_index, self.view[start:start + length])
+
+    def __iter__(self):
+        # NOTE: raw is a memoryview into the mapped file (no copy, indexing gives ints like a report list).
+        #       copy it (bytes(raw) / list(raw)) to keep it after the reader is closed
+        mm = self.mmap
+        view = self.view
+        unpack_from = _RECORD.unpack_from
+        header_size = _RECORD.size
+        end = self.data_offset + self.record_count * self.record_size
+        for offset in range(self.data_offset, end, self.record_size):
+            (timestamp_ns, length, device_index) = unpack_from(mm, offset)
+            start = offset + header_size
+            yield (timestamp_ns, device_index, view[start:start + length])
+
+    def get_duration_sec(self) -> float:
+        if self.record_count < 2:
+            return 0.0
+        return (self.get_record(-1)[0] - self.get_record(0)[0]) / 1e9
+
+    def close(self):
+        if self.mmap is None:
+            return
+        # NOTE: fails with BufferError while record views are still referenced
+        self.view.release()
+        self.mmap.close()
+        self.mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        devices = ", ".join(f"0x{v:04x}:0x{p:04x}" for (v, p, _) in self.devices)
+        return f"HIDCaptureReader({self.path}, {self.mode.name}, [{devices}], records={self.record_count})"
@@ -1,467 +1,272 @@
-import hid
 import sys
+import time
+import threading
 from .DeviceMode import DeviceMode
 from .ButtonEvent import ButtonEvent
 from .ButtonType import ButtonType
 from .JoyConType import JoyConType
 from .AxisType import AxisType
+from .HIDReport import HIDReport
+from .HIDBackend import HIDBackend
+from .ReportDecoder import ReportDecoder
+from .StickCalibration import StickCalibration
+from .AxisHysteresis import AxisHysteresis
+from .ButtonStates import ButtonStates, BUTTON_TYPE_BY_BIT
+from .AxisValues import AxisValues
+from .DeviceState import DeviceState
 import functools
 print = functools.partial(print, flush=True)
 
 class HIDDevice:
-    button_state_dict: dict[ButtonType, bool] = {}
-    axis_dict: dict[AxisType, float] = {}
-
     def __init__(self, vendor_id, product_id,
                  mode=DeviceMode.DINPUT,
                  joycon_type=JoyConType.NONE,
-                 axis_threshold=0.1, nonblocking=True):
+                 axis_threshold=0.1, nonblocking=True,
+                 serial_number: str | None = None,
+                 calibration: StickCalibration | None = None,
+                 hysteresis: AxisHysteresis | None = None,
+                 trigger_threshold: float = 0.5):
         self.vendor_id = vendor_id
         self.product_id = product_id
         self.mode = mode
         self.axis_threshold = axis_threshold
         self.joycon_type = joycon_type
         self.nonblocking = nonblocking
-        self.device = hid.device()
-        self.device.open(self.vendor_id, self.product_id)
-        self.device.set_nonblocking(self.nonblocking)
-
-    def read_raw(self, size=64):
-        return self.device.read(size)
-    
-    def _get_nbit(self, raw, offset_byte, offset_bit, nbit):
-        byte = raw[offset_byte]
-        return (byte >> offset_bit) & ((1 << nbit) - 1)
-    
-    def _read_states_dinput(self, raw: list[int]) -> list[ButtonEvent]:
-        events: list[ButtonEvent] = []
-        states: dict[ButtonType, bool] = {}
-
-        # NOTE: raw[0] is ANALOG L left-right axis, left is 0x00, right is 0xff, center is 0x80
-        # check using axis_threshold (percentage)
-        states[ButtonType.ANALOG_L_LEFT] = bool(raw[0] < 0x80 - 0x80 * self.axis_threshold)
-        states[ButtonType.ANALOG_L_RIGHT] = bool(raw[0] > 0x80 + 0x80 * self.axis_threshold)
-
-        # NOTE: raw[1] is ANALOG L up-down axis, up is 0x00, down is 0xff, center is 0x80
-        states[ButtonType.ANALOG_L_UP] = bool(raw[1] < 0x80 - 0x80 * self.axis_threshold)
-        states[ButtonType.ANALOG_L_DOWN] = bool(raw[1] > 0x80 + 0x80 * self.axis_threshold)
-
-        # NOTE: raw[2] is ANALOG R left-right axis, left is 0x00, right is 0xff, center is 0x80
-        states[ButtonType.ANALOG_R_LEFT] = bool(raw[2] < 0x80 - 0x80 * self.axis_threshold)
-        states[ButtonType.ANALOG_R_RIGHT] = bool(raw[2] > 0x80 + 0x80 * self.axis_threshold)
-
-        # NOTE: raw[3] is ANALOG R up-down axis, up is 0x00, down is 0xff, center is 0x80
-        states[ButtonType.ANALOG_R_UP] = bool(raw[3] < 0x80 - 0x80 * self.axis_threshold)
-        states[ButtonType.ANALOG_R_DOWN] = bool(raw[3] > 0x80 + 0x80 * self.axis_threshold)
-
-        self.axis_dict[AxisType.ANALOG_L_RIGHT] = raw[0] / 0xff
-        self.axis_dict[AxisType.ANALOG_L_DOWN] = raw[1] / 0xff
-        self.axis_dict[AxisType.ANALOG_R_RIGHT] = raw[2] / 0xff
-        self.axis_dict[AxisType.ANALOG_R_DOWN] = raw[3] / 0xff
-
-        # NOTE
-        # raw[4] default value is 0x8
-        # raw[4] 0 means UP
-        # raw[4] 2 means RIGHT
-        # raw[4] 4 means DOWN
-        # raw[4] 6 means LEFT
-        # raw[4] 1 means UP_RIGHT
-        # raw[4] 3 means DOWN_RIGHT
-        # raw[4] 5 means DOWN_LEFT
-        # raw[4] 7 means UP_LEFT
-        # raw[4] 24 means Y
-        # raw[4] 40 means B
-        # raw[4] 72 means A
-        # raw[4] 136 means X
-        # other combinations exists (ex: 200 means X + A, 70 means LEFT + A)
-
-        arrow_bit = raw[4] & 0xf
-        abxy_bit = raw[4] & 0xf0
-
-        # print(f"abxy_bit: {abxy_bit}")
-        # print(f"arrow_bit: {arrow_bit}")
-
-        ## print raw[4] as binary
-        # print(f"raw[4]: {raw[4]:08b}")
-
-        states[ButtonType.Y] = bool(abxy_bit & 0x10)
-        states[ButtonType.B] = bool(abxy_bit & 0x20)
-        states[ButtonType.A] = bool(abxy_bit & 0x40)
-        states[ButtonType.X] = bool(abxy_bit & 0x80)
-
-        states[ButtonType.UP] = bool(arrow_bit == 0x00 or arrow_bit == 0x01 or arrow_bit == 0x07)
-        states[ButtonType.RIGHT] = bool(arrow_bit == 0x01 or arrow_bit == 0x02 or arrow_bit == 0x03)
-        states[ButtonType.DOWN] = bool(arrow_bit == 0x03 or arrow_bit == 0x04 or arrow_bit == 0x05)
-        states[ButtonType.LEFT] = bool(arrow_bit == 0x05 or arrow_bit == 0x06 or arrow_bit == 0x07)
-
-
-        states[ButtonType.L] = bool(raw[5] & 0x1)
-        states[ButtonType.R] = bool(raw[5] & 0x2)
-        states[ButtonType.ZL] = bool(raw[5] & 0x4)
-        states[ButtonType.ZR] = bool(raw[5] & 0x8)
-        states[ButtonType.ANALOG_L_PRESS] = bool(raw[5] & 0x40)
-        states[ButtonType.ANALOG_R_PRESS] = bool(raw[5] & 0x80)
+        # NOTE: stick calibration profiles are stored per serial number (see CalibrationStore)
+        self.serial_number = serial_number
+        self.hysteresis = hysteresis
+        # XINPUT analog triggers press ZL / ZR past this
+        self.trigger_threshold = trigger_threshold
+        self.decoder = ReportDecoder.create(mode, joycon_type, axis_threshold, calibration, hysteresis, trigger_threshold)
+        # NOTE: per device, so two Joy-Cons never share a state
+        self.state = DeviceState()
+        # live view of the axes this device reports
+        self.axis_values = self.state.get_axis_values(tuple(self.decoder.axis_types))
+        # time.monotonic_ns() of the last report read, and of the end of its decoding
+        self.last_read_ns = 0
+        self.last_decoded_ns = 0
+        # NOTE: a lost device (read error, or HIDDeviceMonitor saw it removed) reads nothing
+        #       until reopen(). its held buttons come out of the next read as release events
+        self.connected = True
+        self.opened_ns = time.monotonic_ns()
+        self.disconnected_ns = 0
+        self.reconnect_count = 0
+        self.last_reconnect_sec = 0.0
+        self._released_events: list[ButtonEvent] = []
+        self._lock = threading.Lock()
+        self.device = self._open()
+
+    def _open(self):
+        device = HIDBackend.get_singleton().open(self.vendor_id, self.product_id)
+        device.set_nonblocking(self.nonblocking)
+        return device
+
+    def _close_handle(self):
+        device = self.device
+        self.device = None
+        if device is not None:
+            try:
+                device.close()
+            except (OSError, ValueError):
+                pass
+
+    def mark_disconnected(self, reason: str = ""):
+        # may be called from any thread, the handle is closed by the reading thread
+        with self._lock:
+            if not self.connected:
+                return
+            self.connected = False
+            self.disconnected_ns = time.monotonic_ns()
+            timestamp_ns = self.disconnected_ns
+            changed = self.state.button_mask
+            while changed:
+                bit = changed & -changed
+                self._released_events.append(ButtonEvent(BUTTON_TYPE_BY_BIT[bit], False, timestamp_ns))
+                changed ^= bit
+            # sticks back to the center too, so nothing keeps moving
+            self.state.reset()
+            self.decoder.reset()
+        print(f"[Warning] device lost: {self.get_name()}" + (f" ({reason})" if reason else ""), file=sys.stderr)
+
+    def reopen(self) -> bool:
+        with self._lock:
+            if self.connected:
+                return True
+            if self.device is not None:
+                # the reading thread still holds the old handle
+                return False
+            try:
+                self.device = self._open()
+            except (OSError, ValueError):
+                return False
+            now_ns = time.monotonic_ns()
+            self.opened_ns = now_ns
+            self.last_reconnect_sec = (now_ns - self.disconnected_ns) / 1e9
+            self.reconnect_count += 1
+            self.connected = True
+        print(f"[Info] device reconnected: {self.get_name()} after {self.last_reconnect_sec:.2f} sec", file=sys.stderr)
+        return True
+
+    def read_raw(self, size=64, timeout_ms=None):
+        if not self.connected:
+            self._close_handle()
+            # NOTE: wait like a read that timed out, so blocking read loops do not spin
+            if not self.nonblocking:
+                time.sleep((timeout_ms if timeout_ms else 100) / 1000)
+            return []
+        try:
+            # NOTE: timeout_ms is only meaningful for a blocking device,
+            #       hidapi treats timeout_ms <= 0 as a plain read
+            if timeout_ms is None:
+                return self.device.read(size)
+            return self.device.read(size, timeout_ms)
+        except (OSError, ValueError) as e:
+            # hidapi raises OSError("read error") once the device is gone
+            self.mark_disconnected(str(e))
+            self._close_handle()
+            return []
 
-        states[ButtonType.SELECT] = bool(raw[5] & 0x10)
-        states[ButtonType.START] = bool(raw[5] & 0x20)
+    def set_calibration(self, calibration: StickCalibration | None):
+        # compiled into new decoder tables, applied from the next report on
+        decoder = ReportDecoder.create(self.mode, self.joycon_type, self.axis_threshold, calibration,
+                                       self.hysteresis, self.trigger_threshold)
+        with self._lock:
+            self.decoder = decoder
 
-        for button_type in states.keys():
-            if not button_type in self.button_state_dict:
-                if states[button_type] == True:
-                    events.append(ButtonEvent(button_type, states[button_type]))
-                    self.button_state_dict[button_type] = states[button_type]
-            elif states[button_type] != self.button_state_dict[button_type]:
-                events.append(ButtonEvent(button_type, states[button_type]))
-                self.button_state_dict[button_type] = states[button_type]
+    def get_calibration(self) -> StickCalibration:
+        return self.decoder.calibration
 
+    def _take_released_events(self) -> list[ButtonEvent]:
+        with self._lock:
+            events = self._released_events
+            self._released_events = []
         return events
-
     
-    def _read_states_xinput(self, raw: list[int]) -> list[ButtonEvent]:
-        raise NotImplementedError("XInput is not implemented now for HIDDevice.")
-    
-    def _read_states_joycon_l(self, raw: list[int]) -> list[ButtonEvent]:
+    def _read_states(self, raw: list[int], timestamp_ns: int | None = None) -> list[ButtonEvent]:
         events: list[ButtonEvent] = []
-        states: dict[ButtonType, bool] = {}
-
-        # raw[4] is button
-        # 0: nothing pressed
-        # 1: MINUS pressed
-        # 8: ANALOG_L pressed
-        # 32: CAPTURE pressed (ignore)
-
-        states[ButtonType.SELECT] = bool(raw[4] & 0x1)
-        states[ButtonType.ANALOG_L_PRESS] = bool(raw[4] & 0x8)
-
-        # raw[5] is button
-        # 0: nothing pressed
-        # 1: DOWN pressed
-        # 2: UP pressed
-        # 4: RIGHT pressed
-        # 8: LEFT pressed
-        # 16: SR pressed (ignore)
-        # 32: SL pressed (ignore)
-        # 64: L pressed
-        # 128: ZL pressed
-
-        states[ButtonType.DOWN] = bool(raw[5] & 0x1)
-        states[ButtonType.UP] = bool(raw[5] & 0x2)
-        states[ButtonType.RIGHT] = bool(raw[5] & 0x4)
-        states[ButtonType.LEFT] = bool(raw[5] & 0x8)
-        states[ButtonType.L] = bool(raw[5] & 0x40)
-        states[ButtonType.ZL] = bool(raw[5] & 0x80)
-
-        left_horizontal = self._get_nbit(raw, 6, 0, 8) | (self._get_nbit(raw, 7, 0, 4) << 8)
-        left_vertical = self._get_nbit(raw, 7, 4, 4) | (self._get_nbit(raw, 8, 0, 8) << 4)
-
-        # print
-        # print(f"left_horizontal: {left_horizontal}")
-        # print(f"left_vertical: {left_vertical}")
-
-        left_horizontal_max = 3329
-        left_horizontal_min = 640
-        left_horizontal_center = 1946
-        left_vertical_max = 3389
-        left_vertical_min = 1133
-        left_vertical_center = 2172
-
-        up_rate = (left_vertical - left_vertical_center) / (left_vertical_max - left_vertical_center)
-        down_rate = (left_vertical_center - left_vertical) / (left_vertical_center - left_vertical_min)
-        states[ButtonType.ANALOG_L_UP] = bool(up_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_L_DOWN] = bool(down_rate > self.axis_threshold)
-
-        left_rate = (left_horizontal_center - left_horizontal) / (left_horizontal_center - left_horizontal_min)
-        right_rate = (left_horizontal - left_horizontal_center) / (left_horizontal_max - left_horizontal_center)
-        states[ButtonType.ANALOG_L_LEFT] = bool(left_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_L_RIGHT] = bool(right_rate > self.axis_threshold)
-
-        # clip each rates to 0.0 ~ 1.0 (ignore negative values)
-        up_rate_clip = min(max(up_rate, 0.0), 1.0)
-        down_rate_clip = min(max(down_rate, 0.0), 1.0)
-        left_rate_clip = min(max(left_rate, 0.0), 1.0)
-        right_rate_clip = min(max(right_rate, 0.0), 1.0)
-        self.axis_dict[AxisType.ANALOG_L_DOWN] = (down_rate_clip - up_rate_clip) / 2.0 + 0.5
-        self.axis_dict[AxisType.ANALOG_L_RIGHT] = (right_rate_clip - left_rate_clip) / 2.0 + 0.5
-
-        # print rates
-        # print(f"up_rate: {up_rate}")
-        # print(f"down_rate: {down_rate}")
+        state = self.state
+        decoder = self.decoder
+        if decoder.hysteresis is not None:
+            # the dwell time runs on the read time
+            mask = decoder.decode(raw, state.axis_values, timestamp_ns)
+        else:
+            mask = decoder.decode(raw, state.axis_values)
 
-        for button_type in states.keys():
-            if not button_type in self.button_state_dict:
-                if states[button_type] == True:
-                    events.append(ButtonEvent(button_type, states[button_type]))
-                    self.button_state_dict[button_type] = states[button_type]
-            elif states[button_type] != self.button_state_dict[button_type]:
-                events.append(ButtonEvent(button_type, states[button_type]))
-                self.button_state_dict[button_type] = states[button_type]
+        # walk only the bits that changed since the last report
+        changed = state.button_mask ^ mask
+        while changed:
+            bit = changed & -changed
+            events.append(ButtonEvent(BUTTON_TYPE_BY_BIT[bit], bool(mask & bit), timestamp_ns))
+            changed ^= bit
+        state.button_mask = mask
 
         return events
 
-    def _read_states_joycon_r(self, raw: list[int]) -> list[ButtonEvent]:
-        events: list[ButtonEvent] = []
-        states: dict[ButtonType, bool] = {}
-
-        # raw[3] is button
-        # 0: nothing pressed
-        # 1: Y pressed
-        # 2: X pressed
-        # 4: B pressed
-        # 8: A pressed
-        # 16: SR pressed (ignore)
-        # 32: SL pressed (ignore)
-        # 64: R pressed
-        # 128: ZR pressed
-
-        states[ButtonType.Y] = bool(raw[3] & 0x1)
-        states[ButtonType.X] = bool(raw[3] & 0x2)
-        states[ButtonType.B] = bool(raw[3] & 0x4)
-        states[ButtonType.A] = bool(raw[3] & 0x8)
-        states[ButtonType.R] = bool(raw[3] & 0x40)
-        states[ButtonType.ZR] = bool(raw[3] & 0x80)
-
-        # raw[4] is button
-        # 0: nothing pressed
-        # 2: PLUS pressed
-        # 4: ANALOG_R pressed
-        # 16: HOME pressed (ignore)
-
-        states[ButtonType.START] = bool(raw[4] & 0x2)
-        states[ButtonType.ANALOG_R_PRESS] = bool(raw[4] & 0x4)
-
-        right_horizontal = self._get_nbit(raw, 9, 0, 8) | (self._get_nbit(raw, 10, 0, 4) << 8)
-        right_vertical = self._get_nbit(raw, 10, 4, 4) | (self._get_nbit(raw, 11, 0, 8) << 4)
-
-        # print
-        # print(f"right_horizontal: {right_horizontal}")
-        # print(f"right_vertical: {right_vertical}")
-
-        right_horizontal_max = 3409
-        right_horizontal_min = 838
-        right_horizontal_center = 2100
-        right_vertical_max = 2869
-        right_vertical_min = 569
-        right_vertical_center = 1805
-
-        up_rate = (right_vertical - right_vertical_center) / (right_vertical_max - right_vertical_center)
-        down_rate = (right_vertical_center - right_vertical) / (right_vertical_center - right_vertical_min)
-        states[ButtonType.ANALOG_R_UP] = bool(up_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_R_DOWN] = bool(down_rate > self.axis_threshold)
-
-        left_rate = (right_horizontal_center - right_horizontal) / (right_horizontal_center - right_horizontal_min)
-        right_rate = (right_horizontal - right_horizontal_center) / (right_horizontal_max - right_horizontal_center)
-        states[ButtonType.ANALOG_R_LEFT] = bool(left_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_R_RIGHT] = bool(right_rate > self.axis_threshold)
-
-        # clip each rates to 0.0 ~ 1.0 (ignore negative values)
-        up_rate_clip = min(max(up_rate, 0.0), 1.0)
-        down_rate_clip = min(max(down_rate, 0.0), 1.0)
-        left_rate_clip = min(max(left_rate, 0.0), 1.0)
-        right_rate_clip = min(max(right_rate, 0.0), 1.0)
-        self.axis_dict[AxisType.ANALOG_R_DOWN] = (down_rate_clip - up_rate_clip) / 2.0 + 0.5
-        self.axis_dict[AxisType.ANALOG_R_RIGHT] = (right_rate_clip - left_rate_clip) / 2.0 + 0.5
-        
-        # print rates
-        # print(f"up_rate: {up_rate}")
-        # print(f"down_rate: {down_rate}")
-        # print(f"left_rate: {left_rate}")
-        # print(f"right_rate: {right_rate}")
-
-        for button_type in states.keys():
-            if not button_type in self.button_state_dict:
-                if states[button_type] == True:
-                    events.append(ButtonEvent(button_type, states[button_type]))
-                    self.button_state_dict[button_type] = states[button_type]
-            elif states[button_type] != self.button_state_dict[button_type]:
-                events.append(ButtonEvent(button_type, states[button_type]))
-                self.button_state_dict[button_type] = states[button_type]
-
+    def _decode(self, raw: list[int]) -> list[ButtonEvent]:
+        # events are stamped with the read time, so out events can be traced back to the report
+        timestamp_ns = time.monotonic_ns()
+        with self._lock:
+            if not self.connected:
+                # read just before the device was marked lost, its buttons are already released
+                return []
+            events = self._read_states(raw, timestamp_ns)
+        self.last_read_ns = timestamp_ns
+        self.last_decoded_ns = time.monotonic_ns()
         return events
-    
-    def _read_states_joycon(self, raw: list[int]) -> list[ButtonEvent]:
-        if self.joycon_type == JoyConType.L:
-            return self._read_states_joycon_l(raw)
-        elif self.joycon_type == JoyConType.R:
-            return self._read_states_joycon_r(raw)
-        elif self.joycon_type == JoyConType.NONE:
-            raise RuntimeError("JoyConType is not specified")
-        elif self.joycon_type == JoyConType.LR:
-            raise RuntimeError("JoyConType.LR is not supported for HIDDevice.")
-        else:
-            raise RuntimeError(f"Unknown JoyConType: {self.joycon_type}")
-        
-    
-    def _read_states_switch_pro(self, raw: list[int]) -> list[ButtonEvent]:
-        events: list[ButtonEvent] = []
-        states: dict[ButtonType, bool] = {}
-
-        # raw[3] is button
-        # 0: nothing pressed
-        # 1: Y pressed
-        # 2: X pressed
-        # 4: B pressed
-        # 8: A pressed
-        # 16: SR pressed (ignore)
-        # 32: SL pressed (ignore)
-        # 64: R pressed
-        # 128: ZR pressed
-
-        states[ButtonType.Y] = bool(raw[3] & 0x1)
-        states[ButtonType.X] = bool(raw[3] & 0x2)
-        states[ButtonType.B] = bool(raw[3] & 0x4)
-        states[ButtonType.A] = bool(raw[3] & 0x8)
-        states[ButtonType.R] = bool(raw[3] & 0x40)
-        states[ButtonType.ZR] = bool(raw[3] & 0x80)
-
-        # raw[4] is button
-        # 0: nothing pressed
-        # 1: MINUS pressed
-        # 2: PLUS pressed
-        # 4: ANALOG_R pressed
-        # 8: ANALOG_L pressed
-        # 16: HOME pressed (ignore)
-
-        states[ButtonType.SELECT] = bool(raw[4] & 0x1)
-        states[ButtonType.START] = bool(raw[4] & 0x2)
-        states[ButtonType.ANALOG_R_PRESS] = bool(raw[4] & 0x4)
-        states[ButtonType.ANALOG_L_PRESS] = bool(raw[4] & 0x8)
-
-        # raw[5] is button
-        # 0: nothing pressed
-        # 1: DOWN pressed
-        # 2: UP pressed
-        # 4: RIGHT pressed
-        # 8: LEFT pressed
-        # 16: SR pressed (ignore)
-        # 32: SL pressed (ignore)
-        # 64: L pressed
-        # 128: ZL pressed
-
-        states[ButtonType.DOWN] = bool(raw[5] & 0x1)
-        states[ButtonType.UP] = bool(raw[5] & 0x2)
-        states[ButtonType.RIGHT] = bool(raw[5] & 0x4)
-        states[ButtonType.LEFT] = bool(raw[5] & 0x8)
-        states[ButtonType.L] = bool(raw[5] & 0x40)
-        states[ButtonType.ZL] = bool(raw[5] & 0x80)
-
-        left_horizontal = self._get_nbit(raw, 6, 0, 8) | (self._get_nbit(raw, 7, 0, 4) << 8)
-        left_vertical = self._get_nbit(raw, 7, 4, 4) | (self._get_nbit(raw, 8, 0, 8) << 4)
-
-        right_horizontal = self._get_nbit(raw, 9, 0, 8) | (self._get_nbit(raw, 10, 0, 4) << 8)
-        right_vertical = self._get_nbit(raw, 10, 4, 4) | (self._get_nbit(raw, 11, 0, 8) << 4)
 
-        # print
-        # print(f"left_horizontal: {left_horizontal}")
-        # print(f"left_vertical: {left_vertical}")
-        # print(f"right_horizontal: {right_horizontal}")
-        # print(f"right_vertical: {right_vertical}")
-
-        left_horizontal_max = 3329
-        left_horizontal_min = 640
-        left_horizontal_center = 1946
-        left_vertical_max = 3389
-        left_vertical_min = 1133
-        left_vertical_center = 2172
-
-        right_horizontal_max = 3409
-        right_horizontal_min = 838
-        right_horizontal_center = 2100
-        right_vertical_max = 2869
-        right_vertical_min = 569
-        right_vertical_center = 1805
-
-        l_up_rate = (left_vertical - left_vertical_center) / (left_vertical_max - left_vertical_center)
-        l_down_rate = (left_vertical_center - left_vertical) / (left_vertical_center - left_vertical_min)
-        states[ButtonType.ANALOG_L_UP] = bool(l_up_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_L_DOWN] = bool(l_down_rate > self.axis_threshold)
+    def _get_read_timeout_ms(self, timeout_ms):
+        # a blocking read waits no longer than the dwell time of a held stick direction
+        # (a timeout would make a nonblocking read wait)
+        deadline_ns = self.decoder.dwell_deadline_ns
+        if not deadline_ns or self.nonblocking:
+            return timeout_ms
+        dwell_ms = max((deadline_ns - time.monotonic_ns() + 999_999) // 1_000_000, 1)
+        return dwell_ms if timeout_ms is None else min(timeout_ms, dwell_ms)
+
+    def _decode_dwell(self) -> list[ButtonEvent]:
+        # NOTE: DINPUT / XINPUT pads send no report while the sticks rest, so a stick direction
+        #       held by the dwell time changes here, on a read that timed out, by decoding its report again
+        decoder = self.decoder
+        deadline_ns = decoder.dwell_deadline_ns
+        if not deadline_ns:
+            return []
+        now_ns = time.monotonic_ns()
+        if now_ns < deadline_ns:
+            return []
+        with self._lock:
+            if not self.connected or self.decoder is not decoder or decoder.dwell_raw is None:
+                return []
+            return self._read_states(decoder.dwell_raw, now_ns)
 
-        l_left_rate = (left_horizontal_center - left_horizontal) / (left_horizontal_center - left_horizontal_min)
-        l_right_rate = (left_horizontal - left_horizontal_center) / (left_horizontal_max - left_horizontal_center)
-        states[ButtonType.ANALOG_L_LEFT] = bool(l_left_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_L_RIGHT] = bool(l_right_rate > self.axis_threshold)
+    def read_events(self, timeout_ms=None) -> list[ButtonEvent]:
+        if self._released_events:
+            return self._take_released_events()
 
-        r_up_rate = (right_vertical - right_vertical_center) / (right_vertical_max - right_vertical_center)
-        r_down_rate = (right_vertical_center - right_vertical) / (right_vertical_center - right_vertical_min)
-        states[ButtonType.ANALOG_R_UP] = bool(r_up_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_R_DOWN] = bool(r_down_rate > self.axis_threshold)
+        raw = self.read_raw(timeout_ms=self._get_read_timeout_ms(timeout_ms))
 
-        r_left_rate = (right_horizontal_center - right_horizontal) / (right_horizontal_center - right_horizontal_min)
-        r_right_rate = (right_horizontal - right_horizontal_center) / (right_horizontal_max - right_horizontal_center)
-        states[ButtonType.ANALOG_R_LEFT] = bool(r_left_rate > self.axis_threshold)
-        states[ButtonType.ANALOG_R_RIGHT] = bool(r_right_rate > self.axis_threshold)
+        if not raw:
+            return self._decode_dwell()
 
-        l_up_rate_clip = min(max(l_up_rate, 0.0), 1.0)
-        l_down_rate_clip = min(max(l_down_rate, 0.0), 1.0)
-        l_left_rate_clip = min(max(l_left_rate, 0.0), 1.0)
-        l_right_rate_clip = min(max(l_right_rate, 0.0), 1.0)
+        return self._decode(raw)
+        
+    def read_events_with_raw(self, timeout_ms=None) -> tuple[list[ButtonEvent], list[int]]:
+        if self._released_events:
+            return (self._take_released_events(), None)
 
-        r_up_rate_clip = min(max(r_up_rate, 0.0), 1.0)
-        r_down_rate_clip = min(max(r_down_rate, 0.0), 1.0)
-        r_left_rate_clip = min(max(r_left_rate, 0.0), 1.0)
-        r_right_rate_clip = min(max(r_right_rate, 0.0), 1.0)
+        raw = self.read_raw(timeout_ms=self._get_read_timeout_ms(timeout_ms))
 
-        self.axis_dict[AxisType.ANALOG_L_DOWN] = (l_down_rate_clip - l_up_rate_clip) / 2.0 + 0.5
-        self.axis_dict[AxisType.ANALOG_L_RIGHT] = (l_right_rate_clip - l_left_rate_clip) / 2.0 + 0.5
-        self.axis_dict[AxisType.ANALOG_R_DOWN] = (r_down_rate_clip - r_up_rate_clip) / 2.0 + 0.5
-        self.axis_dict[AxisType.ANALOG_R_RIGHT] = (r_right_rate_clip - r_left_rate_clip) / 2.0 + 0.5
+        if not raw:
+            return (self._decode_dwell(), None)
 
-        for button_type in states.keys():
-            if not button_type in self.button_state_dict:
-                if states[button_type] == True:
-                    events.append(ButtonEvent(button_type, states[button_type]))
-                    self.button_state_dict[button_type] = states[button_type]
-            elif states[button_type] != self.button_state_dict[button_type]:
-                events.append(ButtonEvent(button_type, states[button_type]))
-                self.button_state_dict[button_type] = states[button_type]
+        return (self._decode(raw), raw)
+        
+    def read_report(self, timeout_ms=None) -> HIDReport | None:
+        if self._released_events:
+            now_ns = time.monotonic_ns()
+            return self._make_report(now_ns, [], self._take_released_events(), now_ns)
 
-        return events
-    
-    def read_events(self) -> list[ButtonEvent]:
-        raw = self.read_raw()
+        raw = self.read_raw(timeout_ms=self._get_read_timeout_ms(timeout_ms))
 
         if not raw:
-            return []
+            events = self._decode_dwell()
+            if not events:
+                return None
+            now_ns = time.monotonic_ns()
+            return self._make_report(now_ns, [], events, now_ns)
 
-        if self.mode == DeviceMode.DINPUT:
-            return self._read_states_dinput(raw)
-        elif self.mode == DeviceMode.XINPUT:
-            return self._read_states_xinput(raw)
-        elif self.mode == DeviceMode.JOYCON:
-            return self._read_states_joycon(raw)
-        elif self.mode == DeviceMode.SWITCH_PRO:
-            return self._read_states_switch_pro(raw)
-        else:
-            raise ValueError(f"Unknown mode: {self.mode}")
-        
-    def read_events_with_raw(self) -> tuple[list[ButtonEvent], list[int]]:
-        raw = self.read_raw()
+        events = self._decode(raw)
 
-        if not raw:
-            return ([], None)
+        return self._make_report(self.last_read_ns, raw, events, self.last_decoded_ns)
+
+    def _make_report(self, timestamp_ns: int, raw: list[int], events: list[ButtonEvent], decoded_ns: int) -> HIDReport:
+        # the report keeps a snapshot, the device state goes on changing with the next read
+        state = self.state.snapshot()
+        return HIDReport(self, timestamp_ns, raw, events,
+                         state.get_states(),
+                         AxisValues(state.axis_values, self.axis_values.axis_types, self.axis_values.axis_mask),
+                         decoded_ns=decoded_ns)
 
-        if self.mode == DeviceMode.DINPUT:
-            return (self._read_states_dinput(raw), raw)
-        elif self.mode == DeviceMode.XINPUT:
-            return (self._read_states_xinput(raw), raw)
-        elif self.mode == DeviceMode.JOYCON:
-            return (self._read_states_joycon(raw), raw)
-        elif self.mode == DeviceMode.SWITCH_PRO:
-            return (self._read_states_switch_pro(raw), raw)
-        else:
-            raise ValueError(f"Unknown mode: {self.mode}")
-        
     # def read_states(self) -> dict[ButtonType, bool]:
     #     self.read_events()
     #     return self.button_state_dict
 
-    def get_states(self) -> dict[ButtonType, bool]:
-        return self.button_state_dict
+    def get_states(self) -> ButtonStates:
+        return ButtonStates(self.state.button_mask)
+
+    def get_button_mask(self) -> int:
+        return self.state.button_mask
     
-    def get_axis_values(self) -> dict[AxisType, float]:
-        return self.axis_dict
+    def get_axis_values(self) -> AxisValues:
+        # live read-only view of the axes this device reports
+        return self.axis_values
     
     def get_state(self, button_type: ButtonType) -> bool:
-        return self.button_state_dict[button_type]
+        return bool(self.state.button_mask & button_type.value)
     
     def get_axis_value(self, axis_type: AxisType) -> float:
-        return self.axis_dict[axis_type]
\ No newline at end of file
+        return self.axis_values[axis_type]
+
+    def get_name(self) -> str:
+        if self.joycon_type == JoyConType.NONE:
+            return f"0x{self.vendor_id:04x}:0x{self.product_id:04x} {self.mode.name}"
+        return f"0x{self.vendor_id:04x}:0x{self.product_id:04x} {self.mode.name}_{self.joycon_type.name}"
\ No newline at end of file
@@ -1,9 +1,11 @@
-import hid
 import sys
 import functools
 from .HIDDevice import HIDDevice
+from .HIDBackend import HIDBackend
 from .DeviceMode import DeviceMode
 from .JoyConType import JoyConType
+from .StickCalibration import StickCalibration
+from .AxisHysteresis import AxisHysteresis
 print = functools.partial(print, flush=True)
 
 class HIDDeviceManager:
@@ -14,21 +16,40 @@ class HIDDeviceManager:
             self._update_devices()
         return self._devices
     
+    def refresh(self) -> list[dict]:
+        # enumerate again (devices are cached after the first enumeration)
+        self._update_devices()
+        return self._devices
+
     def has_device(self, vendor_id, product_id) -> bool:
         for device in self.get_devices():
             if device['vendor_id'] == vendor_id and device['product_id'] == product_id:
                 return True
         return False
+
+    def get_serial_number(self, vendor_id, product_id) -> str | None:
+        # NOTE: None when the backend does not report one (or it is empty)
+        for device in self.get_devices():
+            if device['vendor_id'] == vendor_id and device['product_id'] == product_id:
+                return device.get('serial_number') or None
+        return None
     
     def get_device(self, vendor_id, product_id, mode=DeviceMode.DINPUT,
                    joycon_type=JoyConType.NONE,
-                   axis_threshold=0.1, nonblocking=True) -> HIDDevice:
+                   axis_threshold=0.1, nonblocking=True,
+                   calibration: StickCalibration | None = None,
+                   hysteresis: AxisHysteresis | None = None,
+                   trigger_threshold: float = 0.5) -> HIDDevice:
         if self.has_device(vendor_id, product_id):
             return HIDDevice(vendor_id, product_id,
                             mode=mode,
                             joycon_type=joycon_type,
                             axis_threshold=axis_threshold,
-                            nonblocking=nonblocking)
+                            nonblocking=nonblocking,
+                            serial_number=self.get_serial_number(vendor_id, product_id),
+                            calibration=calibration,
+                            hysteresis=hysteresis,
+                            trigger_threshold=trigger_threshold)
         else:
             return None
 
@@ -37,7 +58,7 @@ class HIDDeviceManager:
 
         dev_dict = {}
 
-        for device in hid.enumerate():
+        for device in HIDBackend.get_singleton().enumerate():
             # if vendor_id is zero, or product_id is zero, or product_string is empty, skip
             if device['vendor_id'] == 0 or device['product_id'] == 0 or device['product_string'] == "":
                 continue
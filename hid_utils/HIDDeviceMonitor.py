@@ -0,0 +1,138 @@
+import sys
+import time
+import socket
+import select
+import threading
+from .HIDDevice import HIDDevice
+from .HIDDeviceManager import HIDDeviceManager
+import functools
+print = functools.partial(print, flush=True)
+
+# NOTE:
+#
+# watches the opened devices and reopens the lost ones without a restart.
+# on Linux, kernel uevents (netlink) for hidraw wake the monitor right away and the devices
+# are enumerated only then, a periodic enumeration is the fallback without uevents.
+# while a device is lost, it is enumerated every retry_interval_sec either way.
+# a device that stopped reporting for stale_timeout_sec is treated as lost too, checked
+# without enumerating (Joy-Cons and the Pro Controller report continuously, a DINPUT pad only on changes).
+
+_NETLINK_KOBJECT_UEVENT = 15
+_UEVENT_GROUP_KERNEL = 1
+
+class HIDDeviceMonitor(threading.Thread):
+    def __init__(self, manager: HIDDeviceManager, devices: list[HIDDevice],
+            poll_interval_sec: float = 1.0,
+            retry_interval_sec: float = 0.5,
+            stale_timeout_sec: float | None = None,
+            use_uevent: bool = True,
+            stale_devices: list[HIDDevice] | None = None):
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.devices = devices
+        # enumeration interval without uevents
+        self.poll_interval_sec = poll_interval_sec
+        # while a device is lost (udev may not have set the permissions of a new node yet)
+        self.retry_interval_sec = retry_interval_sec
+        self.stale_timeout_sec = stale_timeout_sec
+        # devices checked for silence (all by default), only the ones that report continuously
+        self.stale_devices = stale_devices if stale_devices is not None else devices
+        self.uevent_socket = self._open_uevent_socket() if use_uevent else None
+        self.scan_count = 0
+        self.stale_check_count = 0
+        self._is_running = True
+
+    @staticmethod
+    def _open_uevent_socket() -> socket.socket | None:
+        if not hasattr(socket, "AF_NETLINK"):
+            return None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, _NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, _UEVENT_GROUP_KERNEL))
+            sock.setblocking(False)
+            return sock
+        except OSError as e:
+            print(f"[Info] no uevents ({e}), polling HID devices", file=sys.stderr)
+            return None
+
+    def _drain_uevents(self) -> bool:
+        # True if any of the pending uevents is about a hidraw node
+        has_hid_event = False
+        while True:
+            try:
+                message = self.uevent_socket.recv(8192)
+            except OSError:
+                # BlockingIOError when drained
+                return has_hid_event
+            # "ACTION@DEVPATH\0KEY=VALUE\0..."
+            if b"\0SUBSYSTEM=hidraw\0" in message:
+                has_hid_event = True
+
+    def scan(self):
+        # enumerates the devices (a full hidapi enumeration)
+        self.scan_count += 1
+        present = {(device['vendor_id'], device['product_id']) for device in self.manager.refresh()}
+        for device in self.devices:
+            if device.connected:
+                if (device.vendor_id, device.product_id) not in present:
+                    device.mark_disconnected("removed")
+            elif (device.vendor_id, device.product_id) in present:
+                device.reopen()
+
+    def check_stale(self):
+        # no enumeration, only the read times of the devices
+        if self.stale_timeout_sec is None:
+            return
+        self.stale_check_count += 1
+        now_ns = time.monotonic_ns()
+        for device in self.stale_devices:
+            if not device.connected:
+                continue
+            silent_sec = (now_ns - max(device.last_read_ns, device.opened_ns)) / 1e9
+            if silent_sec > self.stale_timeout_sec:
+                device.mark_disconnected(f"no reports for {silent_sec:.1f} sec")
+
+    def _get_next_scan(self, now: float) -> float | None:
+        # None is until the next uevent
+        if any(not device.connected for device in self.devices):
+            return now + self.retry_interval_sec
+        if self.uevent_socket is None:
+            return now + self.poll_interval_sec
+        return None
+
+    def run(self):
+        now = time.monotonic()
+        next_scan = now
+        next_stale_check = now + self.stale_timeout_sec / 2 if self.stale_timeout_sec is not None else None
+        while self._is_running:
+            deadlines = [x for x in (next_scan, next_stale_check) if x is not None]
+            if next_scan is None:
+                # a device lost on a read error is noticed within poll_interval_sec, without enumerating
+                deadlines.append(now + self.poll_interval_sec)
+            timeout_sec = max(min(deadlines) - time.monotonic(), 0.0)
+            has_hid_event = False
+            if self.uevent_socket is not None:
+                (readable, _, _) = select.select([self.uevent_socket], [], [], timeout_sec)
+                has_hid_event = bool(readable) and self._drain_uevents()
+            else:
+                time.sleep(timeout_sec)
+
+            if not self._is_running:
+                break
+            now = time.monotonic()
+            if next_stale_check is not None and now >= next_stale_check:
+                self.check_stale()
+                next_stale_check = now + self.stale_timeout_sec / 2
+            if has_hid_event or (next_scan is not None and now >= next_scan):
+                self.scan()
+                next_scan = self._get_next_scan(time.monotonic())
+            elif next_scan is None:
+                # a device lost since (check_stale() or a read error) is enumerated from now on
+                next_scan = self._get_next_scan(now)
+
+    def stop(self):
+        self._is_running = False
+
+    def __str__(self):
+        return (f"HIDDeviceMonitor(devices={len(self.devices)}, uevent={self.uevent_socket is not None}, "
+                f"scans={self.scan_count}, stale checks={self.stale_check_count})")
@@ -0,0 +1,58 @@
+import sys
+import queue
+import threading
+from .HIDDevice import HIDDevice
+from .HIDReport import HIDReport
+import functools
+print = functools.partial(print, flush=True)
+
+class HIDDeviceReader(threading.Thread):
+    def __init__(self, device: HIDDevice, report_queue: queue.Queue, timeout_ms: int = 100):
+        super().__init__(daemon=True)
+        self.device = device
+        self.report_queue = report_queue
+        # NOTE: the read wakes up at least every timeout_ms to check for stop()
+        self.timeout_ms = timeout_ms
+        self._is_running = True
+
+    def run(self):
+        while self._is_running:
+            report = self.device.read_report(timeout_ms=self.timeout_ms)
+            if report is not None:
+                self.report_queue.put(report)
+
+    def stop(self):
+        self._is_running = False
+
+class HIDDeviceReaderGroup:
+    def __init__(self, devices: list[HIDDevice], timeout_ms: int = 100):
+        self.report_queue: queue.Queue[HIDReport] = queue.Queue()
+        self.readers = [HIDDeviceReader(device, self.report_queue, timeout_ms=timeout_ms) for device in devices]
+
+    def start(self):
+        for reader in self.readers:
+            reader.start()
+
+    def stop(self):
+        for reader in self.readers:
+            reader.stop()
+
+    def get_reports(self, timeout_sec: float | None = None) -> list[HIDReport]:
+        # wait for the first report, then drain whatever else arrived meanwhile
+        try:
+            reports = [self.report_queue.get(timeout=timeout_sec)]
+        except queue.Empty:
+            return []
+
+        while True:
+            try:
+                reports.append(self.report_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # NOTE: readers put reports after decoding, so the queue order can differ
+        #       from the read order between devices. sort by read timestamp.
+        if len(reports) > 1:
+            reports.sort(key=lambda report: report.timestamp_ns)
+
+        return reports
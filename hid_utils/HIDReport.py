@@ -0,0 +1,27 @@
+from .ButtonEvent import ButtonEvent
+from .AxisValues import AxisValues
+from .ButtonStates import ButtonStates
+
+class HIDReport:
+    def __init__(self,
+            device,
+            timestamp_ns: int,
+            raw: list[int],
+            events: list[ButtonEvent],
+            states: ButtonStates,
+            axis_values: AxisValues,
+            decoded_ns: int | None = None
+        ):
+        self.device = device
+        self.timestamp_ns = timestamp_ns
+        self.raw = raw
+        self.events = events
+        # NOTE: snapshots of the device state right after this report was decoded,
+        #       so the processors see the state that belongs to the events
+        self.states = states
+        self.axis_values = axis_values
+        # time.monotonic_ns() when decoding finished
+        self.decoded_ns = decoded_ns
+
+    def __str__(self):
+        return f"HIDReport(0x{self.device.vendor_id:04x}:0x{self.device.product_id:04x}, {self.timestamp_ns}, events={len(self.events)})"
@@ -0,0 +1,17 @@
+from enum import Enum
+
+class ReaderMode(Enum):
+    POLL = 1
+    BLOCK = 2
+    THREAD = 3
+
+    @staticmethod
+    def from_str(label):
+        if label == "POLL":
+            return ReaderMode.POLL
+        elif label == "BLOCK":
+            return ReaderMode.BLOCK
+        elif label == "THREAD":
+            return ReaderMode.THREAD
+        else:
+            raise ValueError(f"Unknown reader mode: {label}")
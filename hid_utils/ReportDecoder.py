@@ -0,0 +1,691 @@
+import time
+from .DeviceMode import DeviceMode
+from .ButtonType import ButtonType
+from .JoyConType import JoyConType
+from .AxisType import AxisType
+from .AxisValues import AXIS_CENTER, AXIS_COUNT
+from .StickCalibration import StickCalibration
+from .AxisHysteresis import AxisHysteresis
+
+# NOTE: decoders write axis values into a DeviceState axis value array, indexed by AxisType.value
+_L_DOWN = AxisType.ANALOG_L_DOWN.value
+_L_RIGHT = AxisType.ANALOG_L_RIGHT.value
+_R_DOWN = AxisType.ANALOG_R_DOWN.value
+_R_RIGHT = AxisType.ANALOG_R_RIGHT.value
+
+# stick directions, the buttons AxisHysteresis applies to
+ANALOG_DIRECTION_MASK = (ButtonType.ANALOG_L_UP.value | ButtonType.ANALOG_L_DOWN.value
+                         | ButtonType.ANALOG_L_LEFT.value | ButtonType.ANALOG_L_RIGHT.value
+                         | ButtonType.ANALOG_R_UP.value | ButtonType.ANALOG_R_DOWN.value
+                         | ButtonType.ANALOG_R_LEFT.value | ButtonType.ANALOG_R_RIGHT.value)
+
+# NOTE:
+#
+# every decoder turns one report into a pressed-button bitmask (OR of ButtonType values)
+# using tables built once: 256-entry tables for button bytes and 8-bit axes,
+# 4096-entry tables for 12-bit stick axes. decoding a report is a few lookups and ORs.
+
+def _build_byte_table(bit_map: dict[int, ButtonType]) -> list[int]:
+    table = [0] * 256
+    for value in range(256):
+        mask = 0
+        for bit, button_type in bit_map.items():
+            if value & bit:
+                mask |= button_type.value
+        table[value] = mask
+    return table
+
+def _build_axis8_table(axis_threshold: float,
+        negative_button_type: ButtonType,
+        positive_button_type: ButtonType) -> list[int]:
+    # 8-bit axis, 0x00 is negative end, 0xff is positive end, center is 0x80
+    table = [0] * 256
+    for value in range(256):
+        mask = 0
+        if value < 0x80 - 0x80 * axis_threshold:
+            mask |= negative_button_type.value
+        if value > 0x80 + 0x80 * axis_threshold:
+            mask |= positive_button_type.value
+        table[value] = mask
+    return table
+
+def _build_axis12_tables(axis_threshold: float,
+        value_min: int, value_center: int, value_max: int,
+        negative_button_type: ButtonType,
+        positive_button_type: ButtonType,
+        invert: bool = False) -> tuple[list[int], list[float]]:
+    # 12-bit stick axis with calibration (min, center, max)
+    # returns (button mask table, normalized axis value table)
+    # normalized value is 0.0 at negative end, 0.5 at center, 1.0 at positive end (or reversed if invert)
+    mask_table = [0] * 4096
+    value_table = [0.5] * 4096
+    for value in range(4096):
+        positive_rate = (value - value_center) / (value_max - value_center)
+        negative_rate = (value_center - value) / (value_center - value_min)
+
+        mask = 0
+        if positive_rate > axis_threshold:
+            mask |= positive_button_type.value
+        if negative_rate > axis_threshold:
+            mask |= negative_button_type.value
+        mask_table[value] = mask
+
+        # clip each rates to 0.0 ~ 1.0 (ignore negative values)
+        positive_rate_clip = min(max(positive_rate, 0.0), 1.0)
+        negative_rate_clip = min(max(negative_rate, 0.0), 1.0)
+        if invert:
+            value_table[value] = (negative_rate_clip - positive_rate_clip) / 2.0 + 0.5
+        else:
+            value_table[value] = (positive_rate_clip - negative_rate_clip) / 2.0 + 0.5
+    return (mask_table, value_table)
+
+def _build_deadzone_table(value_min: int, value_center: int, value_max: int, radial_deadzone: float) -> list[float]:
+    # (deflection / radial_deadzone) ** 2 per 12-bit value, deflection is 1.0 at either end.
+    # a stick is inside its radial deadzone while the sum of the tables of both axes is below 1.0
+    table = [0.0] * 4096
+    for value in range(4096):
+        if value >= value_center:
+            rate = (value - value_center) / (value_max - value_center)
+        else:
+            rate = (value_center - value) / (value_center - value_min)
+        table[value] = (rate / radial_deadzone) ** 2
+    return table
+
+# NOTE: DINPUT raw[4]
+# low nibble is hat: 0 UP, 1 UP_RIGHT, 2 RIGHT, 3 DOWN_RIGHT, 4 DOWN, 5 DOWN_LEFT, 6 LEFT, 7 UP_LEFT, 8 (default) none
+# high nibble is buttons: 0x10 Y, 0x20 B, 0x40 A, 0x80 X
+# other combinations exists (ex: 200 means X + A, 70 means LEFT + A)
+_DINPUT_HAT = {
+    0x0: ButtonType.UP.value,
+    0x1: ButtonType.UP.value | ButtonType.RIGHT.value,
+    0x2: ButtonType.RIGHT.value,
+    0x3: ButtonType.DOWN.value | ButtonType.RIGHT.value,
+    0x4: ButtonType.DOWN.value,
+    0x5: ButtonType.DOWN.value | ButtonType.LEFT.value,
+    0x6: ButtonType.LEFT.value,
+    0x7: ButtonType.UP.value | ButtonType.LEFT.value,
+}
+_DINPUT_BYTE4_TABLE = [
+    _DINPUT_HAT.get(value & 0xf, 0) | mask
+    for value, mask in enumerate(_build_byte_table({
+        0x10: ButtonType.Y,
+        0x20: ButtonType.B,
+        0x40: ButtonType.A,
+        0x80: ButtonType.X,
+    }))
+]
+_DINPUT_BYTE5_TABLE = _build_byte_table({
+    0x1: ButtonType.L,
+    0x2: ButtonType.R,
+    0x4: ButtonType.ZL,
+    0x8: ButtonType.ZR,
+    0x10: ButtonType.SELECT,
+    0x20: ButtonType.START,
+    0x40: ButtonType.ANALOG_L_PRESS,
+    0x80: ButtonType.ANALOG_R_PRESS,
+})
+_AXIS8_VALUE_TABLE = [value / 0xff for value in range(256)]
+
+# NOTE: XINPUT (Xbox Wireless Controller HID report 0x01, as read by hidapi with the report id in raw[0])
+# raw[1..8] sticks LX, LY, RX, RY (16-bit little endian, left/up is 0x0000, right/down is 0xffff, center is 0x8000)
+# raw[9..12] triggers LT, RT (10-bit little endian, 0 released .. 1023 pulled)
+# raw[13] hat: 0 (default) none, 1 UP, 2 UP_RIGHT, 3 RIGHT, 4 DOWN_RIGHT, 5 DOWN, 6 DOWN_LEFT, 7 LEFT, 8 UP_LEFT
+# raw[14] 1 A, 2 B, 8 X, 16 Y, 64 LB, 128 RB
+# raw[15] 4 VIEW, 8 MENU, 16 GUIDE (ignore), 32 LS, 64 RS
+# buttons are named by position like DINPUT: XInput A (bottom) is B, B (right) is A, X (left) is Y, Y (top) is X
+_XINPUT_HAT_TABLE = [
+    _DINPUT_HAT.get((value & 0xf) - 1, 0) if value & 0xf else 0
+    for value in range(256)
+]
+_XINPUT_BYTE14_TABLE = _build_byte_table({
+    0x1: ButtonType.B,
+    0x2: ButtonType.A,
+    0x8: ButtonType.Y,
+    0x10: ButtonType.X,
+    0x40: ButtonType.L,
+    0x80: ButtonType.R,
+})
+_XINPUT_BYTE15_TABLE = _build_byte_table({
+    0x4: ButtonType.SELECT,
+    0x8: ButtonType.START,
+    0x20: ButtonType.ANALOG_L_PRESS,
+    0x40: ButtonType.ANALOG_R_PRESS,
+})
+# 16-bit axis value (0.0 .. 1.0 like the 8-bit one) is _AXIS16_HIGH_VALUE_TABLE[high byte] + _AXIS16_LOW_VALUE_TABLE[low byte]
+_AXIS16_HIGH_VALUE_TABLE = [value * 0x100 / 0xffff for value in range(256)]
+_AXIS16_LOW_VALUE_TABLE = [value / 0xffff for value in range(256)]
+
+def _build_trigger_table(trigger_threshold: float, button_type: ButtonType) -> list[list[int]]:
+    # 10-bit trigger, indexed [high byte][low byte] (bits above the 10th are ignored)
+    rows = []
+    for high in range(4):
+        row = [0] * 256
+        for low in range(256):
+            if (high << 8 | low) / 1023 > trigger_threshold:
+                row[low] = button_type.value
+        rows.append(row)
+    return [rows[high & 0x3] for high in range(256)]
+
+# NOTE: JOYCON_R / SWITCH_PRO raw[3]
+# 1 Y, 2 X, 4 B, 8 A, 16 SR (ignore), 32 SL (ignore), 64 R, 128 ZR
+_SWITCH_BYTE3_TABLE = _build_byte_table({
+    0x1: ButtonType.Y,
+    0x2: ButtonType.X,
+    0x4: ButtonType.B,
+    0x8: ButtonType.A,
+    0x40: ButtonType.R,
+    0x80: ButtonType.ZR,
+})
+# NOTE: JOYCON_L / JOYCON_R / SWITCH_PRO raw[4]
+# 1 MINUS, 2 PLUS, 4 ANALOG_R, 8 ANALOG_L, 16 HOME (ignore), 32 CAPTURE (ignore)
+# (JOYCON_L only reports MINUS and ANALOG_L, JOYCON_R only PLUS and ANALOG_R)
+_SWITCH_BYTE4_TABLE = _build_byte_table({
+    0x1: ButtonType.SELECT,
+    0x2: ButtonType.START,
+    0x4: ButtonType.ANALOG_R_PRESS,
+    0x8: ButtonType.ANALOG_L_PRESS,
+})
+# NOTE: JOYCON_L / SWITCH_PRO raw[5]
+# 1 DOWN, 2 UP, 4 RIGHT, 8 LEFT, 16 SR (ignore), 32 SL (ignore), 64 L, 128 ZL
+_SWITCH_BYTE5_TABLE = _build_byte_table({
+    0x1: ButtonType.DOWN,
+    0x2: ButtonType.UP,
+    0x4: ButtonType.RIGHT,
+    0x8: ButtonType.LEFT,
+    0x40: ButtonType.L,
+    0x80: ButtonType.ZL,
+})
+
+class ReportDecoder:
+    # buttons this decoder reports, in event order
+    button_types: list[ButtonType] = []
+    # axes this decoder writes
+    axis_types: list[AxisType] = []
+
+    def __init__(self, axis_threshold: float = 0.1, calibration: StickCalibration | None = None):
+        self.axis_threshold = axis_threshold
+        self.calibration = calibration if calibration is not None else StickCalibration()
+        # (min, center, max) the tables of each 12-bit stick axis are built from
+        self.stick_ranges: dict[str, tuple[int, int, int]] = {}
+        self.hysteresis: AxisHysteresis | None = None
+        # stick direction edges of the axis threshold alone, and those that came out with the hysteresis,
+        # the difference is the suppressed (chattering) edges.
+        # holds count the times a direction was kept by the release threshold / the dwell time
+        self.analog_edge_count = 0
+        self.filtered_edge_count = 0
+        self.hysteresis_hold_count = 0
+        self.dwell_hold_count = 0
+        # time.monotonic_ns() the first direction held by the dwell time changes at (0 is none),
+        # and the report to decode again then (see HIDDevice)
+        self.dwell_deadline_ns = 0
+        self.dwell_raw: list[int] | None = None
+
+    def decode(self, raw: list[int], axis_values: list[float]) -> int:
+        raise NotImplementedError()
+
+    def set_hysteresis(self, hysteresis: AxisHysteresis):
+        # NOTE: stateful from here on (one decoder per device), decode() gets a timestamp_ns argument
+        #       for the dwell time (time.monotonic_ns() if omitted)
+        release_threshold = hysteresis.release_threshold
+        if release_threshold is not None and release_threshold > self.axis_threshold:
+            raise ValueError(f"release_threshold {release_threshold} must not be above axis_threshold {self.axis_threshold}")
+        self.hysteresis = hysteresis
+        # the same decoder at the release threshold, asked only while a direction is held below the axis threshold
+        self._release_decoder = None
+        if release_threshold is not None and release_threshold < self.axis_threshold:
+            self._release_decoder = self.__class__(release_threshold, self.calibration)
+        self._release_axis_values = [AXIS_CENTER] * AXIS_COUNT
+        self._min_dwell_ns = int(hysteresis.min_dwell_sec * 1e9)
+        self._threshold_decode = self.decode
+        self.decode = self._decode_with_hysteresis
+        self.reset()
+
+    def reset(self):
+        # no direction pressed (the device was lost)
+        if self.hysteresis is None:
+            return
+        self._threshold_analog_mask = 0
+        self._analog_mask = 0
+        self._held_mask = 0
+        self._dwell_mask = 0
+        self._changed_ns: dict[int, int] = {}
+        self.dwell_deadline_ns = 0
+        self.dwell_raw = None
+
+    def _decode_with_hysteresis(self, raw: list[int], axis_values: list[float], timestamp_ns: int | None = None) -> int:
+        mask = self._threshold_decode(raw, axis_values)
+        analog_mask = mask & ANALOG_DIRECTION_MASK
+        previous = self._analog_mask
+        if analog_mask == previous and analog_mask == self._threshold_analog_mask:
+            # no edge, nothing held (the usual report)
+            return mask
+        changed = analog_mask ^ self._threshold_analog_mask
+        if changed:
+            self.analog_edge_count += changed.bit_count()
+            self._threshold_analog_mask = analog_mask
+
+        # directions pressed before stay pressed above the release threshold
+        held = previous & ~analog_mask
+        if held and self._release_decoder is not None:
+            held &= self._release_decoder.decode(raw, self._release_axis_values)
+            analog_mask |= held
+        else:
+            held = 0
+        if held & ~self._held_mask:
+            self.hysteresis_hold_count += (held & ~self._held_mask).bit_count()
+        self._held_mask = held
+
+        # directions that changed within the dwell time keep their previous state
+        dwell = 0
+        if self._min_dwell_ns:
+            changed = analog_mask ^ previous
+            if changed:
+                now_ns = timestamp_ns if timestamp_ns is not None else time.monotonic_ns()
+                changed_ns = self._changed_ns
+                while changed:
+                    bit = changed & -changed
+                    changed ^= bit
+                    if bit in changed_ns and now_ns - changed_ns[bit] < self._min_dwell_ns:
+                        dwell |= bit
+                    else:
+                        changed_ns[bit] = now_ns
+                analog_mask ^= dwell
+        if dwell & ~self._dwell_mask:
+            self.dwell_hold_count += (dwell & ~self._dwell_mask).bit_count()
+        self._dwell_mask = dwell
+        if dwell:
+            changed_ns = self._changed_ns
+            deadline_ns = min(changed_ns[bit] for bit in changed_ns if bit & dwell) + self._min_dwell_ns
+            self.dwell_deadline_ns = deadline_ns
+            self.dwell_raw = raw
+        elif self.dwell_deadline_ns:
+            self.dwell_deadline_ns = 0
+            self.dwell_raw = None
+
+        if analog_mask != previous:
+            self.filtered_edge_count += (analog_mask ^ previous).bit_count()
+            self._analog_mask = analog_mask
+        return (mask & ~ANALOG_DIRECTION_MASK) | analog_mask
+
+    def get_suppressed_count(self) -> int:
+        return self.analog_edge_count - self.filtered_edge_count
+
+    def read_sticks(self, raw: list[int]) -> dict[str, int]:
+        # raw value per 12-bit stick axis (see StickCalibration), for calibration
+        return {}
+
+    def _get_stick_range(self, name: str, default: tuple[int, int, int]) -> tuple[int, int, int]:
+        axis_range = self.calibration.get_axis(name, default)
+        self.stick_ranges[name] = axis_range
+        return axis_range
+
+    def _build_stick_tables(self, name: str, default: tuple[int, int, int],
+            negative_button_type: ButtonType, positive_button_type: ButtonType,
+            invert: bool = False) -> tuple[list[int], list[float]]:
+        (value_min, value_center, value_max) = self._get_stick_range(name, default)
+        return _build_axis12_tables(self.axis_threshold, value_min, value_center, value_max,
+                                    negative_button_type, positive_button_type, invert=invert)
+
+    def _build_deadzone(self, horizontal_name: str, vertical_name: str) -> tuple[list[float], list[float], int, int]:
+        # (horizontal table, vertical table, horizontal center, vertical center) of one stick,
+        # a stick inside its deadzone is decoded as if it were at the centers
+        (h_min, h_center, h_max) = self.stick_ranges[horizontal_name]
+        (v_min, v_center, v_max) = self.stick_ranges[vertical_name]
+        radial_deadzone = self.calibration.radial_deadzone
+        return (_build_deadzone_table(h_min, h_center, h_max, radial_deadzone),
+                _build_deadzone_table(v_min, v_center, v_max, radial_deadzone),
+                h_center, v_center)
+
+    @staticmethod
+    def create(mode: DeviceMode,
+            joycon_type: JoyConType = JoyConType.NONE,
+            axis_threshold: float = 0.1,
+            calibration: StickCalibration | None = None,
+            hysteresis: AxisHysteresis | None = None,
+            trigger_threshold: float = 0.5) -> 'ReportDecoder':
+        decoder = ReportDecoder._create(mode, joycon_type, axis_threshold, calibration, trigger_threshold)
+        if hysteresis is not None and hysteresis.is_enabled():
+            decoder.set_hysteresis(hysteresis)
+        return decoder
+
+    @staticmethod
+    def _create(mode: DeviceMode,
+            joycon_type: JoyConType,
+            axis_threshold: float,
+            calibration: StickCalibration | None,
+            trigger_threshold: float) -> 'ReportDecoder':
+        # NOTE: calibration applies to the 12-bit sticks (JOYCON, SWITCH_PRO),
+        #       DINPUT (8-bit) and XINPUT (16-bit) sticks have a fixed center.
+        #       trigger_threshold applies to the analog triggers of XINPUT
+        if mode == DeviceMode.DINPUT:
+            return DInputDecoder(axis_threshold)
+        elif mode == DeviceMode.XINPUT:
+            return XInputDecoder(axis_threshold, trigger_threshold=trigger_threshold)
+        elif mode == DeviceMode.JOYCON:
+            if joycon_type == JoyConType.L:
+                return JoyConLDecoder(axis_threshold, calibration)
+            elif joycon_type == JoyConType.R:
+                return JoyConRDecoder(axis_threshold, calibration)
+            elif joycon_type == JoyConType.NONE:
+                raise RuntimeError("JoyConType is not specified")
+            elif joycon_type == JoyConType.LR:
+                raise RuntimeError("JoyConType.LR is not supported for HIDDevice.")
+            else:
+                raise RuntimeError(f"Unknown JoyConType: {joycon_type}")
+        elif mode == DeviceMode.SWITCH_PRO:
+            return SwitchProDecoder(axis_threshold, calibration)
+        else:
+            raise ValueError(f"Unknown mode: {mode}")
+
+class DInputDecoder(ReportDecoder):
+    button_types = [
+        ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT, ButtonType.ANALOG_L_UP, ButtonType.ANALOG_L_DOWN,
+        ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT, ButtonType.ANALOG_R_UP, ButtonType.ANALOG_R_DOWN,
+        ButtonType.Y, ButtonType.B, ButtonType.A, ButtonType.X,
+        ButtonType.UP, ButtonType.RIGHT, ButtonType.DOWN, ButtonType.LEFT,
+        ButtonType.L, ButtonType.R, ButtonType.ZL, ButtonType.ZR,
+        ButtonType.ANALOG_L_PRESS, ButtonType.ANALOG_R_PRESS,
+        ButtonType.SELECT, ButtonType.START,
+    ]
+    axis_types = [AxisType.ANALOG_L_RIGHT, AxisType.ANALOG_L_DOWN, AxisType.ANALOG_R_RIGHT, AxisType.ANALOG_R_DOWN]
+
+    def __init__(self, axis_threshold: float = 0.1, calibration: StickCalibration | None = None):
+        # NOTE: calibration is ignored, kept for the same constructor as the other decoders
+        super().__init__(axis_threshold, calibration)
+        # NOTE: raw[0] ANALOG L left-right, raw[1] ANALOG L up-down,
+        #       raw[2] ANALOG R left-right, raw[3] ANALOG R up-down
+        #       left/up is 0x00, right/down is 0xff, center is 0x80
+        self.l_horizontal_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT)
+        self.l_vertical_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_L_UP, ButtonType.ANALOG_L_DOWN)
+        self.r_horizontal_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT)
+        self.r_vertical_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_R_UP, ButtonType.ANALOG_R_DOWN)
+
+    def decode(self, raw: list[int], axis_values: list[float]) -> int:
+        axis_values[_L_RIGHT] = _AXIS8_VALUE_TABLE[raw[0]]
+        axis_values[_L_DOWN] = _AXIS8_VALUE_TABLE[raw[1]]
+        axis_values[_R_RIGHT] = _AXIS8_VALUE_TABLE[raw[2]]
+        axis_values[_R_DOWN] = _AXIS8_VALUE_TABLE[raw[3]]
+
+        return (self.l_horizontal_table[raw[0]]
+                | self.l_vertical_table[raw[1]]
+                | self.r_horizontal_table[raw[2]]
+                | self.r_vertical_table[raw[3]]
+                | _DINPUT_BYTE4_TABLE[raw[4]]
+                | _DINPUT_BYTE5_TABLE[raw[5]])
+
+class XInputDecoder(ReportDecoder):
+    button_types = [
+        ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT, ButtonType.ANALOG_L_UP, ButtonType.ANALOG_L_DOWN,
+        ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT, ButtonType.ANALOG_R_UP, ButtonType.ANALOG_R_DOWN,
+        ButtonType.Y, ButtonType.B, ButtonType.A, ButtonType.X,
+        ButtonType.UP, ButtonType.RIGHT, ButtonType.DOWN, ButtonType.LEFT,
+        ButtonType.L, ButtonType.R, ButtonType.ZL, ButtonType.ZR,
+        ButtonType.ANALOG_L_PRESS, ButtonType.ANALOG_R_PRESS,
+        ButtonType.SELECT, ButtonType.START,
+    ]
+    axis_types = [AxisType.ANALOG_L_RIGHT, AxisType.ANALOG_L_DOWN, AxisType.ANALOG_R_RIGHT, AxisType.ANALOG_R_DOWN]
+
+    def __init__(self, axis_threshold: float = 0.1, calibration: StickCalibration | None = None,
+            trigger_threshold: float = 0.5):
+        # NOTE: calibration is ignored, kept for the same constructor as the other decoders
+        super().__init__(axis_threshold, calibration)
+        if not 0.0 <= trigger_threshold < 1.0:
+            raise ValueError(f"trigger_threshold must be 0.0 <= x < 1.0: {trigger_threshold}")
+        self.trigger_threshold = trigger_threshold
+        # NOTE: directions are looked up by the high byte of each stick (1/256 steps, like DINPUT),
+        #       axis values keep all 16 bits
+        self.l_horizontal_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT)
+        self.l_vertical_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_L_UP, ButtonType.ANALOG_L_DOWN)
+        self.r_horizontal_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT)
+        self.r_vertical_table = _build_axis8_table(axis_threshold, ButtonType.ANALOG_R_UP, ButtonType.ANALOG_R_DOWN)
+        self.l_trigger_table = _build_trigger_table(trigger_threshold, ButtonType.ZL)
+        self.r_trigger_table = _build_trigger_table(trigger_threshold, ButtonType.ZR)
+
+    def decode(self, raw: list[int], axis_values: list[float]) -> int:
+        # NOTE: two float lookups and an add are faster than joining the bytes and dividing
+        high = _AXIS16_HIGH_VALUE_TABLE
+        low = _AXIS16_LOW_VALUE_TABLE
+        axis_values[_L_RIGHT] = high[raw[2]] + low[raw[1]]
+        axis_values[_L_DOWN] = high[raw[4]] + low[raw[3]]
+        axis_values[_R_RIGHT] = high[raw[6]] + low[raw[5]]
+        axis_values[_R_DOWN] = high[raw[8]] + low[raw[7]]
+
+        return (self.l_horizontal_table[raw[2]]
+                | self.l_vertical_table[raw[4]]
+                | self.r_horizontal_table[raw[6]]
+                | self.r_vertical_table[raw[8]]
+                | self.l_trigger_table[raw[10]][raw[9]]
+                | self.r_trigger_table[raw[12]][raw[11]]
+                | _XINPUT_HAT_TABLE[raw[13]]
+                | _XINPUT_BYTE14_TABLE[raw[14]]
+                | _XINPUT_BYTE15_TABLE[raw[15]])
+
+class JoyConLDecoder(ReportDecoder):
+    button_types = [
+        ButtonType.SELECT, ButtonType.ANALOG_L_PRESS,
+        ButtonType.DOWN, ButtonType.UP, ButtonType.RIGHT, ButtonType.LEFT,
+        ButtonType.L, ButtonType.ZL,
+        ButtonType.ANALOG_L_UP, ButtonType.ANALOG_L_DOWN, ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT,
+    ]
+    axis_types = [AxisType.ANALOG_L_DOWN, AxisType.ANALOG_L_RIGHT]
+
+    left_horizontal_max = 3329
+    left_horizontal_min = 640
+    left_horizontal_center = 1946
+    left_vertical_max = 3389
+    left_vertical_min = 1133
+    left_vertical_center = 2172
+
+    def __init__(self, axis_threshold: float = 0.1, calibration: StickCalibration | None = None):
+        super().__init__(axis_threshold, calibration)
+        (self.l_horizontal_table, self.l_horizontal_value_table) = self._build_stick_tables("l_horizontal",
+            (self.left_horizontal_min, self.left_horizontal_center, self.left_horizontal_max),
+            ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT)
+        # NOTE: larger vertical value is up
+        (self.l_vertical_table, self.l_vertical_value_table) = self._build_stick_tables("l_vertical",
+            (self.left_vertical_min, self.left_vertical_center, self.left_vertical_max),
+            ButtonType.ANALOG_L_DOWN, ButtonType.ANALOG_L_UP, invert=True)
+        # JOYCON_L has no PLUS / ANALOG_R
+        self.byte4_mask = ButtonType.SELECT.value | ButtonType.ANALOG_L_PRESS.value
+
+        # NOTE: only a decoder with a deadzone pays for the check
+        self.l_deadzone = None
+        if self.calibration.radial_deadzone > 0:
+            self.l_deadzone = self._build_deadzone("l_horizontal", "l_vertical")
+            (self.l_horizontal_deadzone_table, self.l_vertical_deadzone_table,
+             self.l_horizontal_center, self.l_vertical_center) = self.l_deadzone
+            self.decode = self._decode_with_deadzone
+
+    def read_sticks(self, raw: list[int]) -> dict[str, int]:
+        return {
+            "l_horizontal": raw[6] | ((raw[7] & 0xf) << 8),
+            "l_vertical": (raw[7] >> 4) | (raw[8] << 4),
+        }
+
+    def decode(self, raw: list[int], axis_values: list[float]) -> int:
+        left_horizontal = raw[6] | ((raw[7] & 0xf) << 8)
+        left_vertical = (raw[7] >> 4) | (raw[8] << 4)
+
+        axis_values[_L_DOWN] = self.l_vertical_value_table[left_vertical]
+        axis_values[_L_RIGHT] = self.l_horizontal_value_table[left_horizontal]
+
+        return ((_SWITCH_BYTE4_TABLE[raw[4]] & self.byte4_mask)
+                | _SWITCH_BYTE5_TABLE[raw[5]]
+                | self.l_horizontal_table[left_horizontal]
+                | self.l_vertical_table[left_vertical])
+
+    def _decode_with_deadzone(self, raw: list[int], axis_values: list[float]) -> int:
+        left_horizontal = raw[6] | ((raw[7] & 0xf) << 8)
+        left_vertical = (raw[7] >> 4) | (raw[8] << 4)
+        if self.l_horizontal_deadzone_table[left_horizontal] + self.l_vertical_deadzone_table[left_vertical] < 1.0:
+            left_horizontal = self.l_horizontal_center
+            left_vertical = self.l_vertical_center
+
+        axis_values[_L_DOWN] = self.l_vertical_value_table[left_vertical]
+        axis_values[_L_RIGHT] = self.l_horizontal_value_table[left_horizontal]
+
+        return ((_SWITCH_BYTE4_TABLE[raw[4]] & self.byte4_mask)
+                | _SWITCH_BYTE5_TABLE[raw[5]]
+                | self.l_horizontal_table[left_horizontal]
+                | self.l_vertical_table[left_vertical])
+
+class JoyConRDecoder(ReportDecoder):
+    button_types = [
+        ButtonType.Y, ButtonType.X, ButtonType.B, ButtonType.A,
+        ButtonType.R, ButtonType.ZR,
+        ButtonType.START, ButtonType.ANALOG_R_PRESS,
+        ButtonType.ANALOG_R_UP, ButtonType.ANALOG_R_DOWN, ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT,
+    ]
+    axis_types = [AxisType.ANALOG_R_DOWN, AxisType.ANALOG_R_RIGHT]
+
+    right_horizontal_max = 3409
+    right_horizontal_min = 838
+    right_horizontal_center = 2100
+    right_vertical_max = 2869
+    right_vertical_min = 569
+    right_vertical_center = 1805
+
+    def __init__(self, axis_threshold: float = 0.1, calibration: StickCalibration | None = None):
+        super().__init__(axis_threshold, calibration)
+        (self.r_horizontal_table, self.r_horizontal_value_table) = self._build_stick_tables("r_horizontal",
+            (self.right_horizontal_min, self.right_horizontal_center, self.right_horizontal_max),
+            ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT)
+        (self.r_vertical_table, self.r_vertical_value_table) = self._build_stick_tables("r_vertical",
+            (self.right_vertical_min, self.right_vertical_center, self.right_vertical_max),
+            ButtonType.ANALOG_R_DOWN, ButtonType.ANALOG_R_UP, invert=True)
+        # JOYCON_R has no MINUS / ANALOG_L
+        self.byte4_mask = ButtonType.START.value | ButtonType.ANALOG_R_PRESS.value
+
+        self.r_deadzone = None
+        if self.calibration.radial_deadzone > 0:
+            self.r_deadzone = self._build_deadzone("r_horizontal", "r_vertical")
+            (self.r_horizontal_deadzone_table, self.r_vertical_deadzone_table,
+             self.r_horizontal_center, self.r_vertical_center) = self.r_deadzone
+            self.decode = self._decode_with_deadzone
+
+    def read_sticks(self, raw: list[int]) -> dict[str, int]:
+        return {
+            "r_horizontal": raw[9] | ((raw[10] & 0xf) << 8),
+            "r_vertical": (raw[10] >> 4) | (raw[11] << 4),
+        }
+
+    def decode(self, raw: list[int], axis_values: list[float]) -> int:
+        right_horizontal = raw[9] | ((raw[10] & 0xf) << 8)
+        right_vertical = (raw[10] >> 4) | (raw[11] << 4)
+
+        axis_values[_R_DOWN] = self.r_vertical_value_table[right_vertical]
+        axis_values[_R_RIGHT] = self.r_horizontal_value_table[right_horizontal]
+
+        return (_SWITCH_BYTE3_TABLE[raw[3]]
+                | (_SWITCH_BYTE4_TABLE[raw[4]] & self.byte4_mask)
+                | self.r_horizontal_table[right_horizontal]
+                | self.r_vertical_table[right_vertical])
+
+    def _decode_with_deadzone(self, raw: list[int], axis_values: list[float]) -> int:
+        right_horizontal = raw[9] | ((raw[10] & 0xf) << 8)
+        right_vertical = (raw[10] >> 4) | (raw[11] << 4)
+        if self.r_horizontal_deadzone_table[right_horizontal] + self.r_vertical_deadzone_table[right_vertical] < 1.0:
+            right_horizontal = self.r_horizontal_center
+            right_vertical = self.r_vertical_center
+
+        axis_values[_R_DOWN] = self.r_vertical_value_table[right_vertical]
+        axis_values[_R_RIGHT] = self.r_horizontal_value_table[right_horizontal]
+
+        return (_SWITCH_BYTE3_TABLE[raw[3]]
+                | (_SWITCH_BYTE4_TABLE[raw[4]] & self.byte4_mask)
+                | self.r_horizontal_table[right_horizontal]
+                | self.r_vertical_table[right_vertical])
+
+class SwitchProDecoder(ReportDecoder):
+    button_types = [
+        ButtonType.Y, ButtonType.X, ButtonType.B, ButtonType.A,
+        ButtonType.R, ButtonType.ZR,
+        ButtonType.SELECT, ButtonType.START, ButtonType.ANALOG_R_PRESS, ButtonType.ANALOG_L_PRESS,
+        ButtonType.DOWN, ButtonType.UP, ButtonType.RIGHT, ButtonType.LEFT,
+        ButtonType.L, ButtonType.ZL,
+        ButtonType.ANALOG_L_UP, ButtonType.ANALOG_L_DOWN, ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT,
+        ButtonType.ANALOG_R_UP, ButtonType.ANALOG_R_DOWN, ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT,
+    ]
+    axis_types = [AxisType.ANALOG_L_DOWN, AxisType.ANALOG_L_RIGHT, AxisType.ANALOG_R_DOWN, AxisType.ANALOG_R_RIGHT]
+
+    def __init__(self, axis_threshold: float = 0.1, calibration: StickCalibration | None = None):
+        super().__init__(axis_threshold, calibration)
+        # NOTE: same sticks as JoyCon L / R
+        L = JoyConLDecoder
+        R = JoyConRDecoder
+        (self.l_horizontal_table, self.l_horizontal_value_table) = self._build_stick_tables("l_horizontal",
+            (L.left_horizontal_min, L.left_horizontal_center, L.left_horizontal_max),
+            ButtonType.ANALOG_L_LEFT, ButtonType.ANALOG_L_RIGHT)
+        (self.l_vertical_table, self.l_vertical_value_table) = self._build_stick_tables("l_vertical",
+            (L.left_vertical_min, L.left_vertical_center, L.left_vertical_max),
+            ButtonType.ANALOG_L_DOWN, ButtonType.ANALOG_L_UP, invert=True)
+        (self.r_horizontal_table, self.r_horizontal_value_table) = self._build_stick_tables("r_horizontal",
+            (R.right_horizontal_min, R.right_horizontal_center, R.right_horizontal_max),
+            ButtonType.ANALOG_R_LEFT, ButtonType.ANALOG_R_RIGHT)
+        (self.r_vertical_table, self.r_vertical_value_table) = self._build_stick_tables("r_vertical",
+            (R.right_vertical_min, R.right_vertical_center, R.right_vertical_max),
+            ButtonType.ANALOG_R_DOWN, ButtonType.ANALOG_R_UP, invert=True)
+
+        self.l_deadzone = None
+        self.r_deadzone = None
+        if self.calibration.radial_deadzone > 0:
+            self.l_deadzone = self._build_deadzone("l_horizontal", "l_vertical")
+            (self.l_horizontal_deadzone_table, self.l_vertical_deadzone_table,
+             self.l_horizontal_center, self.l_vertical_center) = self.l_deadzone
+            self.r_deadzone = self._build_deadzone("r_horizontal", "r_vertical")
+            (self.r_horizontal_deadzone_table, self.r_vertical_deadzone_table,
+             self.r_horizontal_center, self.r_vertical_center) = self.r_deadzone
+            self.decode = self._decode_with_deadzone
+
+    def read_sticks(self, raw: list[int]) -> dict[str, int]:
+        return {
+            "l_horizontal": raw[6] | ((raw[7] & 0xf) << 8),
+            "l_vertical": (raw[7] >> 4) | (raw[8] << 4),
+            "r_horizontal": raw[9] | ((raw[10] & 0xf) << 8),
+            "r_vertical": (raw[10] >> 4) | (raw[11] << 4),
+        }
+
+    def decode(self, raw: list[int], axis_values: list[float]) -> int:
+        left_horizontal = raw[6] | ((raw[7] & 0xf) << 8)
+        left_vertical = (raw[7] >> 4) | (raw[8] << 4)
+        right_horizontal = raw[9] | ((raw[10] & 0xf) << 8)
+        right_vertical = (raw[10] >> 4) | (raw[11] << 4)
+
+        axis_values[_L_DOWN] = self.l_vertical_value_table[left_vertical]
+        axis_values[_L_RIGHT] = self.l_horizontal_value_table[left_horizontal]
+        axis_values[_R_DOWN] = self.r_vertical_value_table[right_vertical]
+        axis_values[_R_RIGHT] = self.r_horizontal_value_table[right_horizontal]
+
+        return (_SWITCH_BYTE3_TABLE[raw[3]]
+                | _SWITCH_BYTE4_TABLE[raw[4]]
+                | _SWITCH_BYTE5_TABLE[raw[5]]
+                | self.l_horizontal_table[left_horizontal]
+                | self.l_vertical_table[left_vertical]
+                | self.r_horizontal_table[right_horizontal]
+                | self.r_vertical_table[right_vertical])
+
+
+    def _decode_with_deadzone(self, raw: list[int], axis_values: list[float]) -> int:
+        left_horizontal = raw[6] | ((raw[7] & 0xf) << 8)
+        left_vertical = (raw[7] >> 4) | (raw[8] << 4)
+        right_horizontal = raw[9] | ((raw[10] & 0xf) << 8)
+        right_vertical = (raw[10] >> 4) | (raw[11] << 4)
+        if self.l_horizontal_deadzone_table[left_horizontal] + self.l_vertical_deadzone_table[left_vertical] < 1.0:
+            left_horizontal = self.l_horizontal_center
+            left_vertical = self.l_vertical_center
+        if self.r_horizontal_deadzone_table[right_horizontal] + self.r_vertical_deadzone_table[right_vertical] < 1.0:
+            right_horizontal = self.r_horizontal_center
+            right_vertical = self.r_vertical_center
+
+        axis_values[_L_DOWN] = self.l_vertical_value_table[left_vertical]
+        axis_values[_L_RIGHT] = self.l_horizontal_value_table[left_horizontal]
+        axis_values[_R_DOWN] = self.r_vertical_value_table[right_vertical]
+        axis_values[_R_RIGHT] = self.r_horizontal_value_table[right_horizontal]
+
+        return (_SWITCH_BYTE3_TABLE[raw[3]]
+                | _SWITCH_BYTE4_TABLE[raw[4]]
+                | _SWITCH_BYTE5_TABLE[raw[5]]
+                | self.l_horizontal_table[left_horizontal]
+                | self.l_vertical_table[left_vertical]
+                | self.r_horizontal_table[right_horizontal]
+                | self.r_vertical_table[right_vertical])
\ No newline at end of file
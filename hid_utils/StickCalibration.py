@@ -0,0 +1,39 @@
+# 12-bit stick axes of the Joy-Con and Pro Controller reports
+STICK_AXIS_NAMES = ["l_horizontal", "l_vertical", "r_horizontal", "r_vertical"]
+
+class StickCalibration:
+    # (min, center, max) raw value per stick axis, and a radial deadzone
+    # (fraction of the stick range around the center that reads as centered, 0.0 is off).
+    # axes without a range keep the defaults of the decoder
+    def __init__(self, axes: dict[str, tuple[int, int, int]] | None = None, radial_deadzone: float = 0.0):
+        self.axes: dict[str, tuple[int, int, int]] = {}
+        for (name, axis_range) in (axes or {}).items():
+            if name not in STICK_AXIS_NAMES:
+                raise ValueError(f"Unknown stick axis: {name}")
+            (value_min, value_center, value_max) = [int(x) for x in axis_range]
+            if not 0 <= value_min < value_center < value_max <= 0xfff:
+                raise ValueError(f"Invalid range of {name}: min {value_min}, center {value_center}, max {value_max}")
+            self.axes[name] = (value_min, value_center, value_max)
+        if not 0.0 <= radial_deadzone < 1.0:
+            raise ValueError(f"radial_deadzone must be 0.0 <= x < 1.0: {radial_deadzone}")
+        self.radial_deadzone = float(radial_deadzone)
+
+    def get_axis(self, name: str, default: tuple[int, int, int]) -> tuple[int, int, int]:
+        return self.axes.get(name, default)
+
+    def with_radial_deadzone(self, radial_deadzone: float) -> 'StickCalibration':
+        return StickCalibration(self.axes, radial_deadzone)
+
+    def to_dict(self) -> dict:
+        return {
+            "axes": {name: list(axis_range) for (name, axis_range) in self.axes.items()},
+            "radial_deadzone": self.radial_deadzone,
+        }
+
+    @staticmethod
+    def from_dict(d: dict) -> 'StickCalibration':
+        return StickCalibration(d.get("axes", {}), d.get("radial_deadzone", 0.0))
+
+    def __str__(self):
+        axes_str = ", ".join([f"{name}={axis_range}" for (name, axis_range) in self.axes.items()])
+        return f"StickCalibration({axes_str}, radial_deadzone={self.radial_deadzone:.3f})"
@@ -0,0 +1,108 @@
+from .ReportDecoder import ReportDecoder
+from .StickCalibration import StickCalibration
+
+# NOTE:
+#
+# learns a StickCalibration from live reports of one device:
+#   center           mean of the windows of window_size reports in which the axis stayed still
+#                    (moved at most rest_noise), near the center the decoder had before
+#   min / max        the extremes seen, once the stick went at least half way to that end
+#                    (otherwise the range the decoder had before is kept)
+#   radial deadzone  the largest rest noise seen, as a fraction of the range, times deadzone_margin
+
+class StickCalibrator:
+    # how far from the previous center a still stick is taken as resting (fraction of the half range)
+    CENTER_TOLERANCE = 0.15
+    # how far an end has to be reached to replace the previous one (fraction of the half range)
+    MIN_RANGE_RATE = 0.5
+    MIN_DEADZONE = 0.02
+    MAX_DEADZONE = 0.3
+
+    def __init__(self, decoder: ReportDecoder, window_size: int = 16, rest_noise: int = 24,
+            deadzone_margin: float = 1.5):
+        if window_size <= 1:
+            raise ValueError(f"window_size must be > 1: {window_size}")
+        self.decoder = decoder
+        self.window_size = window_size
+        self.rest_noise = rest_noise
+        self.deadzone_margin = deadzone_margin
+        # (min, center, max) the decoder had before, per stick axis
+        self.prior_ranges = dict(decoder.stick_ranges)
+        self.report_count = 0
+        self._windows: dict[str, list[int]] = {name: [] for name in self.prior_ranges}
+        self._rest_sums: dict[str, int] = {name: 0 for name in self.prior_ranges}
+        self._rest_counts: dict[str, int] = {name: 0 for name in self.prior_ranges}
+        self._rest_deviations: dict[str, float] = {name: 0.0 for name in self.prior_ranges}
+        self._mins: dict[str, int] = {name: 0xfff for name in self.prior_ranges}
+        self._maxs: dict[str, int] = {name: 0 for name in self.prior_ranges}
+
+    def feed(self, raw: list[int]):
+        if not raw:
+            return
+        self.report_count += 1
+        for (name, value) in self.decoder.read_sticks(raw).items():
+            if value < self._mins[name]:
+                self._mins[name] = value
+            if value > self._maxs[name]:
+                self._maxs[name] = value
+            window = self._windows[name]
+            window.append(value)
+            if len(window) >= self.window_size:
+                self._add_window(name, window)
+                window.clear()
+
+    def _add_window(self, name: str, window: list[int]):
+        if max(window) - min(window) > self.rest_noise:
+            return
+        (value_min, value_center, value_max) = self.prior_ranges[name]
+        mean = sum(window) / len(window)
+        half_range = min(value_center - value_min, value_max - value_center)
+        if abs(mean - value_center) > half_range * self.CENTER_TOLERANCE:
+            # held still, but not at the center
+            return
+        self._rest_sums[name] += sum(window)
+        self._rest_counts[name] += len(window)
+        deviation = max(abs(x - mean) for x in window)
+        self._rest_deviations[name] = max(self._rest_deviations[name], deviation)
+
+    def get_axes_without_rest(self) -> list[str]:
+        # axes never seen resting, their centers are kept
+        return [name for (name, count) in self._rest_counts.items() if count == 0]
+
+    def _get_axis(self, name: str) -> tuple[int, int, int]:
+        (value_min, value_center, value_max) = self.prior_ranges[name]
+        if self._rest_counts[name] > 0:
+            center = round(self._rest_sums[name] / self._rest_counts[name])
+        else:
+            center = value_center
+        if center - self._mins[name] >= (value_center - value_min) * self.MIN_RANGE_RATE:
+            value_min = self._mins[name]
+        if self._maxs[name] - center >= (value_max - value_center) * self.MIN_RANGE_RATE:
+            value_max = self._maxs[name]
+        # a center learned outside the kept range falls back to the previous one
+        if not value_min < center < value_max:
+            center = value_center
+        return (value_min, center, value_max)
+
+    def get_radial_deadzone(self) -> float:
+        rate = 0.0
+        for name in self.prior_ranges:
+            (value_min, value_center, value_max) = self._get_axis(name)
+            half_range = min(value_center - value_min, value_max - value_center)
+            rate = max(rate, self._rest_deviations[name] / half_range)
+        return min(max(rate * self.deadzone_margin, self.MIN_DEADZONE), self.MAX_DEADZONE)
+
+    def get_calibration(self) -> StickCalibration:
+        axes = {name: self._get_axis(name) for name in self.prior_ranges}
+        return StickCalibration(axes, self.get_radial_deadzone())
+
+    def get_progress(self) -> str:
+        axes_str = ", ".join([
+            f"{name} {self._mins[name] if self._mins[name] <= self._maxs[name] else '-'}"
+            f"..{self._maxs[name] if self._mins[name] <= self._maxs[name] else '-'}"
+            f" rest {self._rest_counts[name] // self.window_size}"
+            for name in self.prior_ranges])
+        return f"{self.report_count} reports: {axes_str}"
+
+    def __str__(self):
+        return f"StickCalibrator({self.decoder.__class__.__name__}, reports={self.report_count})"
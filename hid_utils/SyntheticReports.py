@@ -0,0 +1,103 @@
+import random
+from .DeviceMode import DeviceMode
+from .JoyConType import JoyConType
+from .ReportDecoder import JoyConLDecoder, JoyConRDecoder
+
+# (byte index, bits) of the buttons each device reports
+_DINPUT_BUTTON_BITS = [(4, [0x10, 0x20, 0x40, 0x80]), (5, [0x1, 0x2, 0x4, 0x8, 0x10, 0x20, 0x40, 0x80])]
+_JOYCON_L_BUTTON_BITS = [(4, [0x1, 0x8]), (5, [0x1, 0x2, 0x4, 0x8, 0x40, 0x80])]
+_JOYCON_R_BUTTON_BITS = [(3, [0x1, 0x2, 0x4, 0x8, 0x40, 0x80]), (4, [0x2, 0x4])]
+_SWITCH_PRO_BUTTON_BITS = _JOYCON_L_BUTTON_BITS + _JOYCON_R_BUTTON_BITS
+# NOTE: XINPUT triggers are pulled by toggling the top bits of LT / RT (0 <-> 768 of 1023)
+_XINPUT_BUTTON_BITS = [(14, [0x1, 0x2, 0x8, 0x10, 0x40, 0x80]), (15, [0x4, 0x8, 0x20, 0x40]), (10, [0x3]), (12, [0x3])]
+
+def _stick12(min_value: int, center: int, max_value: int, rate: float) -> int:
+    # rate -1.0 .. 1.0 -> raw 12-bit value
+    if rate >= 0:
+        return int(center + (max_value - center) * rate)
+    return int(center + (center - min_value) * rate)
+
+def _put_stick12(raw: list[int], offset: int, horizontal: int, vertical: int):
+    raw[offset] = horizontal & 0xff
+    raw[offset + 1] = ((horizontal >> 8) & 0xf) | ((vertical & 0xf) << 4)
+    raw[offset + 2] = (vertical >> 4) & 0xff
+
+class SyntheticReports:
+    # endless typing-like session of raw reports for one device:
+    # a button toggles in press_rate of the reports, sticks rest at the center or hold a tilt for a while
+    def __init__(self, mode: DeviceMode, joycon_type: JoyConType = JoyConType.NONE,
+            seed: int = 0, report_size: int = 64, press_rate: float = 0.05):
+        if mode == DeviceMode.DINPUT:
+            self.button_bits = _DINPUT_BUTTON_BITS
+        elif mode == DeviceMode.JOYCON and joycon_type == JoyConType.L:
+            self.button_bits = _JOYCON_L_BUTTON_BITS
+        elif mode == DeviceMode.JOYCON and joycon_type == JoyConType.R:
+            self.button_bits = _JOYCON_R_BUTTON_BITS
+        elif mode == DeviceMode.SWITCH_PRO:
+            self.button_bits = _SWITCH_PRO_BUTTON_BITS
+        elif mode == DeviceMode.XINPUT:
+            self.button_bits = _XINPUT_BUTTON_BITS
+        else:
+            raise ValueError(f"No synthetic reports for {mode} {joycon_type}")
+        self.mode = mode
+        self.joycon_type = joycon_type
+        self.report_size = report_size
+        self.press_rate = press_rate
+        self.rng = random.Random(seed)
+
+    def __iter__(self):
+        rng = self.rng
+        mode = self.mode
+        L = JoyConLDecoder
+        R = JoyConRDecoder
+        buttons = [0] * self.report_size
+        # (l_x, l_y, r_x, r_y) in -1.0 .. 1.0
+        sticks = [0.0, 0.0, 0.0, 0.0]
+        stick_hold = 0
+        hat = 0x8
+
+        while True:
+            if rng.random() < self.press_rate:
+                (index, bits) = rng.choice(self.button_bits)
+                buttons[index] ^= rng.choice(bits)
+                if mode == DeviceMode.DINPUT and rng.random() < 0.2:
+                    hat = 0x8 if hat != 0x8 else rng.choice([0x0, 0x2, 0x4, 0x6])
+                elif mode == DeviceMode.XINPUT and rng.random() < 0.2:
+                    # XINPUT hat is 0 for none, DINPUT hat + 1 otherwise
+                    hat = 0x8 if hat != 0x8 else rng.choice([0x0, 0x2, 0x4, 0x6])
+
+            if stick_hold <= 0:
+                stick_hold = rng.randrange(20, 200)
+                if rng.random() < 0.5:
+                    sticks = [0.0, 0.0, 0.0, 0.0]
+                else:
+                    sticks = [rng.uniform(-1.0, 1.0) for _ in range(4)]
+            stick_hold -= 1
+            # sensor noise around the held position
+            (lx, ly, rx, ry) = [min(max(v + rng.uniform(-0.01, 0.01), -1.0), 1.0) for v in sticks]
+
+            raw = buttons.copy()
+            if mode == DeviceMode.DINPUT:
+                raw[0] = int(0x80 + lx * 0x7f)
+                raw[1] = int(0x80 + ly * 0x7f)
+                raw[2] = int(0x80 + rx * 0x7f)
+                raw[3] = int(0x80 + ry * 0x7f)
+                raw[4] = (buttons[4] & 0xf0) | hat
+            elif mode == DeviceMode.XINPUT:
+                raw[0] = 0x01
+                for (offset, v) in [(1, lx), (3, ly), (5, rx), (7, ry)]:
+                    value = int(0x8000 + v * 0x7fff)
+                    raw[offset] = value & 0xff
+                    raw[offset + 1] = value >> 8
+                raw[13] = 0 if hat == 0x8 else hat + 1
+            else:
+                _put_stick12(raw, 6,
+                             _stick12(L.left_horizontal_min, L.left_horizontal_center, L.left_horizontal_max, lx),
+                             _stick12(L.left_vertical_min, L.left_vertical_center, L.left_vertical_max, ly))
+                _put_stick12(raw, 9,
+                             _stick12(R.right_horizontal_min, R.right_horizontal_center, R.right_horizontal_max, rx),
+                             _stick12(R.right_vertical_min, R.right_vertical_center, R.right_vertical_max, ry))
+            yield raw
+
+    def __str__(self):
+        return f"SyntheticReports({self.mode.name}, {self.joycon_type.name})"
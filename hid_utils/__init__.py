@@ -1,7 +1,24 @@
 from .HIDDeviceManager import HIDDeviceManager
 from .HIDDevice import HIDDevice
+from .HIDDeviceMonitor import HIDDeviceMonitor
 from .DeviceMode import DeviceMode
 from .ButtonType import ButtonType
 from .ButtonEvent import ButtonEvent
+from .ButtonStates import ButtonStates
+from .AxisValues import AxisValues
+from .DeviceState import DeviceState
 from .JoyConType import JoyConType
-from .AxisType import AxisType
\ No newline at end of file
+from .AxisType import AxisType
+from .ReaderMode import ReaderMode
+from .HIDReport import HIDReport
+from .HIDDeviceReader import HIDDeviceReader, HIDDeviceReaderGroup
+from .HIDCapture import HIDCaptureWriter, HIDCaptureReader
+from .HIDBackend import HIDBackend
+from .HIDAPIBackend import HIDAPIBackend
+from .FakeHIDBackend import FakeHIDBackend, FakeHIDDevice
+from .SyntheticReports import SyntheticReports
+from .StickCalibration import StickCalibration, STICK_AXIS_NAMES
+from .CalibrationStore import CalibrationStore
+from .StickCalibrator import StickCalibrator
+from .AxisHysteresis import AxisHysteresis
+# NOTE: BatchDecoder needs numpy, import it from hid_utils.BatchDecoder
\ No newline at end of file